@@ -0,0 +1,49 @@
+import pytest
+from django.core.cache import cache
+
+from core.querybudget import QueryBudget
+from posts.graph import graph
+from posts.models import Post
+from posts import cache as group_cache
+from users import cache as user_cache
+
+pytestmark = [pytest.mark.django_db]
+
+PAGES = {
+    'index': '/',
+    'group_list': '/group/test-link/',
+    'profile': '/profile/TestUser/',
+    'follow_index': '/follow/',
+}
+
+
+def measure(client, url):
+    cache.clear()
+    user_cache._local.clear()
+    group_cache._groups.clear()
+    graph.clear()
+    with QueryBudget() as budget:
+        response = client.get(url)
+    assert response.status_code == 200, f'Страница `{url}` не открывается'
+    return budget.queries
+
+
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('name', PAGES)
+    def test_queries_do_not_grow(self, name, mixer, user, user_client, group,
+                                 few_posts_with_group, query_baseline):
+        url = PAGES[name]
+        before = measure(user_client, url)
+        mixer.cycle(20).blend(Post, author=user, group=group)
+        after = measure(user_client, url)
+        assert len(after) == len(before), (
+            f'Число запросов страницы `{url}` растёт вместе с числом постов'
+        )
+        regression = query_baseline.check(name, after)
+        assert regression is None, regression
+
+    @pytest.mark.query_budget(15)
+    def test_index_budget_marker(self, client, few_posts_with_group):
+        cache.clear()
+        assert client.get('/').status_code == 200
@@ -0,0 +1,165 @@
+"""Объединение записей горячего пути в общие транзакции.
+
+В SQLite каждая транзакция на запись берёт блокировку всей базы и
+ждёт синхронизации журнала на диск. Когда много запросов подряд пишут
+по одной строке (например, комментарии к одному популярному посту),
+время уходит на коммиты, а не на вставки.
+
+WriteBatcher принимает объекты из потоков запросов, а один поток-писатель
+копит их до WRITE_BATCH_WINDOW секунд или WRITE_BATCH_SIZE штук и
+сохраняет одной транзакцией на базу. Каждый объект сохраняется обычным
+save() в своей точке сохранения: сигналы срабатывают как раньше, pk
+проставляется, а ошибка одной записи не откатывает остальные. Поток
+запроса ждёт коммита своей пачки, так что после ответа запись уже
+надёжно в базе и видна следующим чтениям.
+
+Внутри транзакции вызывающего объединять нечего — такие записи
+сохраняются сразу в его потоке.
+"""
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import router, transaction
+
+from core import metrics
+
+
+class _Write:
+    def __init__(self, obj, after):
+        self.obj = obj
+        self.after = after
+        # Состояние до сохранения — для повтора после отката пачки.
+        self.pk = obj.pk
+        self.adding = obj._state.adding
+        self.done = threading.Event()
+        self.error = None
+
+
+class WriteBatcher:
+    """Очередь записей с одним потоком-писателем."""
+
+    def __init__(self, name, window=None, size=None):
+        self.name = name
+        self.window = (
+            settings.WRITE_BATCH_WINDOW if window is None else window
+        )
+        self.size = size or settings.WRITE_BATCH_SIZE
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def save(self, obj, after=None):
+        """Сохраняет obj и вызывает after(obj) в той же транзакции.
+
+        Возвращается после коммита; ошибка записи поднимается здесь.
+        """
+        if transaction.get_connection().in_atomic_block:
+            obj.save()
+            if after is not None:
+                after(obj)
+            return
+        write = _Write(obj, after)
+        self._start()
+        self._queue.put(write)
+        if not write.done.wait(settings.WRITE_BATCH_TIMEOUT):
+            raise TimeoutError(f'Запись {self.name} не дождалась коммита')
+        if write.error is not None:
+            raise write.error
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f'writer-{self.name}', daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                by_database = {}
+                for write in batch:
+                    using = router.db_for_write(
+                        type(write.obj), instance=write.obj
+                    ) or 'default'
+                    by_database.setdefault(using, []).append(write)
+                for using, writes in by_database.items():
+                    self._flush(using, writes)
+                metrics.incr(f'batching.{self.name}.batches')
+                metrics.incr(f'batching.{self.name}.writes', len(batch))
+            except Exception as error:
+                # Поток-писатель не должен умирать: ошибка достаётся
+                # всем ещё не сохранённым записям пачки.
+                for write in batch:
+                    if not write.done.is_set():
+                        write.error = write.error or error
+            finally:
+                for write in batch:
+                    write.done.set()
+
+    def _flush(self, using, writes):
+        """Сохраняет writes одной транзакцией.
+
+        SQLite проверяет внешние ключи только при коммите, и одна плохая
+        запись откатывает всю пачку; тогда записи сохраняются заново по
+        одной, чтобы ошибка досталась только своему автору.
+        """
+        try:
+            self._commit(using, writes)
+        except Exception as error:
+            if len(writes) == 1:
+                writes[0].error = writes[0].error or error
+                return
+            for write in writes:
+                write.obj.pk = write.pk
+                write.obj._state.adding = write.adding
+                write.error = None
+                try:
+                    self._commit(using, [write])
+                except Exception as error:
+                    write.error = write.error or error
+        finally:
+            for write in writes:
+                write.done.set()
+
+    def _commit(self, using, writes):
+        # Побочные записи (счётчики, задачи, уведомления) идут в default,
+        # поэтому транзакция открыта и там.
+        with transaction.atomic(), transaction.atomic(using=using):
+            for write in writes:
+                try:
+                    with transaction.atomic(), \
+                            transaction.atomic(using=using):
+                        write.obj.save(using=using)
+                        if write.after is not None:
+                            write.after(write.obj)
+                except Exception as error:
+                    write.error = error
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(name):
+    """Общий для процесса WriteBatcher с именем name."""
+    with _writers_lock:
+        if name not in _writers:
+            _writers[name] = WriteBatcher(name)
+        return _writers[name]
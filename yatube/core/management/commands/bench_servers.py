@@ -0,0 +1,98 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import AsgiHandler, build_environ
+
+
+def make_scope(path):
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'scheme': 'http',
+        'http_version': '1.1',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI и ASGI, когда клиенты '
+        'медленно отправляют запрос и читают ответ.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/about/tech/')
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Синхронных воркеров WSGI и потоков пула ASGI.',
+        )
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=0.05,
+            help='Сколько секунд клиент передаёт запрос и читает ответ.',
+        )
+
+    def bench_wsgi(self, application, scope, options):
+        delay = options['delay']
+
+        def client(_):
+            time.sleep(delay)
+            environ = build_environ(scope, io.BytesIO())
+            response = application(environ, lambda *args: None)
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            time.sleep(delay)
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            list(pool.map(client, range(options['clients'])))
+
+    def bench_asgi(self, application, scope, options):
+        delay = options['delay']
+        handler = AsgiHandler(application, max_workers=options['workers'])
+
+        async def client():
+            async def receive():
+                await asyncio.sleep(delay)
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if (message['type'] == 'http.response.body'
+                        and not message.get('more_body')):
+                    await asyncio.sleep(delay)
+
+            await handler(dict(scope), receive, send)
+
+        async def run_clients():
+            await asyncio.gather(
+                *(client() for _ in range(options['clients']))
+            )
+
+        asyncio.run(run_clients())
+
+    def handle(self, *args, **options):
+        application = get_wsgi_application()
+        scope = make_scope(options['path'])
+        for name, bench in (('WSGI', self.bench_wsgi),
+                            ('ASGI', self.bench_asgi)):
+            started = time.perf_counter()
+            bench(application, scope, options)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name}: {options["clients"]} запросов за {elapsed:.2f} с, '
+                f'{options["clients"] / elapsed:.1f} запросов/с'
+            )
@@ -0,0 +1,87 @@
+import time
+from importlib import import_module
+
+from django.contrib.auth import SESSION_KEY
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+    'core.sessions',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает движки сессий: время и число запросов к базе на '
+        'типичный поток запросов вошедших пользователей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=50)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Запросов на одну сессию.',
+        )
+        parser.add_argument(
+            '--write-every',
+            type=int,
+            default=10,
+            help='Каждый какой запрос меняет данные сессии.',
+        )
+        parser.add_argument(
+            '--touch-every',
+            type=int,
+            default=2,
+            help='Каждый какой запрос помечает сессию изменённой, '
+                 'не меняя данных.',
+        )
+
+    def run_requests(self, engine, session_key, options):
+        """Поток запросов одной сессии, как их видит SessionMiddleware."""
+        for number in range(1, options['requests'] + 1):
+            session = engine.SessionStore(session_key)
+            session.get(SESSION_KEY)
+            if number % options['write_every'] == 0:
+                session['last_seen'] = number
+            elif number % options['touch_every'] == 0:
+                session['theme'] = 'light'
+            if session.modified:
+                session.save()
+                session_key = session.session_key
+        return session_key
+
+    def bench(self, engine_name, options):
+        engine = import_module(engine_name)
+        keys = []
+        with override_settings(SESSION_ENGINE=engine_name):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for user_id in range(options['sessions']):
+                    session = engine.SessionStore()
+                    session[SESSION_KEY] = str(user_id)
+                    session['theme'] = 'light'
+                    session.create()
+                    keys.append(
+                        self.run_requests(
+                            engine, session.session_key, options
+                        )
+                    )
+                elapsed = time.perf_counter() - started
+            for key in keys:
+                engine.SessionStore(key).delete()
+        total = options['sessions'] * options['requests']
+        self.stdout.write(
+            f'{engine_name}: {elapsed * 1000000 / total:.0f} мкс и '
+            f'{len(queries) / total:.2f} запросов к базе на запрос'
+        )
+
+    def handle(self, *args, **options):
+        for engine_name in ENGINES:
+            self.bench(engine_name, options)
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core.startup import by_package, parse_importtime
+
+# Выполняется в отдельном интерпретаторе: в текущем всё уже импортировано.
+SCRIPT = '''
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+timings = {'setup': time.perf_counter() - started}
+if WARM:
+    from core.startup import warm
+    started = time.perf_counter()
+    timings['templates'] = warm()
+    timings['warm'] = time.perf_counter() - started
+print(json.dumps(timings))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет старт процесса в отдельном интерпретаторе: время '
+        'импорта модулей (по python -X importtime), готовность приложений '
+        'и, с --warm, прогрев перед fork.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Сколько самых дорогих модулей показать.',
+        )
+        parser.add_argument(
+            '--packages', action='store_true',
+            help='Складывать время по пакетам верхнего уровня.',
+        )
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Заодно замерить core.startup.warm().',
+        )
+
+    def handle(self, *args, **options):
+        script = SCRIPT.replace('WARM', repr(options['warm']))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            capture_output=True,
+            text=True,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        )
+        if result.returncode:
+            self.stderr.write(result.stderr)
+            return
+        modules = parse_importtime(result.stderr.splitlines())
+        timings = json.loads(result.stdout.splitlines()[-1])
+        limit = options['limit']
+        if options['packages']:
+            self.stdout.write(f'{"мс":>9}  пакет')
+            for package, own in by_package(modules)[:limit]:
+                self.stdout.write(f'{own / 1000:9.1f}  {package}')
+        else:
+            self.stdout.write(f'{"своё, мс":>9} {"всего, мс":>10}  модуль')
+            top = sorted(modules, key=lambda module: -module[1])[:limit]
+            for name, own, total in top:
+                self.stdout.write(
+                    f'{own / 1000:9.1f} {total / 1000:10.1f}  {name}'
+                )
+        imported = sum(own for _, own, _ in modules)
+        self.stdout.write(
+            f'Модулей: {len(modules)}, импорт: {imported / 1000:.1f} мс, '
+            f'django.setup(): {timings["setup"] * 1000:.1f} мс'
+        )
+        if 'warm' in timings:
+            self.stdout.write(
+                f'Прогрев: {timings["warm"] * 1000:.1f} мс, '
+                f'шаблонов: {timings["templates"]}'
+            )
@@ -0,0 +1,43 @@
+"""Счётчики производительности в общем кеше.
+
+Счётчики переживают перезапуск процессов (пока живёт кеш) и видны всем
+воркерам, поэтому их можно читать командой управления или из админки —
+но только если кеш default действительно общий (memcached, Redis).
+LocMemCache и DummyCache у каждого процесса свои: команда в отдельном
+процессе увидит нули. is_shared() сообщает, можно ли верить чужим
+счётчикам.
+"""
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+KEY_PREFIX = 'metrics:'
+# Бэкенды, данные которых живут в памяти одного процесса.
+LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared():
+    """Видны ли счётчики этого процесса другим процессам."""
+    return not isinstance(caches['default'], LOCAL_BACKENDS)
+
+
+def incr(name, value=1):
+    """Увеличивает счётчик name на value."""
+    key = KEY_PREFIX + name
+    try:
+        cache.incr(key, value)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, value)
+
+
+def observe(name, seconds):
+    """Учитывает длительность операции: число вызовов и сумму в мс."""
+    incr(f'{name}.count')
+    incr(f'{name}.ms', int(seconds * 1000))
+
+
+def snapshot(*names):
+    """Возвращает {name: значение} для перечисленных счётчиков."""
+    values = cache.get_many([KEY_PREFIX + name for name in names])
+    return {name: values.get(KEY_PREFIX + name, 0) for name in names}
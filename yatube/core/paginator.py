@@ -0,0 +1,46 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который не считает всю таблицу.
+
+    Точное число записей известно, пока их не больше exact_limit: оно
+    считается по подзапросу с LIMIT. Дальше это оценка: для выборки без
+    фильтров — по статистике PostgreSQL или по разбросу первичных ключей,
+    для остальных — просто exact_limit. Номера последних страниц при
+    оценке неточны, но список открывается за миллисекунды.
+    """
+
+    exact_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        capped = queryset[:self.exact_limit + 1].count()
+        if capped <= self.exact_limit or queryset.query.where:
+            return capped
+        return max(self.estimate(queryset), capped)
+
+    @staticmethod
+    def estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row is not None:
+                return int(row[0])
+        bounds = queryset.model._default_manager.db_manager(
+            queryset.db
+        ).aggregate(
+            low=Min('pk'), high=Max('pk')
+        )
+        if bounds['low'] is None:
+            return 0
+        return bounds['high'] - bounds['low'] + 1
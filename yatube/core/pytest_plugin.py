@@ -0,0 +1,60 @@
+"""Плагин pytest для бюджета SQL-запросов (см. core.querybudget).
+
+Подключается через pytest_plugins в conftest.py и даёт:
+
+* маркер ``@pytest.mark.query_budget(n)`` — тест падает, если за время
+  его выполнения к базе ушло больше n запросов;
+* фикстуру ``query_baseline`` — Baseline из файла, заданного опцией
+  ``query_baseline`` в pytest.ini; ``--update-query-baseline`` обновляет
+  файл вместо проверки.
+"""
+import os
+
+import pytest
+
+from .querybudget import Baseline, QueryBudget
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--update-query-baseline',
+        action='store_true',
+        help='Перезаписать baseline запросов вместо проверки.',
+    )
+    parser.addini(
+        'query_baseline',
+        'Файл baseline запросов относительно корня pytest.',
+        default='tests/query_baseline.json',
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(limit): не больше limit SQL-запросов за тест',
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        yield
+        return
+    budget = QueryBudget(*marker.args, **marker.kwargs)
+    with budget:
+        outcome = yield
+        if outcome.excinfo is not None:
+            # Тест уже упал сам — бюджет не проверяем.
+            budget.limit = None
+
+
+@pytest.fixture(scope='session')
+def query_baseline(request):
+    config = request.config
+    baseline = Baseline(
+        os.path.join(str(config.rootdir), config.getini('query_baseline')),
+        update=config.getoption('update_query_baseline') or None,
+    )
+    yield baseline
+    baseline.save()
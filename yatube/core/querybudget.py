@@ -0,0 +1,118 @@
+"""Бюджет SQL-запросов для тестов.
+
+QueryBudget записывает запросы внутри блока или функции и падает, если
+их больше лимита. Baseline хранит в JSON нормализованный SQL каждого
+проверенного представления и сообщает о росте числа запросов вместе с
+диффом: так N+1 в шаблоне или во вьюхе виден сразу, а не в проде.
+
+Файлы baseline обновляются при QUERY_BASELINE_UPDATE=1 в окружении (или
+pytest --update-query-baseline) и коммитятся вместе с изменением.
+"""
+import difflib
+import json
+import os
+import re
+from contextlib import ContextDecorator
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+UPDATE_ENV = 'QUERY_BASELINE_UPDATE'
+
+_LITERALS = (
+    # Имена точек сохранения содержат id потока.
+    (re.compile(r'"s\d+_x\d+"'), '"s?"'),
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'IN \(\?(?:, \?)*\)'), 'IN (...)'),
+)
+
+
+def normalize(sql):
+    """SQL без значений: id, строки и длина списков IN не важны."""
+    for pattern, replacement in _LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+class QueryBudget(ContextDecorator):
+    """Записывает запросы к базе using; при limit — проверяет их число."""
+
+    def __init__(self, limit=None, using='default'):
+        self.limit = limit
+        self.using = using
+        self.queries = []
+
+    def __enter__(self):
+        self._context = CaptureQueriesContext(connections[self.using])
+        self._context.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._context.__exit__(exc_type, exc_value, traceback)
+        self.queries = [
+            normalize(query['sql']) for query in self._context.captured_queries
+        ]
+        if exc_type is None and self.limit is not None:
+            if len(self.queries) > self.limit:
+                raise AssertionError(
+                    f'Запросов {len(self.queries)}, бюджет {self.limit}:\n'
+                    + '\n'.join(self.queries)
+                )
+        return False
+
+
+query_budget = QueryBudget
+
+
+class Baseline:
+    """Эталонные запросы представлений из JSON-файла {имя: [sql, ...]}."""
+
+    def __init__(self, path, update=None):
+        self.path = path
+        if update is None:
+            update = bool(os.environ.get(UPDATE_ENV))
+        self.update = update
+        self.changed = False
+        try:
+            with open(path, encoding='utf-8') as file:
+                self.queries = json.load(file)
+        except FileNotFoundError:
+            self.queries = {}
+
+    def check(self, name, queries):
+        """Сообщение о регрессии для name или None.
+
+        В режиме обновления запоминает queries и ничего не проверяет.
+        """
+        expected = self.queries.get(name)
+        if self.update:
+            if expected != queries:
+                self.queries[name] = queries
+                self.changed = True
+            return None
+        if expected is None:
+            return (
+                f'{name}: нет в {self.path}, запустите тесты '
+                f'с {UPDATE_ENV}=1'
+            )
+        if len(queries) <= len(expected):
+            return None
+        diff = difflib.unified_diff(
+            expected, queries, 'baseline', 'сейчас', lineterm=''
+        )
+        return (
+            f'{name}: запросов {len(queries)} вместо {len(expected)}\n'
+            + '\n'.join(diff)
+        )
+
+    def save(self):
+        if not self.changed:
+            return
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(
+                self.queries, file, ensure_ascii=False, indent=2,
+                sort_keys=True,
+            )
+            file.write('\n')
+        self.changed = False
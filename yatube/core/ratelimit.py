@@ -0,0 +1,99 @@
+"""Ограничение частоты запросов на запись.
+
+Корзина токенов хранится в общем кеше в виде одного числа — момента
+(в мс), когда корзина снова станет полной (алгоритм GCRA). Каждый запрос
+атомарно сдвигает этот момент на interval = period / count через
+cache.incr, поэтому отдельная блокировка не нужна. Запрос проходит, пока
+долг не превышает ёмкость корзины; отклонённый запрос свой токен
+возвращает.
+
+Лимиты задаются в settings.RATELIMITS: {имя: (count, period)} — не больше
+count запросов подряд и в среднем count за period секунд. Корзины ведутся
+отдельно для пользователя и для IP-адреса.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+from . import metrics
+
+KEY_PREFIX = 'ratelimit:'
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def hit(key, count, period):
+    """Тратит токен из корзины key.
+
+    Возвращает 0, если запрос разрешён, иначе сколько секунд ждать.
+    """
+    interval = max(int(period * 1000 / count), 1)
+    capacity = interval * count
+    timeout = 2 * math.ceil(capacity / 1000)
+    cache_key = KEY_PREFIX + key
+    now = _now_ms()
+    if cache.add(cache_key, now + interval, timeout):
+        return 0
+    try:
+        ready_at = cache.incr(cache_key, interval)
+    except ValueError:
+        cache.set(cache_key, now + interval, timeout)
+        return 0
+    if ready_at - interval < now:
+        # Корзина успела наполниться: отсчёт начинается заново.
+        cache.set(cache_key, now + interval, timeout)
+        return 0
+    wait = ready_at - capacity - now
+    if wait <= 0:
+        # incr не продлевает срок ключа: без touch корзина клиента, который
+        # всё время упирается в лимит, истекала бы и давала новую пачку.
+        cache.touch(cache_key, timeout)
+        return 0
+    try:
+        cache.decr(cache_key, interval)
+    except ValueError:
+        pass
+    return wait / 1000
+
+
+def request_keys(request, name):
+    """Ключи корзин, в которые попадает запрос."""
+    keys = [f'{name}:ip:{request.META.get("REMOTE_ADDR", "")}']
+    if request.user.is_authenticated:
+        keys.append(f'{name}:user:{request.user.pk}')
+    return keys
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, 'core/429.html', status=429)
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def ratelimit(name, methods=('POST',)):
+    """Декоратор представления: лимит settings.RATELIMITS[name].
+
+    methods — методы, которые тратят токены; None — любые.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limit = settings.RATELIMITS.get(name)
+            if limit is not None and (
+                methods is None or request.method in methods
+            ):
+                for key in request_keys(request, name):
+                    wait = hit(key, *limit)
+                    if wait:
+                        metrics.incr('ratelimit.throttled')
+                        metrics.incr(f'ratelimit.{name}.throttled')
+                        return too_many_requests(request, wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
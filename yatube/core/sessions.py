@@ -0,0 +1,104 @@
+"""Движок сессий: кеш с записью в базу только при изменениях.
+
+Подключается через SESSION_ENGINE = 'core.sessions'. Отличия от
+django.contrib.sessions.backends.cached_db:
+
+* сессия, данные которой не изменились с момента чтения, не
+  сохраняется вовсе — ни в кеш, ни в базу;
+* при SESSION_SIGNED_ANONYMOUS сессии без вошедшего пользователя живут
+  в подписанной cookie, как в backends.signed_cookies, и не занимают ни
+  кеш, ни таблицу; после входа сессия переезжает в кеш и базу;
+* clear_expired (команда clearsessions и задача очереди) удаляет
+  просроченные сессии пачками по SESSION_CLEAR_BATCH, а не одним DELETE,
+  который надолго заблокировал бы SQLite.
+"""
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.cached_db import (
+    SessionStore as CachedDBStore
+)
+from django.core import signing
+from django.utils import timezone
+
+from . import metrics
+
+SIGNING_SALT = 'core.sessions'
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = 'core.sessions.'
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._loaded = None
+
+    @staticmethod
+    def _is_signed(session_key):
+        # Ключи из базы состоят из букв и цифр, подпись всегда содержит ':'.
+        return session_key is not None and ':' in session_key
+
+    def _dump(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        if self._is_signed(self.session_key):
+            try:
+                data = signing.loads(
+                    self.session_key,
+                    salt=SIGNING_SALT,
+                    serializer=self.serializer,
+                    max_age=settings.SESSION_COOKIE_AGE,
+                )
+            except signing.BadSignature:
+                self._session_key = None
+                data = {}
+        else:
+            data = super().load()
+        self._loaded = self._dump(data)
+        return data
+
+    def exists(self, session_key):
+        if self._is_signed(session_key):
+            return False
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        if settings.SESSION_SIGNED_ANONYMOUS and SESSION_KEY not in data:
+            self._session_key = signing.dumps(
+                data,
+                salt=SIGNING_SALT,
+                serializer=self.serializer,
+                compress=True,
+            )
+            return
+        if self._is_signed(self.session_key):
+            # Пользователь вошёл: сессия переезжает из cookie в базу.
+            self._session_key = None
+            must_create = True
+        dumped = self._dump(data)
+        if not must_create and self.session_key and dumped == self._loaded:
+            metrics.incr('sessions.unchanged')
+            return
+        super().save(must_create=must_create)
+        self._loaded = dumped
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            session_key = self.session_key
+        if self._is_signed(session_key):
+            return
+        super().delete(session_key)
+
+    @classmethod
+    def clear_expired(cls):
+        model = cls.get_model_class()
+        expired = model.objects.filter(expire_date__lt=timezone.now())
+        while True:
+            keys = list(expired.values_list(
+                'session_key', flat=True
+            )[:settings.SESSION_CLEAR_BATCH])
+            if not keys:
+                return
+            model.objects.filter(session_key__in=keys).delete()
+            metrics.incr('sessions.cleared', len(keys))
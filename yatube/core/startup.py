@@ -0,0 +1,106 @@
+"""Подготовка процесса к обслуживанию запросов и замер времени старта.
+
+warm() заранее делает то, что иначе достаётся первым запросам каждого
+воркера: строит дерево URL, компилирует шаблоны (с кеширующим
+загрузчиком, то есть при DEBUG=False, они остаются в памяти) и загружает
+переводы. При запуске с предзагрузкой приложения в мастере (gunicorn
+--preload) это делается один раз до fork, и воркеры делят эти страницы
+памяти с мастером. Чтобы сборщик мусора не копировал их, трогая
+счётчики ссылок, прогретые объекты замораживаются gc.freeze().
+
+Соединения с базой после прогрева закрываются: открытый в мастере
+дескриптор SQLite нельзя делить между процессами.
+
+parse_importtime() разбирает вывод python -X importtime для команды
+profile_startup.
+"""
+import gc
+import os
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+from django.utils import translation
+
+_IMPORTTIME = re.compile(
+    r'^import time:\s+(?P<self>\d+) \|\s+(?P<total>\d+) \|(?P<name>.*)$'
+)
+
+
+def template_names():
+    """Имена всех .html-шаблонов из DIRS и каталогов приложений."""
+    directories = list(get_app_template_dirs('templates'))
+    for engine in settings.TEMPLATES:
+        directories.extend(engine.get('DIRS', ()))
+    names = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    path = os.path.join(root, filename)
+                    names.add(os.path.relpath(path, directory))
+    return sorted(names)
+
+
+def warm_templates():
+    """Компилирует шаблоны; отдаёт число скомпилированных."""
+    compiled = 0
+    for name in template_names():
+        for engine in engines.all():
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                # Шаблоны-заготовки сторонних приложений (например,
+                # для startapp) сами по себе не компилируются.
+                continue
+            compiled += 1
+            break
+    return compiled
+
+
+def warm():
+    """Прогревает процесс перед fork; отдаёт число шаблонов."""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.namespace_dict
+    # Каталог переводов грузится при первой активации языка и дальше
+    # общий для всех потоков.
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+    compiled = warm_templates()
+    connections.close_all()
+    if hasattr(gc, 'freeze'):
+        gc.collect()
+        gc.freeze()
+    return compiled
+
+
+def parse_importtime(lines):
+    """Строки -X importtime → список (модуль, своё, всего) в микросекундах.
+
+    Модуль вложенного импорта учитывается и в своём времени, и во «всего»
+    импортировавшего его модуля.
+    """
+    modules = []
+    for line in lines:
+        match = _IMPORTTIME.match(line)
+        if match is None:
+            continue
+        modules.append((
+            match['name'].strip(),
+            int(match['self']),
+            int(match['total']),
+        ))
+    return modules
+
+
+def by_package(modules):
+    """Своё время модулей, сложенное по пакетам верхнего уровня."""
+    packages = {}
+    for name, own, _ in modules:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + own
+    return sorted(packages.items(), key=lambda item: -item[1])
@@ -0,0 +1,11 @@
+from importlib import import_module
+
+from django.conf import settings
+
+from jobs.queue import task
+
+
+@task
+def clear_expired_sessions():
+    """Удаляет просроченные сессии, как команда clearsessions."""
+    import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
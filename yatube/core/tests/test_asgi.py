@@ -0,0 +1,81 @@
+import asyncio
+import io
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+
+from core.asgi import AsgiHandler, build_environ
+
+
+class AsgiHandlerTest(SimpleTestCase):
+    def scope(self, path, method='GET', query=b'', headers=()):
+        return {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': query,
+            'headers': [(b'host', b'testserver'), *headers],
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 5000),
+        }
+
+    def call(self, scope, chunks=(b'',)):
+        handler = AsgiHandler(get_wsgi_application(), max_workers=2)
+        messages = [
+            {
+                'type': 'http.request',
+                'body': chunk,
+                'more_body': number < len(chunks) - 1,
+            }
+            for number, chunk in enumerate(chunks)
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(handler(scope, receive, send))
+        return sent
+
+    def test_page_served(self):
+        """Страница Django отдаётся через ASGI."""
+        sent = self.call(self.scope('/about/author/'))
+        self.assertEqual(sent[0]['type'], 'http.response.start')
+        self.assertEqual(sent[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertIn('Привет, я автор'.encode(), body)
+        self.assertFalse(sent[-1].get('more_body', False))
+
+    def test_not_found(self):
+        """Несуществующий адрес отдаёт 404."""
+        sent = self.call(self.scope('/missing/'))
+        self.assertEqual(sent[0]['status'], 404)
+
+    def test_build_environ(self):
+        """Заголовки, строка запроса и тело попадают в environ."""
+        body = io.BytesIO(b'text=hello')
+        environ = build_environ(
+            self.scope(
+                '/путь/',
+                method='POST',
+                query=b'page=2',
+                headers=[
+                    (b'content-type', b'application/x-www-form-urlencoded'),
+                    (b'content-length', b'10'),
+                    (b'x-forwarded-for', b'1.1.1.1'),
+                    (b'x-forwarded-for', b'2.2.2.2'),
+                ],
+            ),
+            body,
+        )
+        self.assertEqual(environ['REQUEST_METHOD'], 'POST')
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/путь/'
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_LENGTH'], '10')
+        self.assertEqual(environ['HTTP_X_FORWARDED_FOR'], '1.1.1.1,2.2.2.2')
+        self.assertIs(environ['wsgi.input'], body)
@@ -0,0 +1,76 @@
+import threading
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.test import TransactionTestCase
+
+from core.batching import WriteBatcher
+from posts.models import Comment, Post, User
+
+
+class WriteBatcherTest(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.batcher = WriteBatcher('test', window=0.05, size=100)
+
+    def comment(self, number):
+        return Comment(post=self.post, author=self.author, text=f'К {number}')
+
+    def test_concurrent_writes_share_batches(self):
+        """Записи из разных потоков сохраняются меньшим числом пачек."""
+        saved = []
+        batches = []
+        flush = self.batcher._flush
+
+        def counting_flush(using, writes):
+            batches.append(len(writes))
+            flush(using, writes)
+
+        self.batcher._flush = counting_flush
+        comments = [self.comment(number) for number in range(10)]
+        threads = [
+            threading.Thread(
+                target=self.batcher.save, args=(comment, saved.append)
+            )
+            for comment in comments
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(batches), 10)
+        self.assertLess(len(batches), 10)
+        self.assertCountEqual(saved, comments)
+        self.assertTrue(all(comment.pk for comment in comments))
+        # Запись видна сразу после возврата save().
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 10)
+
+    def test_error_is_raised_in_caller(self):
+        """Ошибка одной записи поднимается у её автора, не у соседей."""
+        broken = Comment(post_id=self.post.pk, author_id=0, text='Нет автора')
+        with self.assertRaises(IntegrityError):
+            self.batcher.save(broken)
+        comment = self.comment(1)
+        self.batcher.save(comment)
+        self.assertTrue(Comment.objects.filter(pk=comment.pk).exists())
+
+    def test_inside_transaction_saves_directly(self):
+        """Внутри транзакции вызывающего запись идёт сразу в его потоке."""
+        comment = self.comment(1)
+        with transaction.atomic():
+            self.batcher.save(comment)
+            self.assertTrue(Comment.objects.filter(pk=comment.pk).exists())
+        self.assertIsNone(self.batcher._thread)
+
+    def test_routing_error_keeps_writer_alive(self):
+        """Ошибка вне транзакции пачки не роняет поток-писатель."""
+        with mock.patch(
+            'core.batching.router.db_for_write',
+            side_effect=RuntimeError('router'),
+        ):
+            with self.assertRaises(RuntimeError):
+                self.batcher.save(self.comment(1))
+        comment = self.comment(2)
+        self.batcher.save(comment)
+        self.assertTrue(Comment.objects.filter(pk=comment.pk).exists())
@@ -0,0 +1,36 @@
+import os
+import tempfile
+
+from django.test import TestCase
+
+from core.querybudget import Baseline, QueryBudget, normalize
+from posts.models import User
+
+
+class QueryBudgetTest(TestCase):
+    def test_normalize(self):
+        """Значения и длина списков IN не попадают в baseline."""
+        self.assertEqual(
+            normalize("SELECT 1 FROM t WHERE a = 'x' AND b IN (1, 2, 3)"),
+            'SELECT ? FROM t WHERE a = ? AND b IN (...)',
+        )
+
+    def test_limit(self):
+        """Превышение бюджета роняет блок со списком запросов."""
+        with self.assertRaisesRegex(AssertionError, 'Запросов 2, бюджет 1'):
+            with QueryBudget(1):
+                User.objects.count()
+                User.objects.exists()
+
+    def test_baseline_regression(self):
+        """Рост числа запросов против baseline сообщается с диффом."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            recorded = Baseline(path, update=True)
+            recorded.check('view', ['SELECT ?'])
+            recorded.save()
+            baseline = Baseline(path, update=False)
+            self.assertIsNone(baseline.check('view', []))
+            message = baseline.check('view', ['SELECT ?', 'SELECT ? FROM t'])
+        self.assertIn('запросов 2 вместо 1', message)
+        self.assertIn('+SELECT ? FROM t', message)
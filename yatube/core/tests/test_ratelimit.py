@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from core.ratelimit import KEY_PREFIX, hit
+from posts.models import Comment, Post, User
+
+
+class HitTest(TestCase):
+    def setUp(self):
+        cache.delete(KEY_PREFIX + 'bucket')
+
+    def test_burst_then_refill(self):
+        """Корзина пропускает count запросов подряд и затем наполняется."""
+        with mock.patch('core.ratelimit._now_ms', return_value=1000000):
+            self.assertEqual([hit('bucket', 3, 60) for _ in range(3)], [0] * 3)
+            self.assertAlmostEqual(hit('bucket', 3, 60), 20)
+            self.assertAlmostEqual(hit('bucket', 3, 60), 20)
+        with mock.patch('core.ratelimit._now_ms', return_value=1020000):
+            self.assertEqual(hit('bucket', 3, 60), 0)
+            self.assertGreater(hit('bucket', 3, 60), 0)
+
+    def test_continuous_client_stays_limited(self):
+        """Клиент без пауз не получает новую пачку через 2 * period."""
+        allowed = []
+        for step in range(40):
+            # Запрос каждые полсекунды в течение 20 с; время кеша тоже.
+            with mock.patch('time.time', return_value=5000 + step / 2):
+                allowed.append(hit('bucket', 3, 3) == 0)
+        # Корзина на 3 запроса и по одному в секунду: за 20 с не больше
+        # 3 + 20, и после опустошения — без двух разрешённых подряд.
+        self.assertLessEqual(sum(allowed), 23)
+        for step in range(12, 40):
+            self.assertFalse(allowed[step] and allowed[step - 1], step)
+
+
+@override_settings(RATELIMITS={'add_comment': (2, 3600)})
+class RatelimitViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_comments_throttled(self):
+        """Лишний комментарий отклоняется с 429 и Retry-After."""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        for _ in range(2):
+            self.client.post(url, {'text': 'Комментарий'})
+        response = self.client.post(url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(
+            metrics.snapshot('ratelimit.add_comment.throttled'),
+            {'ratelimit.add_comment.throttled': 1},
+        )
+
+    def test_reads_not_throttled(self):
+        """GET-запросы токены не тратят."""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        for _ in range(3):
+            self.assertNotEqual(self.client.get(url).status_code, 429)
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.models import Session
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.sessions import SessionStore
+
+
+class SessionStoreTest(TestCase):
+    def test_unchanged_session_not_saved(self):
+        """Сессия с прежними данными не записывается повторно."""
+        session = SessionStore()
+        session[SESSION_KEY] = '1'
+        session['theme'] = 'light'
+        session.save()
+        session = SessionStore(session.session_key)
+        session['theme'] = 'light'
+        self.assertTrue(session.modified)
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_anonymous_session_in_cookie(self):
+        """Сессия гостя хранится в подписанной cookie, а не в базе."""
+        session = SessionStore()
+        session['cart'] = [1, 2]
+        session.save()
+        self.assertIn(':', session.session_key)
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(SessionStore(session.session_key)['cart'], [1, 2])
+        self.assertFalse(SessionStore(session.session_key + 'x').keys())
+
+    def test_login_moves_session_to_db(self):
+        """После входа сессия переезжает из cookie в базу."""
+        session = SessionStore()
+        session['cart'] = [1]
+        session.save()
+        session = SessionStore(session.session_key)
+        session[SESSION_KEY] = '1'
+        session.save()
+        self.assertNotIn(':', session.session_key)
+        self.assertTrue(
+            Session.objects.filter(session_key=session.session_key).exists()
+        )
+        self.assertEqual(SessionStore(session.session_key)['cart'], [1])
+
+    @override_settings(SESSION_CLEAR_BATCH=2)
+    def test_clear_expired_in_batches(self):
+        """Просроченные сессии удаляются пачками, живые остаются."""
+        expired = timezone.now() - timedelta(days=1)
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number:03}',
+                session_data='',
+                expire_date=expired,
+            )
+        Session.objects.create(
+            session_key='alive00001',
+            session_data='',
+            expire_date=timezone.now() + timedelta(days=1),
+        )
+        with self.assertNumQueries(7):
+            SessionStore.clear_expired()
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['alive00001'],
+        )
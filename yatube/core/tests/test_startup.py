@@ -0,0 +1,38 @@
+import gc
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.startup import by_package, parse_importtime, template_names, warm
+
+IMPORTTIME = '''import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     posts.models
+import time:       300 |        420 |   posts.views
+import time:        80 |         80 | jobs.queue
+'''
+
+
+class StartupTest(SimpleTestCase):
+    def test_parse_importtime(self):
+        """Вывод -X importtime разбирается и складывается по пакетам."""
+        modules = parse_importtime(IMPORTTIME.splitlines())
+        self.assertEqual(modules, [
+            ('posts.models', 120, 120),
+            ('posts.views', 300, 420),
+            ('jobs.queue', 80, 80),
+        ])
+        self.assertEqual(by_package(modules), [('posts', 420), ('jobs', 80)])
+
+    def test_warm(self):
+        """Прогрев компилирует шаблоны проекта."""
+        self.addCleanup(gc.unfreeze)
+        self.assertIn('posts/index.html', template_names())
+        self.assertGreater(warm(), 0)
+
+    def test_profile_startup(self):
+        """Команда показывает самые дорогие модули и время django.setup()."""
+        out = StringIO()
+        call_command('profile_startup', limit=3, stdout=out)
+        self.assertIn('django.setup()', out.getvalue())
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
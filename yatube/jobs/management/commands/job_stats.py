@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db.models import (
+    Avg, Count, DurationField, ExpressionWrapper, F, Sum
+)
+
+from core import metrics
+from jobs.models import Job
+
+METRICS = (
+    'jobs.enqueued',
+    'jobs.done',
+    'jobs.retried',
+    'jobs.failed',
+    'jobs.duration.count',
+    'jobs.duration.ms',
+)
+
+
+class Command(BaseCommand):
+    help = 'Показывает состояние очереди и метрики фоновых задач.'
+
+    def handle(self, *args, **options):
+        # Состояние очереди — из таблицы Job: она общая для всех процессов.
+        statuses = (
+            Job.objects.values_list('status')
+            .annotate(total=Count('pk'))
+            .order_by()
+        )
+        for status, total in statuses:
+            self.stdout.write(f'{status}: {total}')
+        totals = Job.objects.aggregate(
+            total=Count('pk'), attempts=Sum('attempts')
+        )
+        retries = max((totals['attempts'] or 0) - totals['total'], 0)
+        self.stdout.write(f'Всего задач: {totals["total"]}')
+        self.stdout.write(f'Повторных попыток: {retries}')
+        average = Job.objects.filter(
+            status=Job.DONE, started__isnull=False, finished__isnull=False
+        ).aggregate(average=Avg(ExpressionWrapper(
+            F('finished') - F('started'), output_field=DurationField()
+        )))['average']
+        if average is not None:
+            milliseconds = average.total_seconds() * 1000
+            self.stdout.write(f'Среднее время задачи: {milliseconds:.1f} мс')
+        if not metrics.is_shared():
+            self.stderr.write(
+                'Кеш default не общий для процессов: счётчики ниже только '
+                'этого процесса. Для метрик нужен memcached или Redis.'
+            )
+        values = metrics.snapshot(*METRICS)
+        for name in METRICS:
+            self.stdout.write(f'{name}: {values[name]}')
@@ -0,0 +1,87 @@
+import multiprocessing
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from jobs.queue import run_next
+
+
+def work(stop, poll, once):
+    """Цикл воркера: берёт задачи, пока не попросят остановиться."""
+    try:
+        while not stop.is_set():
+            if run_next() is None:
+                if once:
+                    break
+                stop.wait(poll)
+    finally:
+        connection.close()
+
+
+def work_in_process(stop, poll, once):
+    import django
+    django.setup()
+    work(stop, poll, once)
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул воркеров фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.JOBS_WORKERS,
+            help='Число воркеров.',
+        )
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help='Запускать воркеры процессами, а не потоками.',
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['processes']:
+            connections.close_all()
+            stop = multiprocessing.Event()
+            workers = [
+                multiprocessing.Process(
+                    target=work_in_process,
+                    args=(stop, options['poll'], options['once']),
+                )
+                for _ in range(options['workers'])
+            ]
+        else:
+            stop = threading.Event()
+            workers = [
+                threading.Thread(
+                    target=work,
+                    args=(stop, options['poll'], options['once']),
+                )
+                for _ in range(options['workers'])
+            ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Запущено воркеров: {len(workers)}')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Останавливаю воркеры...')
+            stop.set()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS('Воркеры остановлены'))
@@ -0,0 +1,147 @@
+"""Очередь фоновых задач на таблице Job.
+
+Задача — обычная функция с ключевыми аргументами, зарегистрированная
+декоратором @task. Представления и сигналы только ставят задачи в
+очередь (одна вставка в той же транзакции, что и основная запись), а
+выполняют их воркеры из команды run_workers.
+"""
+import json
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core import metrics
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func):
+    """Регистрирует функцию как фоновую задачу."""
+    func.task_name = f'{func.__module__}.{func.__qualname__}'
+    registry[func.task_name] = func
+    return func
+
+
+def enqueue(func, key=None, delay=0, **kwargs):
+    """Ставит задачу в очередь и возвращает Job.
+
+    Если передан key и задача с таким ключом уже есть, новая не
+    создаётся — возвращается существующая.
+    """
+    job = Job(
+        name=getattr(func, 'task_name', func),
+        payload=json.dumps(kwargs),
+        idempotency_key=key,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=settings.JOBS_MAX_ATTEMPTS,
+    )
+    if key is None:
+        job.save()
+    else:
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            return Job.objects.get(idempotency_key=key)
+    metrics.incr('jobs.enqueued')
+    if settings.JOBS_RUN_EAGERLY:
+        transaction.on_commit(run_pending)
+    return job
+
+
+def retry_delay(attempt):
+    """Экспоненциальная задержка перед попыткой номер attempt + 1."""
+    delay = settings.JOBS_RETRY_DELAY * 2 ** (attempt - 1)
+    return min(delay, settings.JOBS_RETRY_MAX_DELAY)
+
+
+def claim():
+    """Забирает одну готовую задачу; возвращает Job или None.
+
+    Захват — условный UPDATE по статусу, поэтому одну задачу не возьмут
+    два воркера. Задачи, зависшие в RUNNING дольше JOBS_LOCK_TIMEOUT
+    (например, воркер упал), считаются снова доступными.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    available = (
+        Q(status=Job.PENDING, run_at__lte=now)
+        | Q(status=Job.RUNNING, started__lt=stale)
+    )
+    candidates = Job.objects.filter(available).order_by('run_at', 'pk')
+    for job in candidates[:settings.JOBS_CLAIM_BATCH]:
+        claimed = Job.objects.filter(available, pk=job.pk).update(
+            status=Job.RUNNING,
+            started=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            job.status = Job.RUNNING
+            job.started = now
+            job.attempts += 1
+            return job
+    return None
+
+
+def _fail(job, error):
+    now = timezone.now()
+    job.last_error = f'{type(error).__name__}: {error}'
+    if job.attempts >= job.max_attempts:
+        job.status = Job.FAILED
+        job.finished = now
+        metrics.incr('jobs.failed')
+        logger.error('Задача %s окончательно упала: %s', job, error)
+    else:
+        job.status = Job.PENDING
+        job.run_at = now + timedelta(seconds=retry_delay(job.attempts))
+        metrics.incr('jobs.retried')
+        logger.warning('Задача %s будет повторена: %s', job, error)
+    job.save(update_fields=['status', 'finished', 'run_at', 'last_error'])
+
+
+def execute(job):
+    """Выполняет захваченную задачу и записывает результат."""
+    started = time.monotonic()
+    try:
+        func = registry.get(job.name)
+        if func is None:
+            raise LookupError(f'Неизвестная задача {job.name}')
+        with transaction.atomic():
+            func(**json.loads(job.payload))
+    except Exception as error:
+        _fail(job, error)
+    else:
+        job.status = Job.DONE
+        job.finished = timezone.now()
+        job.last_error = ''
+        job.save(update_fields=['status', 'finished', 'last_error'])
+        metrics.incr('jobs.done')
+    finally:
+        metrics.observe('jobs.duration', time.monotonic() - started)
+
+
+def run_next():
+    """Выполняет одну готовую задачу; возвращает её или None."""
+    job = claim()
+    if job is not None:
+        execute(job)
+    return job
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи в текущем потоке; возвращает их число."""
+    done = 0
+    while limit is None or done < limit:
+        if run_next() is None:
+            break
+        done += 1
+    return done
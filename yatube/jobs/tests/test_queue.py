@@ -0,0 +1,105 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import metrics
+from jobs.models import Job
+from jobs.queue import claim, enqueue, retry_delay, run_pending, task
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task
+def explode():
+    raise RuntimeError('Сломалось')
+
+
+class QueueTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        """Поставленная задача выполняется воркером один раз."""
+        job = enqueue(remember, value=42)
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [42])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(run_pending(), 0)
+
+    def test_idempotency_key(self):
+        """Повторная постановка с тем же ключом не создаёт задачу."""
+        first = enqueue(remember, key='once', value=1)
+        second = enqueue(remember, key='once', value=2)
+        self.assertEqual(first.pk, second.pk)
+        run_pending()
+        self.assertEqual(calls, [1])
+
+    def test_delayed_job_waits(self):
+        """Отложенная задача не выполняется раньше срока."""
+        enqueue(remember, delay=60, value=1)
+        self.assertIsNone(claim())
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_retry_with_backoff(self):
+        """Упавшая задача повторяется с задержкой, затем помечается
+        ошибкой.
+        """
+        job = enqueue(explode)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertIn('Сломалось', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        later = timezone.now() + timedelta(seconds=retry_delay(1) + 1)
+        with mock.patch('jobs.queue.timezone.now', return_value=later):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(
+            metrics.snapshot('jobs.retried', 'jobs.failed'),
+            {'jobs.retried': 1, 'jobs.failed': 1}
+        )
+
+    def test_retry_delay_is_capped(self):
+        """Задержка растёт экспоненциально, но не бесконечно."""
+        self.assertEqual(retry_delay(2), 2 * retry_delay(1))
+        self.assertLessEqual(retry_delay(100), 60 * 60)
+
+
+class RunWorkersTest(TransactionTestCase):
+    def test_run_workers_once(self):
+        """Команда run_workers --once выполняет очередь и завершается."""
+        calls.clear()
+        enqueue(remember, value='first')
+        enqueue(remember, value='second')
+        call_command('run_workers', workers=2, once=True, stdout=StringIO())
+        self.assertCountEqual(calls, ['first', 'second'])
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
+
+    def test_job_stats_from_table(self):
+        """job_stats берёт состояние очереди из таблицы, а не из кеша."""
+        enqueue(remember, value='first')
+        call_command('run_workers', workers=1, once=True, stdout=StringIO())
+        # Счётчики остались в кеше процесса воркеров, команде их не видно.
+        cache.clear()
+        out, err = StringIO(), StringIO()
+        call_command('job_stats', stdout=out, stderr=err)
+        self.assertIn('done: 1', out.getvalue())
+        self.assertIn('Всего задач: 1', out.getvalue())
+        self.assertIn('Среднее время задачи', out.getvalue())
+        self.assertIn('не общий', err.getvalue())
@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import Notification
+
+
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'recipient', 'kind', 'actor', 'created', 'sent')
+    list_filter = ('kind',)
+    list_select_related = ('recipient', 'actor')
+    raw_id_fields = ('recipient', 'actor')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Notification, NotificationAdmin)
@@ -0,0 +1,127 @@
+"""Уведомления о комментариях и подписчиках, отправляемые дайджестом.
+
+События копятся в Notification. Получатель попадает в рассылку, когда
+самое старое неотправленное событие ждёт дольше NOTIFICATIONS_WINDOW,
+и получает не больше одного письма за NOTIFICATIONS_MIN_INTERVAL.
+Все письма одного прогона уходят через одно соединение с почтовым
+бэкендом, пачками по NOTIFICATIONS_BATCH_SIZE получателей.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Min
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from posts.sharding import posts_in_bulk
+
+from .models import Notification
+
+
+def notify_comment(comment):
+    """Записывает событие «новый комментарий» для автора поста."""
+    post = comment.post
+    if comment.author_id != post.author_id:
+        Notification.objects.create(
+            recipient_id=post.author_id,
+            actor_id=comment.author_id,
+            kind=Notification.COMMENT,
+            post_id=post.pk,
+        )
+
+
+def notify_follow(follow):
+    """Записывает событие «новый подписчик» для автора."""
+    Notification.objects.create(
+        recipient_id=follow.author_id,
+        actor_id=follow.user_id,
+        kind=Notification.FOLLOW,
+    )
+
+
+def _due_recipients(now):
+    window_start = now - timedelta(seconds=settings.NOTIFICATIONS_WINDOW)
+    pending = (
+        Notification.objects.filter(sent__isnull=True)
+        .values_list('recipient')
+        .annotate(first=Min('created'))
+        .filter(first__lte=window_start)
+        .order_by('recipient')
+    )
+    return [recipient_id for recipient_id, _ in pending]
+
+
+def _digest(recipient, events):
+    limit = settings.NOTIFICATIONS_MAX_EVENTS
+    comments = [e for e in events if e.kind == Notification.COMMENT]
+    followers = [e for e in events if e.kind == Notification.FOLLOW]
+    context = {
+        'recipient': recipient,
+        'comments': comments[:limit],
+        'comments_total': len(comments),
+        'followers': followers[:limit],
+        'followers_total': len(followers),
+    }
+    return EmailMessage(
+        subject=f'Yatube: новых событий — {len(events)}',
+        body=render_to_string('notifications/digest.txt', context),
+        to=[recipient.email],
+    )
+
+
+def _send_batch(connection, recipient_ids, now):
+    silence_start = now - timedelta(
+        seconds=settings.NOTIFICATIONS_MIN_INTERVAL
+    )
+    recently_notified = set(
+        Notification.objects.filter(
+            recipient__in=recipient_ids, sent__gt=silence_start
+        ).values_list('recipient', flat=True)
+    )
+    events = defaultdict(list)
+    pending = Notification.objects.filter(
+        recipient__in=recipient_ids, sent__isnull=True
+    ).select_related('recipient', 'actor')
+    for event in pending:
+        if event.recipient_id not in recently_notified:
+            events[event.recipient_id].append(event)
+    if not events:
+        return 0
+    # Посты могут лежать на разных шардах, поэтому не select_related.
+    posts = posts_in_bulk(
+        item.post_id
+        for items in events.values()
+        for item in items
+        if item.post_id is not None
+    )
+    for items in events.values():
+        for item in items:
+            item.post = posts.get(item.post_id)
+    messages = [
+        _digest(items[0].recipient, items)
+        for items in events.values()
+        if items[0].recipient.email
+    ]
+    connection.send_messages(messages)
+    Notification.objects.filter(
+        recipient__in=list(events),
+        sent__isnull=True,
+        pk__lte=max(item.pk for items in events.values() for item in items),
+    ).update(sent=now)
+    return len(messages)
+
+
+def send_digests(now=None):
+    """Отправляет накопившиеся дайджесты; возвращает число писем."""
+    now = now or timezone.now()
+    recipients = _due_recipients(now)
+    size = settings.NOTIFICATIONS_BATCH_SIZE
+    sent = 0
+    with get_connection() as connection:
+        for start in range(0, len(recipients), size):
+            sent += _send_batch(
+                connection, recipients[start:start + size], now
+            )
+    return sent
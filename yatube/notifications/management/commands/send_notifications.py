@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notifications.digests import send_digests
+
+
+class Command(BaseCommand):
+    help = 'Отправляет накопившиеся дайджесты уведомлений.'
+
+    def handle(self, *args, **options):
+        sent = send_digests()
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}'))
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Внешний ключ Notification.post → простое поле post_id.
+
+    Столбец post_id остаётся тем же, данные не переносятся.
+    """
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='post',
+            field=models.IntegerField(
+                blank=True,
+                db_column='post_id',
+                db_index=True,
+                null=True,
+                verbose_name='Пост',
+            ),
+        ),
+        migrations.RenameField(
+            model_name='notification',
+            old_name='post',
+            new_name='post_id',
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='post_id',
+            field=models.IntegerField(
+                blank=True, db_index=True, null=True, verbose_name='Пост'
+            ),
+        ),
+    ]
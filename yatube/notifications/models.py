@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class Notification(models.Model):
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    KIND_CHOICES = (
+        (COMMENT, 'Новый комментарий'),
+        (FOLLOW, 'Новый подписчик'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Кто',
+    )
+    kind = models.CharField('Событие', max_length=10, choices=KIND_CHOICES)
+    # Пост комментария; у событий о подписке пусто.
+    post_id = models.IntegerField(
+        'Пост', blank=True, null=True, db_index=True
+    )
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent = models.DateTimeField('Отправлено', blank=True, null=True)
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        indexes = [
+            models.Index(
+                fields=['sent', 'created'],
+                name='notification_sent_idx'
+            ),
+            models.Index(
+                fields=['recipient', 'sent'],
+                name='notification_recipient_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} для {self.recipient}'
@@ -0,0 +1,8 @@
+from jobs.queue import task
+
+from .digests import send_digests
+
+
+@task
+def send_pending_digests():
+    send_digests()
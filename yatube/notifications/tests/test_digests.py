@@ -0,0 +1,106 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from notifications.digests import send_digests
+from notifications.models import Notification
+from posts.models import Post, User
+
+
+class DigestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', email='author@yatube.ru'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@yatube.ru'
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def later(self, seconds):
+        return timezone.now() + timedelta(seconds=seconds)
+
+    def comment(self, text):
+        self.reader_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': text},
+        )
+
+    def test_views_record_events(self):
+        """Комментарий и подписка записывают события для автора."""
+        self.comment('Комментарий')
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        kinds = list(
+            Notification.objects.filter(recipient=self.author)
+            .values_list('kind', flat=True)
+        )
+        self.assertEqual(kinds, [Notification.COMMENT, Notification.FOLLOW])
+
+    def test_own_comment_not_recorded(self):
+        """Комментарий к своему посту не создаёт уведомления."""
+        client = Client()
+        client.force_login(self.author)
+        client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': 'Сам себе'},
+        )
+        self.assertFalse(Notification.objects.exists())
+
+    def test_events_coalesced_into_one_digest(self):
+        """События за окно собираются в одно письмо."""
+        for number in range(5):
+            self.comment(f'Комментарий {number}')
+        self.assertEqual(send_digests(), 0)
+        self.assertEqual(send_digests(self.later(16 * 60)), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['author@yatube.ru'])
+        self.assertIn('Новые комментарии к вашим постам (5)',
+                      mail.outbox[0].body)
+        self.assertFalse(
+            Notification.objects.filter(sent__isnull=True).exists()
+        )
+
+    def test_rate_limit(self):
+        """Следующий дайджест не уходит раньше минимального интервала."""
+        self.comment('Первый')
+        send_digests(self.later(16 * 60))
+        self.comment('Второй')
+        Notification.objects.filter(sent__isnull=True).update(
+            created=self.later(0)
+        )
+        self.assertEqual(send_digests(self.later(32 * 60)), 0)
+        self.assertEqual(send_digests(self.later(2 * 60 * 60)), 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_single_connection(self):
+        """Все письма прогона уходят через одно соединение."""
+        other = User.objects.create_user(
+            username='other', email='other@yatube.ru'
+        )
+        Post.objects.create(author=other, text='Другой пост')
+        self.comment('Автору')
+        Notification.objects.create(
+            recipient=other, actor=self.reader, kind=Notification.FOLLOW
+        )
+        with mock.patch(
+            'notifications.digests.get_connection',
+            wraps=mail.get_connection
+        ) as get_connection:
+            self.assertEqual(send_digests(self.later(16 * 60)), 2)
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 2)
@@ -1,9 +1,78 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
 
-from .models import Group, Post
+from core.paginator import EstimatedCountPaginator
 
+from . import bulk, tasks
+from .models import Comment, Group, ModerationQueue, Post
+from .search import search
+from .sharding import each_shard, get_shards, is_sharded
 
-class PostAdmin(admin.ModelAdmin):
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Новая группа',
+        empty_label='Без группы',
+    )
+
+
+class ShardFilter(admin.SimpleListFilter):
+    """Шард, строки которого показывает список; без выбора — default."""
+
+    title = 'шард'
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        if not is_sharded():
+            return ()
+        return [(alias, alias) for alias in get_shards()]
+
+    def queryset(self, request, queryset):
+        if self.value() in get_shards():
+            return queryset.using(self.value())
+        return queryset
+
+
+class ShardedAdminMixin:
+    """Страница объекта находит его на любом шарде."""
+
+    def get_object(self, request, object_id, from_field=None):
+        queryset = self.get_queryset(request)
+        opts = queryset.model._meta
+        field = (
+            opts.pk if from_field is None else opts.get_field(from_field)
+        )
+        try:
+            object_id = field.to_python(object_id)
+        except (ValidationError, ValueError):
+            return None
+        for alias in get_shards():
+            obj = queryset.using(alias).filter(
+                **{field.name: object_id}
+            ).first()
+            if obj is not None:
+                return obj
+        return None
+
+
+def _ids(queryset):
+    """id строк queryset со всех шардов."""
+    return [
+        pk
+        for shard in each_shard(queryset)
+        for pk in shard.values_list('pk', flat=True)
+    ]
+
+
+class PostAdmin(ShardedAdminMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -12,10 +81,218 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = (ShardFilter, 'pub_date')
+    date_hierarchy = 'pub_date'
+    empty_value_display = '-пусто-'
+    # Таблица постов большая: не считаем её целиком ни для страниц, ни
+    # для подписи «N всего».
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = (
+        'move_to_group',
+        'delete_in_background',
+        'delete_author_posts',
+        'purge_authors',
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по индексу FTS вместо LIKE '%...%' по всей таблице. Фильтр
+        # шарда применяется раньше, и поиск идёт по индексу его базы.
+        found = search(queryset, search_term)
+        if found is None:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return found, False
+
+    def get_urls(self):
+        return [
+            path(
+                'bulk/<str:operation>/',
+                self.admin_site.admin_view(self.bulk_progress),
+                name='posts_post_bulk_progress',
+            ),
+        ] + super().get_urls()
+
+    def bulk_progress(self, request, operation):
+        return JsonResponse(bulk.progress(operation))
+
+    def confirm(self, request, queryset, action, description, form=None):
+        """Страница подтверждения массовой операции.
+
+        Возвращает None, если подтверждение уже получено.
+        """
+        if request.POST.get('confirm') and (form is None or form.is_valid()):
+            return None
+        select_across = request.POST.get('select_across') == '1'
+        context = {
+            **self.admin_site.each_context(request),
+            'title': self.get_actions(request)[action][2],
+            'description': description,
+            'opts': self.model._meta,
+            'media': self.media,
+            'action': action,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            'select_across': select_across,
+            'selected': (
+                [] if select_across
+                else request.POST.getlist(helpers.ACTION_CHECKBOX_NAME)
+            ),
+            'form': form,
+        }
+        return TemplateResponse(
+            request, 'admin/posts/post/bulk_confirm.html', context
+        )
+
+    @staticmethod
+    def authors(queryset):
+        return set(queryset.order_by().values_list('author_id', flat=True))
+
+    def started(self, request, operation):
+        url = reverse('admin:posts_post_bulk_progress', args=[operation])
+        self.message_user(
+            request, f'Операция запущена в фоне, ход выполнения: {url}'
+        )
+
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(request.POST if 'confirm' in request.POST
+                               else None)
+        response = self.confirm(
+            request, queryset, 'move_to_group',
+            f'Перенести в другую группу постов: {queryset.count()}.', form,
+        )
+        if response is not None:
+            return response
+        group = form.cleaned_data['group']
+        operation = bulk.start(
+            tasks.bulk_move_posts,
+            queryset.values_list('pk', flat=True),
+            group_id=group.pk if group else None,
+        )
+        self.started(request, operation)
+    move_to_group.short_description = 'Перенести в группу (в фоне)'
+
+    def delete_in_background(self, request, queryset):
+        response = self.confirm(
+            request, queryset, 'delete_in_background',
+            f'Удалить постов вместе с комментариями: {queryset.count()}.',
+        )
+        if response is not None:
+            return response
+        operation = bulk.start(
+            tasks.bulk_delete_posts, queryset.values_list('pk', flat=True)
+        )
+        self.started(request, operation)
+    delete_in_background.short_description = 'Удалить посты (в фоне)'
+
+    def delete_author_posts(self, request, queryset):
+        authors = self.authors(queryset)
+        response = self.confirm(
+            request, queryset, 'delete_author_posts',
+            'Удалить все посты авторов выбранных постов. '
+            f'Авторов: {len(authors)}.',
+        )
+        if response is not None:
+            return response
+        operation = bulk.start(
+            tasks.bulk_delete_posts,
+            _ids(Post.objects.filter(author__in=authors)),
+        )
+        self.started(request, operation)
+    delete_author_posts.short_description = (
+        'Удалить все посты авторов (в фоне)'
+    )
+
+    def purge_authors(self, request, queryset):
+        authors = self.authors(queryset)
+        response = self.confirm(
+            request, queryset, 'purge_authors',
+            'Удалить все посты, комментарии и подписки авторов выбранных '
+            f'постов и отключить их вход. Авторов: {len(authors)}.',
+        )
+        if response is not None:
+            return response
+        operation = bulk.start(
+            tasks.bulk_delete_posts,
+            _ids(Post.objects.filter(author__in=authors)),
+        )
+        bulk.start(
+            tasks.bulk_delete_comments,
+            _ids(Comment.objects.filter(author__in=authors)),
+            operation=operation,
+        )
+        bulk.start(tasks.bulk_purge_follows, authors, operation=operation)
+        self.started(request, operation)
+    purge_authors.short_description = 'Удалить спамеров целиком (в фоне)'
+
+
+class CommentAdmin(ShardedAdminMixin, admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'text',
+        'post_link',
+        'author_link',
+        'created',
+        'status',
+    )
+    list_filter = (ShardFilter, 'status')
+    list_select_related = ('post', 'author')
+    autocomplete_fields = ('post', 'author')
+    search_fields = ('=author__username',)
+    date_hierarchy = 'created'
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('approve', 'reject')
+
+    # Фильтр по посту и автору — ссылки ?post=<id> и ?author=<id>: они
+    # идут по индексам (post, status, created) и (author, created), а
+    # выпадающий список всех постов или авторов не строится.
+    def post_link(self, obj):
+        return format_html('<a href="?post={}">{}</a>', obj.post_id, obj.post)
+    post_link.short_description = 'Пост'
+
+    def author_link(self, obj):
+        return format_html(
+            '<a href="?author={}">{}</a>', obj.author_id, obj.author
+        )
+    author_link.short_description = 'Автор'
+
+    def moderate(self, request, queryset, status):
+        updated = queryset.update(status=status)
+        self.message_user(request, f'Обновлено комментариев: {updated}')
+
+    def approve(self, request, queryset):
+        self.moderate(request, queryset, Comment.APPROVED)
+    approve.short_description = 'Одобрить'
+
+    def reject(self, request, queryset):
+        self.moderate(request, queryset, Comment.REJECTED)
+    reject.short_description = 'Отклонить'
+
+
+class ModerationQueueAdmin(CommentAdmin):
+    """Непроверенные комментарии от старых к новым."""
+
+    list_filter = (ShardFilter,)
+    ordering = ('created',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(status=Comment.NEW)
+
+    def has_add_permission(self, request):
+        return False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('title', 'slug', 'post_count')
+    search_fields = ('title', 'slug')
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(ModerationQueue, ModerationQueueAdmin)
@@ -0,0 +1,137 @@
+"""Архив старых постов.
+
+Посты старше ARCHIVE_AFTER_DAYS вместе с комментариями переносятся в
+таблицы ArchivedPost и ArchivedComment с теми же id. Ленты, счётчики и
+индексы горячей таблицы posts_post перестают расти вместе с возрастом
+сайта, а post_detail и profile дочитывают архив, если поста нет среди
+живых.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .bulk import delete_rows, forget_posts
+from .cache import recount_groups
+from .delta import post_feeds, touch_feeds
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+from .sharding import get_post, get_shards
+
+
+class ChainedPosts:
+    """Живые посты, а за ними архивные — одной последовательностью.
+
+    Все архивные посты старше всех живых, поэтому порядок по убыванию
+    даты сохраняется. Годится как object_list для Paginator: каждая
+    страница — не больше двух запросов со срезом. Живые посты считаются,
+    только когда срез уходит в архив и по нему самому это не понять.
+    """
+
+    def __init__(self, live, archived):
+        self.live = live
+        self.archived = archived
+
+    @cached_property
+    def live_count(self):
+        return self.live.count()
+
+    def count(self):
+        return self.live_count + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        posts = list(self.live[start:stop])
+        if len(posts) < stop - start:
+            # Живые посты кончились: если срез их застал, их число видно.
+            live_count = start + len(posts) if posts else self.live_count
+            posts.extend(self.archived[
+                max(start - live_count, 0):stop - live_count
+            ])
+        return posts
+
+
+def find_post(post_id):
+    """Живой пост, а если его нет — архивный, или None."""
+    post = get_post(post_id, 'author', 'group')
+    if post is None:
+        post = ArchivedPost.objects.select_related('author', 'group').filter(
+            pk=post_id
+        ).first()
+    return post
+
+
+def author_posts(author):
+    return ChainedPosts(author.posts.all(), author.archived_posts.all())
+
+
+def archive_posts(ids, using='default'):
+    """Переносит посты пачки с шарда using и их комментарии в архив.
+
+    Архив лежит в default при любом числе шардов.
+    """
+    posts = list(Post.objects.using(using).filter(pk__in=ids))
+    ids = [post.pk for post in posts]
+    ArchivedPost.objects.bulk_create(
+        ArchivedPost(
+            id=post.pk,
+            text=post.text,
+            text_html=post.text_html,
+            html_key=post.html_key,
+            pub_date=post.pub_date,
+            author_id=post.author_id,
+            group_id=post.group_id,
+            image=post.image.name,
+        )
+        for post in posts
+    )
+    ArchivedComment.objects.bulk_create(
+        ArchivedComment(
+            id=comment.pk,
+            post_id=comment.post_id,
+            author_id=comment.author_id,
+            text=comment.text,
+            text_html=comment.text_html,
+            html_key=comment.html_key,
+            created=comment.created,
+            status=comment.status,
+        )
+        for comment in Comment.objects.using(using).filter(post__in=ids)
+    )
+    delete_rows(Post, ids, using)
+    forget_posts(ids)
+    recount_groups(post.group_id for post in posts)
+    feeds = set()
+    for post in posts:
+        feeds.update(post_feeds(post.author_id, post.group_id))
+    touch_feeds(*feeds, using=using)
+    return len(ids)
+
+
+def archive_old_posts(days=None, chunk_size=None):
+    """Архивирует посты старше days дней пачками; отдаёт их число.
+
+    Каждая пачка — своя транзакция, чтобы не держать блокировку SQLite;
+    шарды обходятся по очереди.
+    """
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    cutoff = timezone.now() - timedelta(days=days)
+    archived = 0
+    for alias in get_shards():
+        old = Post.objects.using(alias).filter(pub_date__lt=cutoff)
+        while True:
+            ids = list(
+                old.order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic(), transaction.atomic(using=alias):
+                archived += archive_posts(ids, alias)
+    return archived
@@ -0,0 +1,168 @@
+"""Массовые операции над постами для админки.
+
+Операция режется на пачки по BULK_CHUNK_SIZE записей, и каждая пачка —
+отдельная фоновая задача со своей транзакцией: SQLite не держит
+блокировку на запись всё время операции. Внутри пачки только
+множественные UPDATE и DELETE без save()/delete() по объектам и без
+сигналов, поэтому всё, что обычно делают сигналы, — счётчики групп,
+поколения кеша, маркеры лент — пачка делает сама в конце.
+
+Задачи операции получают ключи bulk:<операция>:<задача>:<номер пачки>,
+по ним считается прогресс.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models import Count, Q
+
+from jobs.models import Job
+from jobs.queue import enqueue
+from notifications.models import Notification
+from users.cache import forget_user
+
+from . import sharding, stats
+from .cache import recount_groups
+from .delta import post_feeds, touch_feeds
+from .graph import graph
+from .models import Comment, Follow, FollowSuggestion, Post, PostTrend, User
+
+KEY = 'bulk:{}:'
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    size = settings.BULK_CHUNK_SIZE
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def start(task, ids, operation=None, **kwargs):
+    """Ставит задачу task на каждую пачку ids; возвращает id операции.
+
+    Несколько вызовов с одним operation складываются в одну операцию.
+    """
+    operation = operation or uuid.uuid4().hex
+    prefix = KEY.format(operation) + task.__name__
+    for number, chunk in enumerate(_chunks(ids)):
+        enqueue(task, key=f'{prefix}:{number}', ids=chunk, **kwargs)
+    return operation
+
+
+def progress(operation):
+    """{'total': пачек всего, статус: пачек в этом статусе}."""
+    counts = dict(
+        Job.objects.filter(
+            idempotency_key__startswith=KEY.format(operation)
+        ).values_list('status').annotate(Count('pk')).order_by()
+    )
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def delete_rows(model, ids, using='default'):
+    """DELETE строк model по id с каскадом по связям, без сигналов."""
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            continue
+        related = relation.related_model._base_manager.using(using).filter(
+            **{f'{relation.field.name}__in': ids}
+        )
+        if relation.on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        elif relation.on_delete is models.CASCADE:
+            delete_rows(
+                relation.related_model,
+                list(related.values_list('pk', flat=True)),
+                using,
+            )
+        # Для PROTECT транзакцию остановит ограничение внешнего ключа.
+    if ids:
+        queryset = model._base_manager.using(using).filter(pk__in=ids)
+        queryset._raw_delete(queryset.db)
+
+
+def forget_posts(ids):
+    """Удаляет рейтинги и уведомления постов ids вместо каскада."""
+    PostTrend.objects.filter(post_id__in=ids).delete()
+    Notification.objects.filter(post_id__in=ids).delete()
+
+
+def delete_posts(ids):
+    """Удаляет посты пачки с комментариями, рейтингом и картинками."""
+    rows = []
+    for alias in sharding.get_shards():
+        found = list(Post.objects.using(alias).filter(
+            pk__in=ids
+        ).values_list('pk', 'author_id', 'group_id', 'image'))
+        if found:
+            with transaction.atomic(using=alias):
+                delete_rows(Post, [row[0] for row in found], alias)
+            rows.extend(found)
+    ids = [row[0] for row in rows]
+    forget_posts(ids)
+    recount_groups(row[2] for row in rows)
+    stats.rebuild({row[1] for row in rows})
+    feeds = set()
+    for _, author_id, group_id, _ in rows:
+        feeds.update(post_feeds(author_id, group_id))
+    touch_feeds(*feeds)
+    images = [row[3] for row in rows if row[3]]
+
+    def delete_images():
+        for name in images:
+            default_storage.delete(name)
+
+    transaction.on_commit(delete_images)
+    return len(ids)
+
+
+def move_posts(ids, group_id):
+    """Переносит посты пачки в группу group_id (None — без группы)."""
+    old_groups = set()
+    authors = set()
+    moved = 0
+    for posts in sharding.each_shard(Post.objects.filter(pk__in=ids)):
+        rows = set(posts.order_by().values_list('group_id', 'author_id'))
+        old_groups.update(row[0] for row in rows)
+        authors.update(row[1] for row in rows)
+        if rows:
+            moved += posts.update(group_id=group_id)
+    stats.rebuild(authors)
+    PostTrend.objects.filter(post_id__in=ids).update(group_id=group_id)
+    groups = old_groups | {group_id}
+    recount_groups(groups)
+    touch_feeds(*(f'group:{pk}' for pk in groups if pk is not None))
+    return moved
+
+
+def delete_comments(ids):
+    rows = []
+    for alias in sharding.get_shards():
+        found = list(Comment.objects.using(alias).filter(
+            pk__in=ids
+        ).values_list('pk', 'post__author_id'))
+        if found:
+            with transaction.atomic(using=alias):
+                delete_rows(Comment, [row[0] for row in found], alias)
+            rows.extend(found)
+    stats.rebuild({row[1] for row in rows})
+    return len(rows)
+
+
+def purge_follows(user_id):
+    """Удаляет подписки пользователя и на него, отключает его вход.
+
+    Возвращает id читателей, чьи рекомендации нужно пересчитать.
+    """
+    follows = Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id))
+    readers = set(follows.values_list('user_id', flat=True))
+    delete_rows(Follow, list(follows.values_list('pk', flat=True)))
+    transaction.on_commit(graph.changed)
+    FollowSuggestion.objects.filter(
+        Q(user_id=user_id) | Q(author_id=user_id)
+    ).delete()
+    User.objects.filter(pk=user_id).update(is_active=False)
+    forget_user(user_id)
+    return readers - {user_id}
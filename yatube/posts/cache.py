@@ -0,0 +1,138 @@
+"""Кеширование групп и их лент.
+
+У каждой группы есть счётчик поколения в общем кеше. Любое изменение
+группы или её постов увеличивает счётчик, и всё, что закешировано с
+прежним поколением (объект группы в LRU процесса, отрендеренные страницы
+ленты), перестаёт использоваться — во всех процессах сразу.
+"""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.shortcuts import get_object_or_404
+
+from core.cache import LRUCache
+
+from . import sharding
+from .models import Group, Post
+
+GENERATION_KEY = 'group_generation:{}'
+
+_groups = LRUCache(settings.GROUP_CACHE_SIZE, settings.GROUP_CACHE_TIMEOUT)
+
+
+def _initial_generation():
+    # Значение от времени, а не ноль: после вытеснения ключа из кеша
+    # поколение не должно совпасть с тем, что уже было выдано раньше.
+    return int(time.time() * 1000000)
+
+
+def group_generation(group_id):
+    """Текущее поколение группы."""
+    key = GENERATION_KEY.format(group_id)
+    generation = cache.get(key)
+    if generation is None:
+        generation = _initial_generation()
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def bump_group_generation(group_id):
+    """Сбрасывает всё, что закешировано для группы."""
+    key = GENERATION_KEY.format(group_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_generation(), None)
+
+
+def get_group(slug):
+    """Возвращает пару (группа, поколение) или вызывает Http404.
+
+    Группа берётся из LRU процесса, если её поколение не изменилось.
+    """
+    cached = _groups.get(slug)
+    if cached is not None:
+        group, generation = cached
+        if generation == group_generation(group.pk):
+            return group, generation
+    group = get_object_or_404(Group, slug=slug)
+    generation = group_generation(group.pk)
+    _groups.set(slug, (group, generation))
+    return group, generation
+
+
+def post_moved(old_group_id, new_group_id):
+    """Переносит пост между счётчиками групп и сбрасывает их ленты."""
+    if old_group_id == new_group_id:
+        if new_group_id is not None:
+            bump_group_generation(new_group_id)
+        return
+    if old_group_id is not None:
+        Group.objects.filter(pk=old_group_id, post_count__gt=0).update(
+            post_count=F('post_count') - 1
+        )
+        bump_group_generation(old_group_id)
+    if new_group_id is not None:
+        Group.objects.filter(pk=new_group_id).update(
+            post_count=F('post_count') + 1
+        )
+        bump_group_generation(new_group_id)
+
+
+def recount_groups(group_ids):
+    """Пересчитывает счётчики групп одним UPDATE и сбрасывает их ленты.
+
+    Для массовых операций, после которых сдвигать счётчики по одному
+    посту слишком долго.
+    """
+    group_ids = set(group_ids) - {None}
+    if sharding.is_sharded():
+        # Посты групп разбросаны по шардам: суммы считаются в Python.
+        totals = Counter()
+        for posts in sharding.each_shard(
+            Post.objects.filter(group_id__in=group_ids)
+        ):
+            totals.update(dict(
+                posts.order_by().values_list('group_id').annotate(
+                    total=Count('pk')
+                ).values_list('group_id', 'total')
+            ))
+        for group_id in group_ids:
+            Group.objects.filter(pk=group_id).update(
+                post_count=totals[group_id]
+            )
+    else:
+        counts = Post.objects.filter(
+            group=OuterRef('pk')
+        ).order_by().values('group').annotate(
+            total=Count('pk')
+        ).values('total')
+        Group.objects.filter(pk__in=group_ids).update(
+            post_count=Coalesce(Subquery(counts), 0)
+        )
+    for group_id in group_ids:
+        bump_group_generation(group_id)
+
+
+def attach_groups(posts, *known):
+    """Подставляет группы в связь group одним запросом; возвращает список.
+
+    Шаблоны лент выводят группу каждого поста, и без этого на странице
+    был бы запрос на пост. Группы из known уже на руках, их не читаем.
+    """
+    posts = list(posts)
+    groups = {group.pk: group for group in known}
+    missing = {post.group_id for post in posts} - set(groups) - {None}
+    if missing:
+        groups.update(Group.objects.in_bulk(missing))
+    for post in posts:
+        if post.group_id in groups:
+            type(post).group.field.set_cached_value(
+                post, groups[post.group_id]
+            )
+    return posts
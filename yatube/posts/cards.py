@@ -0,0 +1,74 @@
+"""Кеш отрендеренных карточек постов.
+
+Карточка — HTML поста в ленте (includes/post_card.html), одна и та же
+на главной, в группе, в профиле и в подписках. Ключ карточки — id поста
+и версия: контрольная сумма всего, что попадает в разметку, поэтому
+правка поста, переименование группы или автора дают новый ключ — в том
+числе при массовых UPDATE мимо save() и сигналов. В сумму входит и
+отрендеренный текст (posts.richtext), так что обновление рендерера тоже
+меняет ключ. Карточки страницы
+читаются одним get_many, а заново рендерятся и пишутся одним set_many
+только изменившиеся.
+"""
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from users.cache import attach_authors
+
+from .cache import attach_groups
+from .richtext import refresh
+
+# Номер разметки: увеличивается при изменении шаблона карточки.
+TEMPLATE_REVISION = 2
+CARD_KEY = 'card:{}:{}:{:08x}'
+TEMPLATE = 'includes/post_card.html'
+
+
+def card_version(post):
+    """Контрольная сумма полей поста, автора и группы из карточки."""
+    author = post.author
+    group = post.group
+    parts = [
+        post.text,
+        post.text_html,
+        post.pub_date.isoformat(),
+        post.image.name or '',
+        author.username,
+        author.first_name,
+        author.last_name,
+    ]
+    if group is not None:
+        parts.extend((str(group.pk), group.slug, group.title))
+    return zlib.crc32('\0'.join(parts).encode())
+
+
+def card_key(post):
+    return CARD_KEY.format(TEMPLATE_REVISION, post.pk, card_version(post))
+
+
+def render_cards(posts, *known):
+    """HTML карточек постов в том же порядке.
+
+    Авторы и группы подставляются здесь, а не в представлении: внутри
+    закешированного фрагмента страницы до этого не доходит. Группы из
+    known уже на руках у представления.
+    """
+    posts = attach_groups(attach_authors(posts), *known)
+    refresh(posts)
+    keys = [card_key(post) for post in posts]
+    found = cache.get_many(keys)
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        card = found.get(key)
+        if card is None:
+            card = render_to_string(TEMPLATE, {'post': post})
+            rendered[key] = card
+        cards.append(mark_safe(card))
+    if rendered:
+        cache.set_many(rendered, settings.CARD_CACHE_TIMEOUT)
+    return cards
@@ -0,0 +1,140 @@
+"""Инкрементальное обновление лент.
+
+Клиент присылает курсор — (pub_date, id) самого нового поста, который он
+уже видел, — и получает только посты новее. Для каждой ленты в общем
+кеше хранится маркер: курсор её самого нового поста. Если маркер не
+новее курсора клиента, ответ собирается без единого запроса к базе.
+
+Маркеры не пересчитываются при записи, а удаляются: сразу и ещё раз после
+коммита, чтобы читатель между ними не закешировал старое значение.
+Следующий запрос восстановит маркер одним индексным запросом.
+"""
+import heapq
+from datetime import datetime, timezone
+from itertools import islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from . import sharding
+from .models import Post
+
+MARKER_KEY = 'feed_marker:{}'
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = datetime.resolution
+# Маркер ленты без постов: старше любого курсора.
+EMPTY = (0, 0)
+
+
+def cursor_of(post):
+    """Курсор поста: (микросекунды pub_date от эпохи, id)."""
+    return (post.pub_date - EPOCH) // MICROSECOND, post.pk
+
+
+def encode_cursor(cursor):
+    return '{}-{}'.format(*cursor)
+
+
+def decode_cursor(value):
+    """Курсор из строки «микросекунды-id» или ValueError."""
+    micros, _, post_id = (value or '').partition('-')
+    return int(micros), int(post_id)
+
+
+def post_feeds(author_id, *group_ids):
+    """Ленты, в которые попадает пост автора из указанных групп."""
+    feeds = ['index', f'author:{author_id}']
+    feeds.extend(
+        f'group:{group_id}' for group_id in group_ids if group_id is not None
+    )
+    return feeds
+
+
+def feed_marker(feed, post_list):
+    """Курсор самого нового поста ленты, из кеша или из базы."""
+    key = MARKER_KEY.format(feed)
+    marker = cache.get(key)
+    if marker is None:
+        marker = max(
+            (
+                cursor_of(newest)
+                for posts in sharding.each_shard(post_list)
+                for newest in posts.order_by('-pub_date', '-pk').only(
+                    'pk', 'pub_date'
+                )[:1]
+            ),
+            default=EMPTY,
+        )
+        cache.set(key, marker, None)
+    return tuple(marker)
+
+
+def feed_markers(feeds):
+    """Маркеры нескольких лент: {лента: маркер или None, если его нет}."""
+    keys = {MARKER_KEY.format(feed): feed for feed in feeds}
+    found = cache.get_many(keys)
+    return {
+        feed: tuple(found[key]) if key in found else None
+        for key, feed in keys.items()
+    }
+
+
+def author_markers(author_ids):
+    """Маркеры лент авторов; недостающие — одним запросом на всех."""
+    markers = feed_markers(f'author:{pk}' for pk in author_ids)
+    missing = [pk for pk in author_ids if markers[f'author:{pk}'] is None]
+    if missing:
+        newest = Post.objects.filter(
+            author_id=OuterRef('author_id')
+        ).order_by('-pub_date', '-pk').values('pk')[:1]
+        found = {}
+        for posts in sharding.each_shard(Post.objects.filter(
+            author_id__in=missing, pk=Subquery(newest)
+        ).only('pk', 'author_id', 'pub_date')):
+            for post in posts:
+                found[post.author_id] = max(
+                    cursor_of(post), found.get(post.author_id, EMPTY)
+                )
+        fresh = {
+            f'author:{pk}': found.get(pk, EMPTY) for pk in missing
+        }
+        cache.set_many(
+            {MARKER_KEY.format(feed): marker
+             for feed, marker in fresh.items()},
+            None,
+        )
+        markers.update(fresh)
+    return markers
+
+
+def touch_feeds(*feeds, using='default'):
+    """Сбрасывает маркеры лент, в которых изменились посты.
+
+    using — база, после коммита которой маркеры сбрасываются ещё раз.
+    """
+    keys = [MARKER_KEY.format(feed) for feed in feeds]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys), using=using)
+
+
+def posts_since(post_list, cursor):
+    """Посты новее курсора от старых к новым, не больше DELTA_MAX_POSTS.
+
+    Возвращает пару (посты, есть ли ещё).
+    """
+    micros, post_id = cursor
+    pub_date = EPOCH + micros * MICROSECOND
+    limit = settings.DELTA_MAX_POSTS + 1
+    newer = post_list.filter(
+        Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=post_id)
+    ).order_by('pub_date', 'pk')
+    posts = list(islice(heapq.merge(
+        *(shard[:limit] for shard in sharding.each_shard(newer)),
+        key=attrgetter('pub_date', 'pk'),
+    ), limit))
+    return posts[:settings.DELTA_MAX_POSTS], (
+        len(posts) > settings.DELTA_MAX_POSTS
+    )
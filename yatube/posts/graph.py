@@ -0,0 +1,247 @@
+"""Граф подписок в памяти процесса.
+
+Для каждого пользователя хранятся два отсортированных array('I'): на
+кого он подписан и кто подписан на него — 4 байта на ребро в каждую
+сторону вместо строки Follow с объектом модели. Проверка подписки —
+бинарный поиск, пересечения (взаимные подписки, общие авторы) — слияние
+двух отсортированных массивов; база при этом не нужна.
+
+Граф загружается при первом обращении и дальше обновляется сигналами
+Follow в этом процессе после коммита: откаченная подписка в граф не
+попадает. Другие процессы узнают об изменениях по поколению в кеше:
+после коммита оно увеличивается, а граф не чаще раза в
+FOLLOW_GRAPH_CHECK_INTERVAL секунд сверяет своё поколение с общим и при
+расхождении загружается заново. Начальное поколение случайно, так что
+очистка кеша тоже ведёт к перезагрузке. Массовые удаления мимо сигналов
+(posts.bulk) вызывают changed() сами.
+
+Поколение видно другим процессам, только если кеш у них общий
+(memcached, Redis); с LocMemCache каждый процесс видит лишь свои
+изменения. Поэтому граф старше FOLLOW_GRAPH_MAX_AGE секунд
+перечитывается в любом случае — это верхняя граница устаревания.
+Команда check_follow_graph находит расхождения с базой.
+"""
+import random
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+
+from .models import Follow
+
+GENERATION_KEY = 'follow_graph:generation'
+TYPECODE = 'I'
+
+
+def _contains(items, value):
+    index = bisect_left(items, value)
+    return index < len(items) and items[index] == value
+
+
+def intersect(first, second):
+    """Общие элементы двух отсортированных массивов, по возрастанию."""
+    common = array(TYPECODE)
+    i = j = 0
+    while i < len(first) and j < len(second):
+        if first[i] < second[j]:
+            i += 1
+        elif first[i] > second[j]:
+            j += 1
+        else:
+            common.append(first[i])
+            i += 1
+            j += 1
+    return common
+
+
+def _current_generation():
+    cache.add(GENERATION_KEY, random.getrandbits(48), None)
+    return cache.get(GENERATION_KEY)
+
+
+def _next_generation():
+    _current_generation()
+    return cache.incr(GENERATION_KEY)
+
+
+class FollowGraph:
+    """Списки смежности подписок: {id: отсортированный array('I')}."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._following = {}
+        self._followers = {}
+        self.generation = None
+        self._checked = 0
+        self._loaded = 0
+
+    def load(self):
+        """Читает все подписки из базы одним проходом."""
+        generation = _current_generation()
+        following = {}
+        followers = {}
+        edges = Follow.objects.order_by('user_id', 'author_id').values_list(
+            'user_id', 'author_id'
+        )
+        for user_id, author_id in edges.iterator():
+            following.setdefault(user_id, array(TYPECODE)).append(author_id)
+            followers.setdefault(author_id, array(TYPECODE)).append(user_id)
+        # Читатели автора пришли по возрастанию user_id — уже отсортированы.
+        with self._lock:
+            self._following = following
+            self._followers = followers
+            self.generation = generation
+            self._checked = self._loaded = time.monotonic()
+
+    def _fresh(self):
+        """Граф, сверенный с общим поколением не дольше интервала назад."""
+        now = time.monotonic()
+        if (
+            self.generation is not None
+            and now - self._checked < settings.FOLLOW_GRAPH_CHECK_INTERVAL
+        ):
+            return self
+        if (
+            self.generation != _current_generation()
+            or now - self._loaded >= settings.FOLLOW_GRAPH_MAX_AGE
+        ):
+            self.load()
+        else:
+            self._checked = now
+        return self
+
+    def clear(self):
+        """Забывает граф: следующее обращение загрузит его заново."""
+        with self._lock:
+            self._following = {}
+            self._followers = {}
+            self.generation = None
+
+    def changed(self):
+        """Отмечает изменение подписок мимо сигналов: граф перечитается."""
+        _next_generation()
+        self.generation = None
+
+    def published(self):
+        """Сообщает другим процессам о закоммиченном изменении."""
+        generation = _next_generation()
+        with self._lock:
+            if self.generation is not None:
+                if generation == self.generation + 1:
+                    self.generation = generation
+                else:
+                    # Были и чужие изменения — перечитать.
+                    self.generation = None
+
+    def _apply(self, insert, user_id, author_id):
+        with self._lock:
+            if self.generation is None:
+                return
+            for index, key, value in (
+                (self._following, user_id, author_id),
+                (self._followers, author_id, user_id),
+            ):
+                items = index.setdefault(key, array(TYPECODE))
+                position = bisect_left(items, value)
+                present = position < len(items) and items[position] == value
+                if insert and not present:
+                    items.insert(position, value)
+                elif not insert and present:
+                    del items[position]
+                    if not items:
+                        del index[key]
+
+    def add(self, user_id, author_id):
+        self._apply(True, user_id, author_id)
+
+    def remove(self, user_id, author_id):
+        self._apply(False, user_id, author_id)
+
+    def following(self, user_id):
+        """На кого подписан user_id: отсортированный array('I')."""
+        return self._fresh()._following.get(user_id, array(TYPECODE))
+
+    def followers(self, user_id):
+        """Кто подписан на user_id: отсортированный array('I')."""
+        return self._fresh()._followers.get(user_id, array(TYPECODE))
+
+    def is_following(self, user_id, author_id):
+        return _contains(self.following(user_id), author_id)
+
+    def following_count(self, user_id):
+        return len(self.following(user_id))
+
+    def follower_count(self, user_id):
+        return len(self.followers(user_id))
+
+    def mutual(self, user_id):
+        """Пользователи, подписанные на user_id взаимно."""
+        return intersect(self.following(user_id), self.followers(user_id))
+
+    def common_following(self, user_id, other_id):
+        """Авторы, на которых подписаны оба."""
+        return intersect(self.following(user_id), self.following(other_id))
+
+    def common_followers(self, author_id, other_id):
+        """Читатели, подписанные на обоих авторов."""
+        return intersect(self.followers(author_id), self.followers(other_id))
+
+    def stats(self):
+        """Число пользователей и рёбер и занятая графом память в байтах."""
+        self._fresh()
+        with self._lock:
+            indexes = (self._following, self._followers)
+            memory = sum(
+                sys.getsizeof(index)
+                + sum(sys.getsizeof(items) for items in index.values())
+                for index in indexes
+            )
+            return {
+                'users': len(self._following.keys() | self._followers.keys()),
+                'edges': sum(map(len, self._following.values())),
+                'bytes': memory,
+            }
+
+    def check(self):
+        """Сверяет граф с Follow: (рёбра только в базе, только в графе).
+
+        Заодно проверяет, что списки читателей зеркальны спискам
+        подписок: несовпадение считается рёбрами только в графе.
+        """
+        self._fresh()
+        with self._lock:
+            graph = {
+                (user_id, author_id)
+                for user_id, authors in self._following.items()
+                for author_id in authors
+            }
+            mirror = {
+                (user_id, author_id)
+                for author_id, users in self._followers.items()
+                for user_id in users
+            }
+        stored = set(
+            Follow.objects.values_list('user_id', 'author_id').iterator()
+        )
+        return stored - (graph & mirror), (graph | mirror) - stored
+
+
+graph = FollowGraph()
+
+
+def preload():
+    """Загружает граф при старте процесса, если это включено.
+
+    Если таблиц ещё нет (migrate не запускался), граф остаётся ленивым
+    и загрузится при первом обращении.
+    """
+    if settings.FOLLOW_GRAPH_PRELOAD:
+        try:
+            graph.load()
+        except DatabaseError:
+            graph.clear()
@@ -0,0 +1,250 @@
+"""Живые обновления лент.
+
+Новые посты публикуются в брокер (pub/sub). По умолчанию это LocalBroker
+в памяти процесса; для нескольких процессов его заменяют своей
+реализацией с теми же методами через настройку LIVE_BROKER.
+
+Клиенты получают события двумя путями:
+
+* stream — ASGI-приложение Server-Sent Events, подключается в
+  yatube/asgi.py; каждое соединение — корутина с маленькой очередью,
+  поэтому тысячи простаивающих клиентов почти ничего не стоят;
+* poll — long-poll с таймаутом: в yatube/asgi.py это ASGI-приложение,
+  которое ждёт в цикле событий и не занимает поток пула; под WSGI тот же
+  ответ отдаёт обычное представление posts.views.live_poll, которое
+  держит поток на время ожидания.
+"""
+import asyncio
+import json
+import threading
+from importlib import import_module
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.utils.module_loading import import_string
+from django.utils.text import Truncator
+
+from .graph import graph
+
+SUMMARY_LENGTH = 200
+DISCONNECTED = object()
+
+
+class LocalBroker:
+    """Pub/sub в памяти процесса."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.add(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.discard(callback)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(event)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.LIVE_BROKER)()
+    return _broker
+
+
+def post_event(post):
+    """Краткое описание поста для клиентов."""
+    return {
+        'id': post.pk,
+        'author_id': post.author_id,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'text': Truncator(post.text).chars(SUMMARY_LENGTH),
+        'pub_date': post.pub_date.isoformat(),
+        'url': post.get_absolute_url(),
+    }
+
+
+def publish_post(post):
+    get_broker().publish(post_event(post))
+
+
+def make_filter(group=None, authors=None):
+    """Проверка, относится ли событие к ленте клиента."""
+    def matches(event):
+        if group is not None and event['group'] != group:
+            return False
+        return authors is None or event['author_id'] in authors
+    return matches
+
+
+def followed_authors(session_key):
+    """Авторы, на которых подписан владелец сессии, или None."""
+    engine = import_module(settings.SESSION_ENGINE)
+    user_id = engine.SessionStore(session_key).get(SESSION_KEY)
+    if user_id is None:
+        return None
+    return set(graph.following(user_id))
+
+
+def _session_key(scope):
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            for part in value.decode('latin-1').split(';'):
+                key, _, cookie = part.strip().partition('=')
+                if key == settings.SESSION_COOKIE_NAME:
+                    return cookie
+    return None
+
+
+async def _respond(send, status, body, content_type='text/plain'):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', f'{content_type}; charset=utf-8'.encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body.encode()})
+
+
+async def _respond_json(send, status, data):
+    await _respond(send, status, json.dumps(data), 'application/json')
+
+
+async def _disconnect(receive):
+    """Ждёт отключения клиента, пропуская сообщения с телом запроса."""
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return message
+
+
+def _subscribe(loop, matches):
+    """Подписывает на брокер очередь цикла loop; отдаёт (очередь,
+    обработчик) — обработчик потом нужно отписать."""
+    events = asyncio.Queue(maxsize=settings.LIVE_QUEUE_SIZE)
+
+    def put(event):
+        if not events.full():
+            events.put_nowait(event)
+
+    def on_event(event):
+        if matches(event):
+            loop.call_soon_threadsafe(put, event)
+
+    get_broker().subscribe(on_event)
+    return events, on_event
+
+
+async def _stream_filter(scope, loop):
+    """Фильтр ленты по строке запроса; None, если нужна авторизация."""
+    params = parse_qs(scope.get('query_string', b'').decode())
+    authors = None
+    if params.get('feed') == ['follow']:
+        authors = await loop.run_in_executor(
+            None, followed_authors, _session_key(scope)
+        )
+        if authors is None:
+            return None
+    return make_filter(params.get('group', [None])[0], authors)
+
+
+async def _next_event(events, disconnected, timeout=None):
+    """Следующее событие, None по таймауту (по умолчанию keepalive) или
+    DISCONNECTED."""
+    getter = asyncio.ensure_future(events.get())
+    done, _ = await asyncio.wait(
+        {getter, disconnected},
+        timeout=timeout or settings.LIVE_KEEPALIVE,
+        return_when=asyncio.FIRST_COMPLETED,
+    )
+    if getter in done:
+        return getter.result()
+    getter.cancel()
+    return DISCONNECTED if disconnected in done else None
+
+
+async def stream(scope, receive, send):
+    """ASGI-приложение: поток SSE о новых постах.
+
+    Параметры: ?group=<slug> — только посты группы, ?feed=follow — только
+    авторы, на которых подписан пользователь (нужна сессия).
+    """
+    loop = asyncio.get_event_loop()
+    matches = await _stream_filter(scope, loop)
+    if matches is None:
+        await _respond(send, 403, 'Нужно войти на сайт')
+        return
+    events, on_event = _subscribe(loop, matches)
+    disconnected = asyncio.ensure_future(_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+            ],
+        })
+        count = 0
+        while True:
+            event = await _next_event(events, disconnected)
+            if event is DISCONNECTED:
+                return
+            if event is None:
+                chunk = ': keepalive\n\n'
+            else:
+                count += 1
+                data = json.dumps(dict(event, count=count))
+                chunk = f'event: post\ndata: {data}\n\n'
+            await send({
+                'type': 'http.response.body',
+                'body': chunk.encode(),
+                'more_body': True,
+            })
+    finally:
+        get_broker().unsubscribe(on_event)
+        disconnected.cancel()
+
+
+async def poll(scope, receive, send):
+    """ASGI-приложение: long-poll новых постов, как posts.views.live_poll.
+
+    Ждёт первое событие не дольше LIVE_POLL_TIMEOUT и отдаёт его вместе
+    с уже накопившимися. Ожидание — корутина, поток пула не занимается.
+    """
+    loop = asyncio.get_event_loop()
+    matches = await _stream_filter(scope, loop)
+    if matches is None:
+        await _respond_json(send, 403, {'error': 'Нужно войти на сайт'})
+        return
+    events, on_event = _subscribe(loop, matches)
+    disconnected = asyncio.ensure_future(_disconnect(receive))
+    try:
+        event = await _next_event(
+            events, disconnected, settings.LIVE_POLL_TIMEOUT
+        )
+        if event is DISCONNECTED:
+            return
+        received = [] if event is None else [event]
+        while not events.empty():
+            received.append(events.get_nowait())
+    finally:
+        get_broker().unsubscribe(on_event)
+        disconnected.cancel()
+    await _respond_json(send, 200, {'count': len(received), 'posts': received})
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_old_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями в архив.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше стольких дней.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Постов в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_old_posts(options['days'], options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Перенесено в архив постов: {archived}')
+        )
@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+
+from posts.models import Group, Post, User
+
+CARD_LINKS = {
+    '{% url %}': (
+        '{% for post in posts %}'
+        "<a href=\"{% url 'posts:profile' post.author.username %}\"></a>"
+        '{% if post.group %}'
+        "<a href=\"{% url 'posts:group_list' post.group.slug %}\"></a>"
+        '{% endif %}'
+        "<a href=\"{% url 'posts:post_detail' post.pk %}\"></a>"
+        '{% endfor %}'
+    ),
+    'posts.links': (
+        '{% load post_links %}'
+        '{% for post in posts %}'
+        "<a href=\"{% fast_url 'posts:profile' post.author.username %}\">"
+        '</a>'
+        '{% if post.group %}'
+        '<a href="{{ post.group.get_absolute_url }}"></a>'
+        '{% endif %}'
+        '<a href="{{ post.get_absolute_url }}"></a>'
+        '{% endfor %}'
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает {% url %} и posts.links на ссылках карточек постов: '
+        'время отрисовки страницы из --posts постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100)
+        parser.add_argument('--pages', type=int, default=200)
+
+    def handle(self, *args, **options):
+        # Объекты в памяти: замеряется только построение ссылок.
+        groups = [Group(slug=f'group-{number}') for number in range(10)]
+        posts = [
+            Post(
+                pk=number,
+                author=User(username=f'author_{number % 30}'),
+                group=groups[number % 10] if number % 3 else None,
+            )
+            for number in range(1, options['posts'] + 1)
+        ]
+        engine = engines['django']
+        results = {}
+        for title, source in CARD_LINKS.items():
+            template = engine.from_string(source)
+            results[title] = template.render({'posts': posts})
+            started = time.perf_counter()
+            for _ in range(options['pages']):
+                template.render({'posts': posts})
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{title}: {elapsed * 1000 / options["pages"]:.2f} мс '
+                f'на страницу из {options["posts"]} постов'
+            )
+        if len(set(results.values())) != 1:
+            self.stderr.write('Ссылки различаются!')
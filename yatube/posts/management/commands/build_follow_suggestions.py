@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import rebuild_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов для всех пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.FOLLOW_SUGGESTIONS_CHUNK,
+            help='Сколько пользователей обрабатывать за один проход.',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for last_id, count in rebuild_suggestions(options['chunk_size']):
+            total += count
+            self.stdout.write(f'Пользователи до id={last_id}: {count}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Готово, рекомендаций: {total}')
+        )
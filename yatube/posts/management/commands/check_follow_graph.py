@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.graph import graph
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает граф подписок, печатает его размер и сверяет '
+        'с таблицей Follow.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        graph.load()
+        elapsed = time.monotonic() - started
+        stats = graph.stats()
+        self.stdout.write(
+            f'Пользователей: {stats["users"]}, подписок: {stats["edges"]}, '
+            f'память: {stats["bytes"] / 1024:.1f} КиБ, '
+            f'загрузка: {elapsed:.3f} с'
+        )
+        missing, extra = graph.check()
+        if missing or extra:
+            raise CommandError(
+                f'Граф расходится с Follow: нет в графе {len(missing)}, '
+                f'лишних в графе {len(extra)}'
+            )
+        self.stdout.write(self.style.SUCCESS('Граф совпадает с Follow'))
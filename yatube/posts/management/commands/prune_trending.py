@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import prune
+
+
+class Command(BaseCommand):
+    help = 'Удаляет остывшие записи из рейтингов постов и групп.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'Удалено записей: {prune()}'))
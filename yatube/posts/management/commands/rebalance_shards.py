@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import sharding
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Закрепляет авторов за шардами, сдвигает счётчик id и выравнивает '
+        'шарды переносом авторов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--author',
+            help='Перенести только этого автора (username).',
+        )
+        parser.add_argument(
+            '--to',
+            help='Шард для --author.',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.1,
+            help='Допустимый разрыв между шардами, доля от среднего.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать переносы.',
+        )
+
+    def handle(self, *args, **options):
+        sharding.pin_authors()
+        sharding.sync_ids()
+        if options['author']:
+            if options['to'] not in sharding.get_shards():
+                raise CommandError('--to должен быть одним из POST_SHARDS')
+            author = User.objects.filter(username=options['author']).first()
+            if author is None:
+                raise CommandError('Автор не найден')
+            moved = 0
+            if not options['dry_run']:
+                moved = sharding.move_author(author.pk, options['to'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Перенесено постов: {moved}'
+            ))
+            return
+        moves = sharding.rebalance(
+            options['tolerance'], dry_run=options['dry_run']
+        )
+        for author_id, source, target in moves:
+            self.stdout.write(f'Автор {author_id}: {source} -> {target}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Перенесено авторов: {len(moves)}')
+        )
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.stats import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику профилей всех авторов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Авторов в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_all(options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитана статистика авторов: {rebuilt}')
+        )
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+from posts.richtext import RENDERER_VERSION, refresh
+from posts.sharding import get_shards
+
+
+class Command(BaseCommand):
+    help = (
+        'Перерисовывает сохранённый HTML постов и комментариев '
+        'после обновления рендерера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Проверить все записи, а не только от старого рендерера: '
+                 'находит тексты, изменённые массовым UPDATE.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Записей в одном UPDATE.',
+        )
+
+    def rerender(self, queryset, check_all, chunk_size):
+        if not check_all:
+            queryset = queryset.exclude(
+                html_key__startswith=f'{RENDERER_VERSION}:'
+            )
+        queryset = queryset.only('pk', 'text', 'text_html', 'html_key')
+        last = 0
+        updated = 0
+        while True:
+            chunk = list(queryset.filter(pk__gt=last).order_by('pk')[
+                :chunk_size
+            ])
+            if not chunk:
+                return updated
+            last = chunk[-1].pk
+            stale = refresh(chunk)
+            queryset.model.objects.using(queryset.db).bulk_update(
+                stale, ['text_html', 'html_key']
+            )
+            updated += len(stale)
+
+    def handle(self, *args, **options):
+        querysets = [ArchivedPost.objects.all(), ArchivedComment.objects.all()]
+        for alias in get_shards():
+            querysets.append(Post.objects.using(alias))
+            querysets.append(Comment.objects.using(alias))
+        updated = sum(
+            self.rerender(
+                queryset, options['all'], options['chunk_size']
+            )
+            for queryset in querysets
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Перерисовано записей: {updated}')
+        )
@@ -0,0 +1,81 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def delete_orphan_comments(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    Comment.objects.filter(
+        models.Q(post__isnull=True) | models.Q(author__isnull=True)
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0012_group_post_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_orphan_comments, migrations.RunPython.noop
+        ),
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ('created',), 'verbose_name': 'Комментарий', 'verbose_name_plural': 'Комментарии'},
+        ),
+        # Уже опубликованные комментарии считаются одобренными.
+        migrations.AddField(
+            model_name='comment',
+            name='status',
+            field=models.CharField(choices=[('new', 'Не проверен'), ('approved', 'Одобрен'), ('rejected', 'Отклонён')], default='approved', max_length=10, verbose_name='Модерация'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='status',
+            field=models.CharField(choices=[('new', 'Не проверен'), ('approved', 'Одобрен'), ('rejected', 'Отклонён')], default='new', max_length=10, verbose_name='Модерация'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Дата'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.Post', verbose_name='Пост'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'status', 'created'], name='comment_post_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['status', 'created'], name='comment_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['author', 'created'], name='comment_author_created_idx'),
+        ),
+        migrations.CreateModel(
+            name='ModerationQueue',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'Комментарий на модерации',
+                'verbose_name_plural': 'Очередь модерации',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('posts.comment',),
+        ),
+    ]
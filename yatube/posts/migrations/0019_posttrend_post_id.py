@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Внешний ключ PostTrend.post → простое поле post_id.
+
+    Столбец post_id остаётся тем же, данные не переносятся.
+    """
+
+    dependencies = [
+        ('posts', '0018_author_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='posttrend',
+            name='post',
+            field=models.IntegerField(
+                db_column='post_id',
+                primary_key=True,
+                serialize=False,
+                verbose_name='Пост',
+            ),
+        ),
+        migrations.RenameField(
+            model_name='posttrend',
+            old_name='post',
+            new_name='post_id',
+        ),
+        migrations.AlterField(
+            model_name='posttrend',
+            name='post_id',
+            field=models.IntegerField(
+                primary_key=True, serialize=False, verbose_name='Пост'
+            ),
+        ),
+    ]
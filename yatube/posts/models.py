@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 
 from django.conf import settings
 
+from .links import url
+
 User = get_user_model()
 
 
@@ -16,6 +18,11 @@ class Group(models.Model):
         verbose_name='Слаг'
     )
     description = models.TextField('Описание')
+    post_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         default_related_name = 'groups'
@@ -23,12 +30,38 @@ class Group(models.Model):
     def __str__(self):
         return self.title
 
+    def get_absolute_url(self):
+        return url('group_list', self.slug)
+
+
+class ShardedQuerySet(models.QuerySet):
+    def create(self, **kwargs):
+        """Как QuerySet.create, но без явной базы шард выбирает роутер
+        по самой записи (см. posts.sharding)."""
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=self._db)
+        return obj
+
 
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Введите текст поста'
     )
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        default='',
+        editable=False
+    )
+    html_key = models.CharField(
+        'Версия HTML',
+        max_length=20,
+        blank=True,
+        default='',
+        editable=False
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         db_index=True,
@@ -56,6 +89,8 @@ class Post(models.Model):
         help_text='Добавьте картинку',
     )
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
@@ -64,31 +99,107 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:settings.LIMIT_TEXT]
 
+    def get_absolute_url(self):
+        return url('post_detail', self.pk)
+
+
+class CommentQuerySet(ShardedQuerySet):
+    def visible(self):
+        """Комментарии, которые можно показывать читателям.
+
+        Статус проверяется в том же запросе по индексу
+        (post, status, created), без обращений по строкам.
+        """
+        return self.filter(status__in=Comment.visible_statuses())
+
 
 class Comment(models.Model):
+    NEW = 'new'
+    APPROVED = 'approved'
+    REJECTED = 'rejected'
+    STATUS_CHOICES = (
+        (NEW, 'Не проверен'),
+        (APPROVED, 'Одобрен'),
+        (REJECTED, 'Отклонён'),
+    )
+
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
         related_name='comments',
-        blank=True,
-        null=True
+        verbose_name='Пост'
     )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='comments',
-        blank=True,
-        null=True
+        verbose_name='Автор'
     )
     text = models.TextField(
         verbose_name='Комментарий',
         help_text='Введите комментарий'
     )
-    created = models.DateTimeField(auto_now_add=True)
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        default='',
+        editable=False
+    )
+    html_key = models.CharField(
+        'Версия HTML',
+        max_length=20,
+        blank=True,
+        default='',
+        editable=False
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+    status = models.CharField(
+        'Модерация',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=NEW
+    )
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Комментарий'
+        verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', 'status', 'created'],
+                name='comment_post_status_idx'
+            ),
+            models.Index(
+                fields=['status', 'created'],
+                name='comment_status_created_idx'
+            ),
+            models.Index(
+                fields=['author', 'created'],
+                name='comment_author_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
+    @staticmethod
+    def visible_statuses():
+        # При премодерации непроверенные комментарии ждут одобрения.
+        if settings.COMMENTS_PREMODERATION:
+            return [Comment.APPROVED]
+        return [Comment.NEW, Comment.APPROVED]
+
+
+class ModerationQueue(Comment):
+    """Непроверенные комментарии — отдельный раздел админки."""
+
+    class Meta:
+        proxy = True
+        verbose_name = 'Комментарий на модерации'
+        verbose_name_plural = 'Очередь модерации'
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -114,3 +225,349 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'Подписка {self.user} на {self.author}'
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Рекомендуемый автор',
+        on_delete=models.CASCADE,
+        related_name='suggested_to',
+    )
+    score = models.FloatField('Вес рекомендации')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow_suggestion'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='suggestion_user_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Рекомендация {self.author} для {self.user}'
+
+
+class PostTrend(models.Model):
+    # Одна строка рейтинга на пост (см. posts.sharding о post_id).
+    post_id = models.IntegerField('Пост', primary_key=True)
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='post_trends',
+        verbose_name='Группа',
+    )
+    score = models.FloatField('Логарифм рейтинга')
+
+    class Meta:
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
+        indexes = [
+            models.Index(fields=['-score'], name='post_trend_score_idx'),
+            models.Index(
+                fields=['group', '-score'],
+                name='post_trend_group_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Рейтинг поста {self.post_id}'
+
+
+class GroupTrend(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend',
+        verbose_name='Группа',
+    )
+    score = models.FloatField('Логарифм рейтинга')
+
+    class Meta:
+        verbose_name = 'Рейтинг группы'
+        verbose_name_plural = 'Рейтинги групп'
+        indexes = [
+            models.Index(fields=['-score'], name='group_trend_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'Рейтинг группы {self.group_id}'
+
+
+class Tag(models.Model):
+    """Хештег. Имя хранится в нижнем регистре."""
+
+    name = models.CharField('Тег', max_length=50, unique=True)
+
+    class Meta:
+        ordering = ('name',)
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """Связь поста с тегом; лежит на шарде поста.
+
+    pub_date скопирована из поста: лента тега — один проход по индексу
+    (tag, -pub_date, -post) без сортировки.
+    """
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='tag_links',
+        db_index=False,
+        verbose_name='Пост'
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_links',
+        db_index=False,
+        verbose_name='Тег'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Тег поста'
+        verbose_name_plural = 'Теги постов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'tag'],
+                name='unique_post_tag'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['tag', '-pub_date', '-post'],
+                name='post_tag_feed_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.tag_id}'
+
+
+class Mention(models.Model):
+    """Упоминание пользователя в посте; лежит на шарде поста."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        db_index=False,
+        verbose_name='Пост'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        db_index=False,
+        verbose_name='Пользователь'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Упоминание'
+        verbose_name_plural = 'Упоминания'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'user'],
+                name='unique_mention'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='mention_feed_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.user_id}'
+
+
+class ArchivedPost(models.Model):
+    """Пост старше ARCHIVE_AFTER_DAYS, перенесённый из горячей таблицы.
+
+    id совпадает с id исходного поста, поэтому старые ссылки работают.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        default='',
+        editable=False
+    )
+    html_key = models.CharField(
+        'Версия HTML',
+        max_length=20,
+        blank=True,
+        default='',
+        editable=False
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    archived = models.DateTimeField('Перенесён в архив', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архив постов'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='archived_post_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.text[:settings.LIMIT_TEXT]
+
+    def get_absolute_url(self):
+        return url('post_detail', self.pk)
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField('Комментарий')
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        default='',
+        editable=False
+    )
+    html_key = models.CharField(
+        'Версия HTML',
+        max_length=20,
+        blank=True,
+        default='',
+        editable=False
+    )
+    created = models.DateTimeField('Дата')
+    status = models.CharField(
+        'Модерация',
+        max_length=10,
+        choices=Comment.STATUS_CHOICES
+    )
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return self.text
+
+
+class AuthorStats(models.Model):
+    """Готовая статистика профиля автора (см. posts.stats).
+
+    Посты считаются вместе с архивными. months и groups — JSON вида
+    {"2023-05": 3} и {"<id группы>": 7}.
+    """
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    post_count = models.PositiveIntegerField('Постов', default=0)
+    comments_received = models.PositiveIntegerField(
+        'Получено комментариев', default=0
+    )
+    months = models.TextField('Постов по месяцам', default='{}')
+    groups = models.TextField('Постов по группам', default='{}')
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'Статистика {self.author_id}'
+
+
+class AuthorShard(models.Model):
+    """Шард, на котором лежат посты автора и комментарии к ним."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_shard',
+        verbose_name='Автор'
+    )
+    shard = models.CharField('Шард', max_length=50)
+
+    class Meta:
+        verbose_name = 'Шард автора'
+        verbose_name_plural = 'Шарды авторов'
+
+    def __str__(self):
+        return f'{self.author_id}: {self.shard}'
+
+
+class IdBlock(models.Model):
+    """Выданный блок id постов и комментариев, общий для всех шардов.
+
+    Блок с номером n — это id от n * SHARD_ID_BLOCK до
+    (n + 1) * SHARD_ID_BLOCK - 1.
+    """
+
+    class Meta:
+        verbose_name = 'Блок id'
+        verbose_name_plural = 'Блоки id'
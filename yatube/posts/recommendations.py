@@ -0,0 +1,124 @@
+"""Рекомендации авторов для подписки.
+
+Граф подписок берётся из Follow и держится в памяти в виде словаря
+множеств смежности только для обрабатываемой порции пользователей.
+Вес кандидата складывается из двух сигналов:
+
+* друзья друзей — авторы, на которых подписаны мои авторы;
+* совместные подписки — авторы, на которых подписаны другие читатели
+  моих авторов (вклад читателя делится на число его подписок).
+
+Готовые top-K хранятся в FollowSuggestion и отдаются одним запросом.
+"""
+import heapq
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Follow, FollowSuggestion, User
+
+# Ограничение на число параметров в одном IN (...) для SQLite.
+IN_CHUNK_SIZE = 500
+
+
+def _chunks(ids, size=IN_CHUNK_SIZE):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _following(user_ids):
+    """Возвращает {user_id: {author_id, ...}} для переданных читателей."""
+    following = defaultdict(set)
+    for chunk in _chunks(user_ids):
+        edges = Follow.objects.filter(
+            user_id__in=chunk
+        ).values_list('user_id', 'author_id')
+        for user_id, author_id in edges.iterator():
+            following[user_id].add(author_id)
+    return following
+
+
+def _readers(author_ids, limit):
+    """Возвращает {author_id: [user_id, ...]} — последних читателей автора.
+
+    На автора берётся не больше limit читателей, поэтому популярные
+    авторы не раздувают память при пакетном пересчёте.
+    """
+    readers = defaultdict(list)
+    for chunk in _chunks(author_ids):
+        edges = Follow.objects.filter(
+            author_id__in=chunk
+        ).order_by('-id').values_list('author_id', 'user_id')
+        for author_id, user_id in edges.iterator():
+            if len(readers[author_id]) < limit:
+                readers[author_id].append(user_id)
+    return readers
+
+
+def _top_authors(user_id, following, readers, count):
+    own = following.get(user_id, set())
+    scores = Counter()
+    for author_id in own:
+        for candidate_id in following.get(author_id, ()):
+            scores[candidate_id] += settings.FOLLOW_SUGGESTIONS_FOF_WEIGHT
+        for reader_id in readers.get(author_id, ()):
+            reader_follows = following.get(reader_id, ())
+            if reader_id == user_id or not reader_follows:
+                continue
+            weight = (
+                settings.FOLLOW_SUGGESTIONS_CO_FOLLOW_WEIGHT
+                / len(reader_follows)
+            )
+            for candidate_id in reader_follows:
+                scores[candidate_id] += weight
+    for author_id in own | {user_id}:
+        scores.pop(author_id, None)
+    return heapq.nlargest(count, scores.items(), key=itemgetter(1))
+
+
+def build_suggestions(user_ids):
+    """Пересчитывает рекомендации для читателей из user_ids.
+
+    Возвращает число сохранённых рекомендаций.
+    """
+    user_ids = list(user_ids)
+    following = _following(user_ids)
+    authors = set().union(*following.values())
+    readers = _readers(authors, settings.FOLLOW_SUGGESTIONS_CO_READERS)
+    neighbours = authors.union(*readers.values())
+    following.update(_following(neighbours.difference(following)))
+
+    suggestions = [
+        FollowSuggestion(user_id=user_id, author_id=author_id, score=score)
+        for user_id in user_ids
+        for author_id, score in _top_authors(
+            user_id, following, readers, settings.FOLLOW_SUGGESTIONS_COUNT
+        )
+    ]
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FollowSuggestion.objects.bulk_create(suggestions)
+    return len(suggestions)
+
+
+def rebuild_suggestions(chunk_size=None):
+    """Пакетный пересчёт для всех пользователей порциями по chunk_size.
+
+    Генератор: после каждой порции отдаёт (последний id, число
+    рекомендаций в порции), чтобы вызывающий мог показать прогресс.
+    """
+    chunk_size = chunk_size or settings.FOLLOW_SUGGESTIONS_CHUNK
+    last_id = 0
+    while True:
+        user_ids = list(
+            User.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not user_ids:
+            return
+        last_id = user_ids[-1]
+        yield last_id, build_suggestions(user_ids)
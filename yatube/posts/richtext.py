@@ -0,0 +1,135 @@
+"""Разметка текстов постов и комментариев.
+
+Текст рендерится в HTML один раз — при сохранении — и хранится рядом в
+text_html; шаблоны выводят готовый HTML без разбора на каждый показ.
+Разметка небольшая: абзацы и переносы строк, **жирный**, *курсив*,
+`код`, ссылки http(s), хештеги #тег — ссылки на ленту тега — и
+упоминания @username — ссылки на профиль, если такой пользователь есть.
+
+HTML безопасен по построению: весь исходный текст экранируется, теги
+ставит только рендерер. В html_key лежат версия рендерера и контрольная
+сумма текста, из которого получен HTML. Если они не совпадают с текущими
+(рендерер обновился или текст менялся массовым UPDATE мимо save()),
+refresh() перерисовывает такие записи в памяти перед показом, а команда
+rerender_posts сохраняет их в базу.
+"""
+import re
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.utils.html import escape
+
+from .links import url as link
+
+User = get_user_model()
+
+# Номер рендерера: увеличивается при любом изменении разметки.
+RENDERER_VERSION = 2
+
+_PARAGRAPHS = re.compile(r'\n\s*\n')
+_MENTION = r'(?<![\w@/])@[\w.+-]*\w'
+_HASHTAG = r'(?<![\w&#/])#\w{1,50}(?!\w)'
+_INLINE = re.compile(
+    r'(?P<code>`[^`\n]+`)'
+    r'|(?P<url>\bhttps?://[^\s<>"\']+)'
+    rf'|(?P<mention>{_MENTION})'
+    rf'|(?P<tag>{_HASHTAG})'
+    r'|\*\*(?P<strong>\S(?:.*?\S)?)\*\*'
+    r'|\*(?P<em>[^\s*](?:[^*\n]*[^\s*])?)\*'
+)
+_MENTIONS = re.compile(_MENTION)
+_HASHTAGS = re.compile(_HASHTAG)
+# Знаки препинания в конце ссылки относятся к предложению.
+_URL_TAIL = '.,;:!?)'
+
+
+def source_key(text):
+    """Версия рендерера и контрольная сумма текста для html_key."""
+    return f'{RENDERER_VERSION}:{zlib.crc32(text.encode()):08x}'
+
+
+def mentions(text):
+    """Имена пользователей, упомянутых в тексте."""
+    return {match[1:] for match in _MENTIONS.findall(text)}
+
+
+def hashtags(text):
+    """Имена хештегов текста в нижнем регистре."""
+    return {match[1:].lower() for match in _HASHTAGS.findall(text)}
+
+
+def _inline(text, known):
+    parts = []
+    position = 0
+    for match in _INLINE.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'code':
+            parts.append(f'<code>{escape(value[1:-1])}</code>')
+        elif kind == 'url':
+            url = value.rstrip(_URL_TAIL)
+            position -= len(value) - len(url)
+            parts.append(
+                f'<a href="{escape(url)}" rel="nofollow noopener">'
+                f'{escape(url)}</a>'
+            )
+        elif kind == 'mention':
+            username = value[1:]
+            if username in known:
+                url = link('profile', username)
+                parts.append(f'<a href="{url}">@{escape(username)}</a>')
+            else:
+                parts.append(escape(value))
+        elif kind == 'tag':
+            url = link('tag_posts', value[1:].lower())
+            parts.append(f'<a href="{url}">{escape(value)}</a>')
+        else:
+            tag = kind
+            parts.append(f'<{tag}>{_inline(value, known)}</{tag}>')
+    parts.append(escape(text[position:]))
+    return ''.join(parts)
+
+
+def render(text, known=()):
+    """HTML текста; known — существующие имена из упоминаний."""
+    paragraphs = []
+    for paragraph in _PARAGRAPHS.split(text.replace('\r\n', '\n').strip()):
+        lines = [_inline(line, known) for line in paragraph.split('\n')]
+        paragraphs.append('<p>{}</p>'.format('<br>'.join(lines)))
+    return '\n'.join(paragraphs)
+
+
+def existing_usernames(names):
+    """Из имён names те, что есть в базе, — одним запросом."""
+    if not names:
+        return set()
+    return set(
+        User.objects.filter(username__in=names).values_list(
+            'username', flat=True
+        )
+    )
+
+
+def refresh(objects):
+    """Перерисовывает text_html устаревших записей; отдаёт их список.
+
+    Упоминания всех записей проверяются одним запросом. В базу ничего
+    не пишется: это дело save() или команды rerender_posts.
+    """
+    stale = []
+    for obj in objects:
+        key = source_key(obj.text)
+        if obj.html_key != key:
+            stale.append((obj, key))
+    if not stale:
+        return []
+    names = set()
+    for obj, _ in stale:
+        names.update(mentions(obj.text))
+    known = existing_usernames(names)
+    for obj, key in stale:
+        obj.text_html = render(obj.text, known)
+        obj.html_key = key
+    return [obj for obj, _ in stale]
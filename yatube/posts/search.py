@@ -0,0 +1,78 @@
+"""Полнотекстовый поиск по постам.
+
+На SQLite рядом с posts_post живёт индекс FTS5 с внешним содержимым: он
+хранит только инвертированный индекс и обновляется триггерами. Индекс и
+триггеры создаются после каждой миграции (post_migrate), потому что
+SQLite пересоздаёт таблицу при изменении схемы и теряет её триггеры.
+На других СУБД search() возвращает None, и вызывающий код ищет обычным
+способом.
+"""
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+TABLE = 'posts_post_fts'
+TRIGGERS = {
+    'posts_post_fts_insert': (
+        'AFTER INSERT ON posts_post BEGIN '
+        'INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); '
+        'END'
+    ),
+    'posts_post_fts_delete': (
+        'AFTER DELETE ON posts_post BEGIN '
+        "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+        "VALUES ('delete', old.id, old.text); "
+        'END'
+    ),
+    'posts_post_fts_update': (
+        'AFTER UPDATE OF text ON posts_post BEGIN '
+        "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+        "VALUES ('delete', old.id, old.text); "
+        'INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); '
+        'END'
+    ),
+}
+
+
+def ensure_index(using='default', **kwargs):
+    """Создаёт индекс и триггеры, если их нет (обработчик post_migrate)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if 'posts_post' not in connection.introspection.table_names(cursor):
+            return
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+            " AND name LIKE 'posts_post_fts%'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if TABLE not in existing:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+                "text, content='posts_post', content_rowid='id')"
+            )
+        missing = [name for name in TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(f'CREATE TRIGGER {name} {TRIGGERS[name]}')
+        if missing:
+            # Пока триггеров не было, индекс мог отстать от таблицы.
+            cursor.execute(
+                f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')"
+            )
+
+
+def match_expression(query):
+    """Запрос FTS5: все слова, каждое как префикс, без операторов."""
+    terms = query.split()
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def search(queryset, query):
+    """Посты queryset, в тексте которых есть все слова query, или None."""
+    connection = connections[queryset.db]
+    expression = match_expression(query)
+    if connection.vendor != 'sqlite' or not expression:
+        return None
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [expression]
+    ))
@@ -0,0 +1,405 @@
+"""Шардирование постов и комментариев по авторам.
+
+Все посты автора, комментарии к ним, их теги и упоминания (posts.tags)
+лежат в одной базе из POST_SHARDS; какой именно — записано в AuthorShard
+(в default), а для авторов без записи выбирается по id. Пользователи,
+группы, подписки и всё остальное живут только в default; на шарды
+копируются заготовки пользователей, групп и тегов — ровно для внешних
+ключей, читаются они всегда из default.
+
+id постов и комментариев выдаются блоками из IdBlock в default, поэтому
+они уникальны между шардами: ссылки на посты не зависят от шарда, а
+автора можно перенести целиком (rebalance_shards). Ленты из нескольких
+шардов сливаются по дате (ShardedPosts).
+
+Таблицы default, которые ссылаются на посты (PostTrend, Notification),
+хранят простое целое post_id, а не внешний ключ: пост может лежать на
+другом шарде, и ограничение базы его не найдёт. Каскадного удаления у
+них поэтому нет — такие строки удаляет posts.bulk.forget_posts.
+
+Пока в POST_SHARDS один шард, всё это сводится к прежним запросам к
+default. После изменения списка шардов нужно выполнить migrate для
+каждой новой базы и rebalance_shards.
+"""
+import heapq
+import threading
+from itertools import islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from . import bulk
+from .models import (
+    ArchivedComment, ArchivedPost, AuthorShard, Comment, Follow, Group,
+    IdBlock, Mention, Post, PostTag, Tag
+)
+
+User = get_user_model()
+
+SHARD_KEY = 'shard:author:{}'
+SHARDED = (Post, Comment)
+
+_ids = {'next': 0, 'stop': 0}
+_ids_lock = threading.Lock()
+
+
+def get_shards():
+    return tuple(settings.POST_SHARDS)
+
+
+def is_sharded():
+    return len(settings.POST_SHARDS) > 1
+
+
+def shards_of(author_ids):
+    """Шарды авторов: {id автора: алиас базы}."""
+    shards = get_shards()
+    author_ids = set(author_ids)
+    if len(shards) == 1:
+        return dict.fromkeys(author_ids, shards[0])
+    cached = cache.get_many([SHARD_KEY.format(pk) for pk in author_ids])
+    found = {
+        pk: cached[SHARD_KEY.format(pk)]
+        for pk in author_ids if SHARD_KEY.format(pk) in cached
+    }
+    missing = author_ids - set(found)
+    if missing:
+        stored = dict(AuthorShard.objects.filter(
+            author__in=missing
+        ).values_list('author_id', 'shard'))
+        for pk in missing:
+            found[pk] = stored.get(pk) or shards[pk % len(shards)]
+        cache.set_many({
+            SHARD_KEY.format(pk): found[pk] for pk in missing
+        })
+    return found
+
+
+def shard_for(author_id):
+    return shards_of([author_id])[author_id]
+
+
+def assign_shard(author_id, shard):
+    AuthorShard.objects.update_or_create(
+        author_id=author_id, defaults={'shard': shard}
+    )
+    cache.set(SHARD_KEY.format(author_id), shard)
+
+
+def next_id():
+    """Следующий id поста или комментария, уникальный на всех шардах.
+
+    Запрос к default нужен раз в SHARD_ID_BLOCK id. Блок, взятый внутри
+    транзакции default, после неё не используется: при откате его номер
+    достался бы другому процессу.
+    """
+    with _ids_lock:
+        if _ids['next'] >= _ids['stop']:
+            block = IdBlock.objects.create().pk
+            _ids['next'] = block * settings.SHARD_ID_BLOCK
+            _ids['stop'] = _ids['next'] + settings.SHARD_ID_BLOCK
+            if transaction.get_connection().in_atomic_block:
+                _ids['stop'] = _ids['next'] + 1
+        _ids['next'] += 1
+        return _ids['next'] - 1
+
+
+def sync_ids():
+    """Сдвигает счётчик блоков за все id, уже занятые на шардах."""
+    used = [
+        model.objects.using(alias).aggregate(top=Max('pk'))['top'] or 0
+        for alias in get_shards()
+        for model in (Post, Comment)
+    ]
+    used.extend(
+        model.objects.aggregate(top=Max('pk'))['top'] or 0
+        for model in (ArchivedPost, ArchivedComment)
+    )
+    block = max(used) // settings.SHARD_ID_BLOCK + 1
+    if not IdBlock.objects.filter(pk__gte=block).exists():
+        IdBlock.objects.create(pk=block)
+    with _ids_lock:
+        _ids['next'] = _ids['stop'] = 0
+
+
+def replicate(using, *objects):
+    """Копирует пользователей, группы и теги на шард для внешних ключей."""
+    for obj in objects:
+        if obj is None:
+            continue
+        model = obj._meta.model
+        copy = model(**{
+            field.attname: getattr(obj, field.attname)
+            for field in model._meta.concrete_fields
+        })
+        if model is User:
+            copy.set_unusable_password()
+        model.objects.using(using).bulk_create([copy], ignore_conflicts=True)
+
+
+def prepare(instance, using):
+    """Готовит новую запись поста или комментария к вставке на шард."""
+    if not is_sharded() or not instance._state.adding:
+        return
+    if instance.pk is None:
+        instance.pk = next_id()
+    if isinstance(instance, Post):
+        if not AuthorShard.objects.filter(
+            author_id=instance.author_id
+        ).exists():
+            assign_shard(instance.author_id, using)
+        if using != 'default':
+            replicate(using, instance.author, instance.group)
+    elif using != 'default':
+        replicate(using, instance.author)
+
+
+def get_post(post_id, *related):
+    """Пост с любого шарда или None."""
+    for alias in get_shards():
+        queryset = Post.objects.using(alias).filter(pk=post_id)
+        if alias == 'default':
+            queryset = queryset.select_related(*related)
+        post = queryset.first()
+        if post is not None:
+            return post
+    return None
+
+
+def posts_in_bulk(ids):
+    """Посты с любых шардов по id: {id: пост}."""
+    ids = set(ids)
+    found = {}
+    for alias in get_shards():
+        missing = ids - found.keys()
+        if not missing:
+            break
+        found.update(Post.objects.using(alias).in_bulk(missing))
+    return found
+
+
+def each_shard(queryset):
+    """Запрос queryset на каждом шарде; при одном шарде — он сам."""
+    shards = get_shards()
+    if len(shards) == 1:
+        return [queryset]
+    return [queryset.using(alias) for alias in shards]
+
+
+class ShardedPosts:
+    """Посты нескольких шардов одной лентой по убыванию даты.
+
+    Годится как object_list для Paginator. Срез [start:stop] берёт
+    первые stop постов каждого шарда и сливает их (k-way merge), так что
+    дальние страницы дороже ближних. ordering нужен, когда шард
+    сортирует по копии даты поста в другой таблице (см. posts.tags).
+    """
+
+    def __init__(self, querysets, ordering=None):
+        ordering = ordering or ('-pub_date', '-pk')
+        self.querysets = [
+            queryset.order_by(*ordering) for queryset in querysets
+        ]
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        merged = heapq.merge(
+            *(queryset[:stop] for queryset in self.querysets),
+            key=attrgetter('pub_date', 'pk'),
+            reverse=True,
+        )
+        return list(islice(merged, start, stop))
+
+
+def sharded(queryset, ordering=None):
+    """Запрос к постам по всем шардам; при одном шарде — он сам."""
+    if not is_sharded():
+        return queryset if ordering is None else queryset.order_by(*ordering)
+    return ShardedPosts(each_shard(queryset), ordering)
+
+
+def posts_of(author_ids):
+    """Посты авторов — только с тех шардов, где они лежат."""
+    groups = {}
+    for author_id, alias in shards_of(author_ids).items():
+        groups.setdefault(alias, []).append(author_id)
+    return ShardedPosts([
+        Post.objects.using(alias).filter(author_id__in=ids)
+        for alias, ids in groups.items()
+    ])
+
+
+def followed_posts(user):
+    """Лента подписок пользователя."""
+    if not is_sharded():
+        return Post.objects.filter(author__following__user=user)
+    return posts_of(
+        Follow.objects.filter(user=user).values_list('author_id', flat=True)
+    )
+
+
+def move_author(author_id, target):
+    """Переносит посты автора и комментарии к ним на шард target.
+
+    Сначала строки копируются на новый шард, затем переключается запись
+    в AuthorShard, и только потом строки удаляются со старого: чтения в
+    это время видят одну из полных копий. Возвращает число постов.
+    """
+    source = shard_for(author_id)
+    if source == target:
+        return 0
+    posts = list(Post.objects.using(source).filter(author_id=author_id))
+    comments = list(
+        Comment.objects.using(source).filter(post__author_id=author_id)
+    )
+    tag_links = list(
+        PostTag.objects.using(source).filter(post__author_id=author_id)
+    )
+    mentions = list(
+        Mention.objects.using(source).filter(post__author_id=author_id)
+    )
+    # id связей свои на каждом шарде: на новом их выдаст база.
+    for link in tag_links + mentions:
+        link.pk = None
+    # bulk_create проставляет auto_now_add заново, даты вернём после.
+    dates = [(Post, post.pk, 'pub_date', post.pub_date) for post in posts]
+    dates.extend(
+        (Comment, comment.pk, 'created', comment.created)
+        for comment in comments
+    )
+    authors = User.objects.filter(pk__in={author_id} | {
+        comment.author_id for comment in comments
+    } | {mention.user_id for mention in mentions})
+    groups = Group.objects.filter(pk__in={post.group_id for post in posts})
+    tags = Tag.objects.filter(pk__in={link.tag_id for link in tag_links})
+    with transaction.atomic(using=target):
+        replicate(target, *authors, *groups, *tags)
+        Post.objects.using(target).bulk_create(posts)
+        Comment.objects.using(target).bulk_create(comments)
+        PostTag.objects.using(target).bulk_create(tag_links)
+        Mention.objects.using(target).bulk_create(mentions)
+        for model, pk, field, value in dates:
+            model.objects.using(target).filter(pk=pk).update(**{field: value})
+    assign_shard(author_id, target)
+    with transaction.atomic(using=source):
+        bulk.delete_rows(Post, [post.pk for post in posts], source)
+    return len(posts)
+
+
+def pin_authors():
+    """Закрепляет авторов без записи в AuthorShard за их текущим шардом.
+
+    Нужно после изменения POST_SHARDS: иначе авторов со старыми постами
+    начнёт искать на другом шарде выбор по id.
+    """
+    pinned = set(AuthorShard.objects.values_list('author_id', flat=True))
+    for alias in get_shards():
+        authors = set(
+            Post.objects.using(alias).order_by().values_list(
+                'author_id', flat=True
+            ).distinct()
+        ) - pinned
+        AuthorShard.objects.bulk_create(
+            AuthorShard(author_id=author_id, shard=alias)
+            for author_id in authors
+        )
+        cache.delete_many([SHARD_KEY.format(pk) for pk in authors])
+        pinned |= authors
+
+
+def shard_loads():
+    """Число постов по шардам и авторам: {шард: {id автора: постов}}."""
+    return {
+        alias: dict(
+            Post.objects.using(alias).order_by().values_list(
+                'author_id'
+            ).annotate(total=Count('pk')).values_list('author_id', 'total')
+        )
+        for alias in get_shards()
+    }
+
+
+def rebalance(tolerance=0.1, dry_run=False):
+    """Выравнивает число постов на шардах переносом целых авторов.
+
+    Пока самый загруженный шард больше самого свободного на долю
+    tolerance от среднего, переносит с него автора, который сокращает
+    разрыв сильнее всего. Возвращает список (id автора, откуда, куда).
+    """
+    loads = shard_loads()
+    totals = {alias: sum(authors.values()) for alias, authors in loads.items()}
+    average = sum(totals.values()) / len(totals)
+    moves = []
+    while True:
+        heaviest = max(totals, key=totals.get)
+        lightest = min(totals, key=totals.get)
+        gap = totals[heaviest] - totals[lightest]
+        if gap <= tolerance * average:
+            break
+        candidates = [
+            (author_id, count)
+            for author_id, count in loads[heaviest].items()
+            if count < gap
+        ]
+        if not candidates:
+            break
+        author_id, count = min(
+            candidates, key=lambda item: abs(gap - 2 * item[1])
+        )
+        del loads[heaviest][author_id]
+        loads[lightest][author_id] = count
+        totals[heaviest] -= count
+        totals[lightest] += count
+        moves.append((author_id, heaviest, lightest))
+    if not dry_run:
+        for author_id, _, target in moves:
+            move_author(author_id, target)
+    return moves
+
+
+class ShardRouter:
+    """Направляет посты и комментарии на шард их автора."""
+
+    def _shard(self, model, instance):
+        if instance is None:
+            return None
+        if isinstance(instance, SHARDED):
+            if model in SHARDED:
+                # Новой записи база могла достаться от пользователя,
+                # присвоенного первым, поэтому она выбирается заново.
+                if not instance._state.adding:
+                    return instance._state.db
+                if isinstance(instance, Post):
+                    return shard_for(instance.author_id)
+                if Comment.post.is_cached(instance):
+                    return instance.post._state.db
+                post = get_post(instance.post_id)
+                return post._state.db if post is not None else None
+            # Пользователи и группы поста всегда читаются из default.
+            return 'default'
+        if model is Post and isinstance(instance, User):
+            return shard_for(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints.get('instance'))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if isinstance(obj1, SHARDED) or isinstance(obj2, SHARDED):
+            return True
+        return None
@@ -0,0 +1,184 @@
+"""Побочные эффекты записей в posts.
+
+Всё, что не нужно для ответа на запрос, ставится в очередь фоновых
+задач: постановка — это одна вставка в той же транзакции. Синхронно
+обновляются только счётчики групп и их поколения, от которых зависят
+чтения сразу после записи.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+
+from . import bulk, richtext, sharding, stats, tasks
+from .cache import bump_group_generation, post_moved
+from .delta import post_feeds, touch_feeds
+from .graph import graph
+from .live import publish_post
+from .tags import index_post
+from .models import Comment, Follow, Group, Post, PostTrend
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    """Пересчитывает рекомендации читателя после изменения подписок."""
+    if kwargs.get('raw'):
+        return
+    enqueue(tasks.build_user_suggestions, user_id=instance.user_id)
+
+
+def _graph_on_commit(change, user_id, author_id):
+    # Граф меняется только после коммита: откат его не трогает.
+    def apply():
+        change(user_id, author_id)
+        graph.published()
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if kwargs.get('raw') or not created:
+        return
+    _graph_on_commit(graph.add, instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    _graph_on_commit(graph.remove, instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    """Новый читатель поднимает в рейтинге последний пост автора."""
+    if kwargs.get('raw') or not created:
+        return
+    enqueue(
+        tasks.bump_author_trend,
+        author_id=instance.author_id,
+        weight=settings.TRENDING_FOLLOW_WEIGHT,
+        when=time.time(),
+    )
+
+
+def _post_author(comment):
+    if Comment.post.is_cached(comment):
+        return comment.post.author_id
+    return Post.objects.using(comment._state.db).filter(
+        pk=comment.post_id
+    ).values_list('author_id', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if kwargs.get('raw') or not created:
+        return
+    stats.change(_post_author(instance), comments=1)
+    enqueue(
+        tasks.bump_post_trend,
+        post_id=instance.post_id,
+        weight=settings.TRENDING_COMMENT_WEIGHT,
+        when=instance.created.timestamp(),
+    )
+
+
+@receiver(pre_save, sender=Post)
+def post_before_save(sender, instance, **kwargs):
+    """Запоминает прежние группу, картинку и текст поста, рендерит текст."""
+    instance._previous_group_id = None
+    instance._previous_image = ''
+    instance._previous_text = None
+    if kwargs.get('raw'):
+        return
+    if instance.pk is not None:
+        previous = Post.objects.using(kwargs['using']).filter(
+            pk=instance.pk
+        ).values_list('group_id', 'image', 'text').first()
+        if previous is not None:
+            (
+                instance._previous_group_id,
+                instance._previous_image,
+                instance._previous_text,
+            ) = previous
+    richtext.refresh([instance])
+    sharding.prepare(instance, kwargs['using'])
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    author_id = _post_author(instance)
+    if author_id is not None:
+        stats.change(author_id, comments=-1)
+
+
+@receiver(pre_save, sender=Comment)
+def comment_before_save(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        richtext.refresh([instance])
+        sharding.prepare(instance, kwargs['using'])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if kwargs.get('raw'):
+        return
+    post_moved(instance._previous_group_id, instance.group_id)
+    if instance.text != instance._previous_text:
+        index_post(instance)
+    using = kwargs['using']
+    touch_feeds(*post_feeds(
+        instance.author_id, instance._previous_group_id, instance.group_id
+    ), using=using)
+    if not created:
+        PostTrend.objects.filter(post_id=instance.pk).update(
+            group=instance.group_id
+        )
+        if instance.group_id != instance._previous_group_id:
+            stats.change(instance.author_id, groups=(
+                (instance._previous_group_id, -1), (instance.group_id, 1)
+            ))
+    else:
+        stats.change(
+            instance.author_id,
+            posts=1,
+            month=stats.month_of(instance.pub_date),
+            groups=((instance.group_id, 1),),
+        )
+        transaction.on_commit(lambda: publish_post(instance), using=using)
+        if instance.group_id is not None:
+            enqueue(
+                tasks.bump_group_trend,
+                group_id=instance.group_id,
+                weight=settings.TRENDING_POST_WEIGHT,
+                when=instance.pub_date.timestamp(),
+            )
+    if instance.image and instance.image.name != instance._previous_image:
+        enqueue(
+            tasks.make_thumbnail,
+            key=f'thumbnail:{instance.image.name}',
+            post_id=instance.pk,
+        )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    post_moved(instance.group_id, None)
+    stats.change(
+        instance.author_id,
+        posts=-1,
+        month=stats.month_of(instance.pub_date),
+        groups=((instance.group_id, -1),),
+    )
+    bulk.forget_posts([instance.pk])
+    touch_feeds(
+        *post_feeds(instance.author_id, instance.group_id),
+        using=kwargs['using'],
+    )
+
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_group_generation(instance.pk)
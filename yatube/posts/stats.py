@@ -0,0 +1,166 @@
+"""Статистика активности авторов для профиля.
+
+Число постов (с архивом), посты по месяцам и по группам и число
+полученных комментариев лежат одной строкой AuthorStats на автора.
+Сигналы постов и комментариев сдвигают её на разницу в той же
+транзакции, массовые операции мимо сигналов пересчитывают строки своих
+авторов через rebuild(), а команда rebuild_author_stats — строки всех.
+
+Пересчёт — агрегаты GROUP BY по (автор, месяц) и (автор, группа) на
+каждом шарде и в архиве; суммы складываются в Python, потому что посты
+одного автора бывают и в горячей таблице, и в архиве.
+"""
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import sharding
+from .models import (
+    ArchivedComment, ArchivedPost, AuthorStats, Comment, Post, User
+)
+
+MONTH_FORMAT = '%Y-%m'
+
+
+def month_of(moment):
+    return timezone.localtime(moment).strftime(MONTH_FORMAT)
+
+
+def get_stats(author_id):
+    """Строка статистики автора или None, если её ещё нет."""
+    return AuthorStats.objects.filter(author_id=author_id).first()
+
+
+def change(author_id, posts=0, comments=0, month=None, groups=()):
+    """Сдвигает статистику автора на posts постов за month в groups
+    и на comments полученных комментариев.
+
+    groups — пары (id группы, сдвиг). Если строки нет, она собирается
+    пересчётом: её нельзя начинать с нуля, у автора могут быть посты из
+    времени до статистики.
+    """
+    if not posts and not groups:
+        # Только счётчик комментариев — один UPDATE без чтения строки.
+        rows = AuthorStats.objects.filter(author_id=author_id)
+        if comments < 0:
+            rows = rows.filter(comments_received__gte=-comments)
+        if not rows.update(
+            comments_received=F('comments_received') + comments
+        ):
+            rebuild([author_id])
+        return
+    with transaction.atomic():
+        stats = AuthorStats.objects.select_for_update().filter(
+            author_id=author_id
+        ).first()
+        if stats is None:
+            rebuild([author_id])
+            return
+        stats.post_count = max(stats.post_count + posts, 0)
+        stats.comments_received = max(stats.comments_received + comments, 0)
+        months = Counter(json.loads(stats.months))
+        if month is not None and posts:
+            months[month] += posts
+        counts = Counter(json.loads(stats.groups))
+        for group_id, delta in groups:
+            if group_id is not None:
+                counts[str(group_id)] += delta
+        stats.months = _dump(months)
+        stats.groups = _dump(counts)
+        stats.save()
+
+
+def _dump(counter):
+    return json.dumps(
+        {key: value for key, value in sorted(counter.items()) if value > 0}
+    )
+
+
+def _grouped(queryset, author, *fields):
+    rows = queryset.order_by().values(author, *fields).annotate(
+        total=Count('pk')
+    ).values_list(author, *fields, 'total')
+    return rows.iterator()
+
+
+def _collect(author_ids):
+    """{автор: [постов, комментариев, Counter месяцев, Counter групп]}."""
+    collected = defaultdict(lambda: [0, 0, Counter(), Counter()])
+    shards = sharding.get_shards()
+    posts = [Post.objects.using(alias) for alias in shards]
+    posts.append(ArchivedPost.objects.all())
+    comments = [Comment.objects.using(alias) for alias in shards]
+    comments.append(ArchivedComment.objects.all())
+    for queryset in posts:
+        queryset = queryset.filter(author_id__in=author_ids)
+        monthly = queryset.annotate(month=TruncMonth('pub_date'))
+        for author_id, month, total in _grouped(
+            monthly, 'author_id', 'month'
+        ):
+            collected[author_id][0] += total
+            collected[author_id][2][month_of(month)] += total
+        for author_id, group_id, total in _grouped(
+            queryset, 'author_id', 'group_id'
+        ):
+            if group_id is not None:
+                collected[author_id][3][str(group_id)] += total
+    for queryset in comments:
+        queryset = queryset.filter(post__author_id__in=author_ids)
+        for author_id, total in _grouped(queryset, 'post__author_id'):
+            collected[author_id][1] += total
+    return collected
+
+
+def rebuild(author_ids):
+    """Пересчитывает строки статистики авторов author_ids."""
+    author_ids = list(author_ids)
+    collected = _collect(author_ids)
+    with transaction.atomic():
+        AuthorStats.objects.filter(author_id__in=author_ids).delete()
+        AuthorStats.objects.bulk_create(
+            AuthorStats(
+                author_id=author_id,
+                post_count=posts,
+                comments_received=comments,
+                months=_dump(months),
+                groups=_dump(groups),
+            )
+            for author_id, (posts, comments, months, groups)
+            in collected.items()
+        )
+    return len(collected)
+
+
+def rebuild_all(chunk_size=None):
+    """Пересчёт для всех авторов порциями; отдаёт число строк."""
+    users = User.objects.order_by('pk').values_list('pk', flat=True)
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    last = 0
+    rebuilt = 0
+    while True:
+        ids = list(users.filter(pk__gt=last)[:chunk_size])
+        if not ids:
+            return rebuilt
+        last = ids[-1]
+        rebuilt += rebuild(ids)
+
+
+def profile_stats(stats, months=None, groups=None):
+    """Последние месяцы и самые активные группы для шаблона профиля.
+
+    Отдаёт (список (месяц, постов) от новых к старым, список
+    (id группы, постов) по убыванию).
+    """
+    months = months or settings.PROFILE_STATS_MONTHS
+    groups = groups or settings.PROFILE_STATS_GROUPS
+    by_month = sorted(json.loads(stats.months).items(), reverse=True)
+    by_group = Counter({
+        int(group_id): total
+        for group_id, total in json.loads(stats.groups).items()
+    })
+    return by_month[:months], by_group.most_common(groups)
@@ -0,0 +1,96 @@
+"""Индекс хештегов и упоминаний постов.
+
+При сохранении поста с новым текстом его теги и упоминания
+переписываются в PostTag и Mention на шарде поста вместе с копией даты
+публикации. Ленты тега и упоминаний читают посты через эти таблицы по
+индексам (tag, -pub_date, -post) и (user, -pub_date, -post): один проход
+по диапазону индекса на шард, без LIKE по тексту и без сортировки.
+
+Архивные посты в индексе не участвуют: их связи удаляются вместе с
+горячей строкой.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+
+from .models import Mention, Post, PostTag, Tag
+from .richtext import hashtags, mentions
+from .sharding import get_shards, replicate, sharded
+
+User = get_user_model()
+
+
+def get_tags(names):
+    """Теги с именами names, недостающие создаются; отдаёт список."""
+    if not names:
+        return []
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True
+    )
+    return list(Tag.objects.filter(name__in=names))
+
+
+def index_post(post):
+    """Переписывает теги и упоминания поста на его шарде."""
+    using = post._state.db
+    tags = get_tags(hashtags(post.text))
+    users = list(
+        User.objects.filter(username__in=mentions(post.text))
+        .exclude(pk=post.author_id)
+    )
+    if using != 'default':
+        replicate(using, *tags, *users)
+    PostTag.objects.using(using).filter(post=post).delete()
+    Mention.objects.using(using).filter(post=post).delete()
+    PostTag.objects.using(using).bulk_create(
+        PostTag(post=post, tag=tag, pub_date=post.pub_date) for tag in tags
+    )
+    Mention.objects.using(using).bulk_create(
+        Mention(post=post, user=user, pub_date=post.pub_date)
+        for user in users
+    )
+
+
+def _feed(model, relation, **lookup):
+    """Посты по таблице связей model и их число.
+
+    Сортировка по столбцам самой связи: id поста берётся из неё через
+    аннотацию, иначе Django 2.2 присоединил бы пост второй раз ради его
+    ordering.
+    """
+    count = sum(
+        model.objects.using(alias).filter(**lookup).count()
+        for alias in get_shards()
+    )
+    posts = Post.objects.filter(**{
+        f'{relation}__{name}': value for name, value in lookup.items()
+    }).annotate(link_post=F(f'{relation}__post_id'))
+    ordering = (f'-{relation}__pub_date', '-link_post')
+    return sharded(posts, ordering), count
+
+
+def tagged(tag):
+    """Лента тега и число постов в ней."""
+    return _feed(PostTag, 'tag_links', tag=tag)
+
+
+def mentioning(user):
+    """Посты, где упомянут user, и их число."""
+    return _feed(Mention, 'mentions', user=user)
+
+
+def complete(prefix, limit=None):
+    """Имена тегов, начинающиеся с prefix, по алфавиту.
+
+    Диапазон [prefix, prefix + U+10FFFF) читается по уникальному индексу
+    имени; LIKE с экранированием в SQLite этот индекс не использует.
+    """
+    prefix = prefix.lstrip('#').lower()
+    if not prefix:
+        return []
+    return list(
+        Tag.objects.filter(
+            name__gte=prefix, name__lt=prefix + '\U0010ffff'
+        ).values_list('name', flat=True)
+        [:limit or settings.TAG_AUTOCOMPLETE_COUNT]
+    )
@@ -0,0 +1,77 @@
+from jobs.queue import enqueue, task
+
+from . import archive, bulk, trending
+from .models import Group, Post
+from .sharding import get_post, shard_for
+from .recommendations import build_suggestions
+
+THUMBNAIL_GEOMETRY = '960x339'
+
+
+@task
+def build_user_suggestions(user_id):
+    build_suggestions([user_id])
+
+
+@task
+def bump_post_trend(post_id, weight, when):
+    post = get_post(post_id)
+    if post is not None:
+        trending.bump_post(post, weight, when)
+
+
+@task
+def bump_author_trend(author_id, weight, when):
+    """Поднимает в рейтинге последний пост автора."""
+    post = Post.objects.using(shard_for(author_id)).filter(
+        author_id=author_id
+    ).first()
+    if post is not None:
+        trending.bump_post(post, weight, when)
+
+
+@task
+def bump_group_trend(group_id, weight, when):
+    if Group.objects.filter(pk=group_id).exists():
+        trending.bump_group(group_id, weight, when)
+
+
+@task
+def make_thumbnail(post_id):
+    """Заранее готовит миниатюру картинки поста для лент."""
+    # sorl и PIL нужны только здесь: не тянем их при импорте задач в
+    # каждом процессе.
+    from sorl.thumbnail import get_thumbnail
+
+    post = get_post(post_id)
+    if post is not None and post.image:
+        get_thumbnail(
+            post.image, THUMBNAIL_GEOMETRY, crop='center', upscale=True
+        )
+
+
+@task
+def bulk_delete_posts(ids):
+    bulk.delete_posts(ids)
+
+
+@task
+def bulk_move_posts(ids, group_id):
+    bulk.move_posts(ids, group_id)
+
+
+@task
+def bulk_delete_comments(ids):
+    bulk.delete_comments(ids)
+
+
+@task
+def bulk_purge_follows(ids):
+    for user_id in ids:
+        for reader_id in bulk.purge_follows(user_id):
+            enqueue(build_user_suggestions, user_id=reader_id)
+
+
+@task
+def archive_old_posts():
+    archive.archive_old_posts()
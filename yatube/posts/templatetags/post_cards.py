@@ -0,0 +1,17 @@
+from django import template
+
+from posts.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, group=None, groups=()):
+    """Карточки постов страницы из кеша: {% post_cards page_obj as cards %}.
+
+    Тег, а не переменная контекста: внутри {% cache %} он не
+    выполняется, если фрагмент страницы уже закеширован. group и groups —
+    уже прочитанные группы, их карточки не запрашивают повторно.
+    """
+    known = [*groups, group] if group is not None else groups
+    return render_cards(list(posts), *known)
@@ -0,0 +1,59 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from core.paginator import EstimatedCountPaginator
+from posts.models import Group, Post, User
+from posts.search import search
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.admin, text='Мороз и солнце', group=cls.group
+        )
+        Post.objects.create(author=cls.admin, text='День чудесный')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_search_uses_index(self):
+        """Поиск находит посты по началу слов в любом регистре."""
+        found = search(Post.objects.all(), 'мор СОЛН')
+        self.assertEqual(list(found), [self.post])
+        self.post.text = 'Зимнее утро'
+        self.post.save()
+        self.assertFalse(search(Post.objects.all(), 'мороз').exists())
+        self.assertTrue(search(Post.objects.all(), 'зимнее').exists())
+
+    def test_search_ignores_operators(self):
+        """Кавычки и операторы FTS в запросе не ломают поиск."""
+        self.assertFalse(search(Post.objects.all(), '"NEAR( OR').exists())
+
+    def test_changelist(self):
+        """Список постов открывается и ищет без выпадающих списков."""
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'солнце'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post]
+        )
+        self.assertContains(response, 'admin-autocomplete')
+
+    def test_estimated_count(self):
+        """Сверх exact_limit число записей оценивается без COUNT(*)."""
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        paginator.exact_limit = 1
+        self.assertGreaterEqual(paginator.count, 2)
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.count, 2)
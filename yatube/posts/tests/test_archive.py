@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import author_posts
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Group, Post, User
+)
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.old = [
+            Post.objects.create(
+                author=self.user, text=f'Старый пост {number}',
+                group=self.group,
+            )
+            for number in range(3)
+        ]
+        self.fresh = Post.objects.create(author=self.user, text='Свежий')
+        Comment.objects.create(
+            post=self.old[0], author=self.user, text='Старый комментарий'
+        )
+        for age, post in enumerate(self.old):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=400 - age)
+            )
+        call_command('archive_posts', chunk_size=2, stdout=None)
+
+    def test_old_posts_moved(self):
+        """Старые посты и их комментарии уходят из горячей таблицы."""
+        self.assertEqual(list(Post.objects.all()), [self.fresh])
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+        self.assertEqual(
+            ArchivedComment.objects.get().post_id, self.old[0].pk
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается по старому адресу."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.old[0].pk})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['count'], 4)
+        self.assertEqual(len(response.context['comments']), 1)
+
+    def test_profile_includes_archive(self):
+        """Профиль показывает живые посты, а за ними архивные."""
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count, 4)
+        self.assertEqual(
+            [post.pk for post in page],
+            [self.fresh.pk] + [post.pk for post in reversed(self.old)],
+        )
+
+    def test_newest_post_archived(self):
+        """Самый новый пост автора тоже уходит в архив, если он старый."""
+        Post.objects.update(pub_date=timezone.now() - timedelta(days=400))
+        call_command('archive_posts', stdout=None)
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(ArchivedPost.objects.filter(pk=self.fresh.pk).exists())
+        # AUTOINCREMENT: id архивных постов новым не достаются.
+        post = Post.objects.create(author=self.user, text='Новый')
+        self.assertGreater(post.pk, self.fresh.pk)
+
+    def test_profile_counts_live_posts_lazily(self):
+        """Страница профиля из одних живых постов не считает их COUNT."""
+        posts = author_posts(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(list(posts[0:1]), [self.fresh])
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            [post.pk for post in posts[1:3]],
+            [post.pk for post in reversed(self.old[1:])],
+        )
+        self.assertEqual(
+            [post.pk for post in author_posts(self.user)[2:4]],
+            [self.old[1].pk, self.old[0].pk],
+        )
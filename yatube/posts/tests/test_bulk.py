@@ -0,0 +1,122 @@
+from django.contrib.admin import helpers
+from django.test import TestCase
+from django.urls import reverse
+
+from jobs.models import Job
+from jobs.queue import run_pending
+from posts.models import Comment, Follow, Group, Post, PostTrend, User
+
+
+class BulkActionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Первая группа', slug='first', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Вторая группа', slug='second', description='Описание'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.spam = [
+            Post.objects.create(
+                author=self.spammer, text=f'Спам {number}', group=self.group
+            )
+            for number in range(3)
+        ]
+        self.post = Post.objects.create(
+            author=self.reader, text='Пост читателя', group=self.group
+        )
+        Comment.objects.create(
+            post=self.post, author=self.spammer, text='Спам в комментарии'
+        )
+        Comment.objects.create(
+            post=self.spam[0], author=self.reader, text='Ответ на спам'
+        )
+        PostTrend.objects.create(
+            post_id=self.spam[0].pk, group=self.group, score=1
+        )
+        Follow.objects.create(user=self.reader, author=self.spammer)
+        run_pending()
+
+    def action(self, action, posts, **data):
+        return self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': action,
+                helpers.ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+                'confirm': 'yes',
+                **data,
+            },
+        )
+
+    def test_confirmation_required(self):
+        """Без подтверждения операция не запускается."""
+        response = self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'delete_in_background',
+                helpers.ACTION_CHECKBOX_NAME: [self.spam[0].pk],
+            },
+        )
+        self.assertTemplateUsed(
+            response, 'admin/posts/post/bulk_confirm.html'
+        )
+        run_pending()
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_delete_posts(self):
+        """Удаление идёт пачками и каскадом, счётчик группы верный."""
+        with self.settings(BULK_CHUNK_SIZE=2):
+            self.action('delete_in_background', self.spam)
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assertFalse(Comment.objects.filter(post__isnull=True).exists())
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertFalse(
+            PostTrend.objects.filter(
+                post_id__in=[post.pk for post in self.spam]
+            ).exists()
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 1)
+
+    def test_move_posts(self):
+        """Перенос обновляет счётчики обеих групп."""
+        self.action(
+            'move_to_group', self.spam[:2], group=self.other_group.pk
+        )
+        run_pending()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 2)
+        self.assertEqual(self.other_group.post_count, 2)
+        self.assertEqual(
+            PostTrend.objects.get(post_id=self.spam[0].pk).group,
+            self.other_group,
+        )
+
+    def test_purge_authors(self):
+        """Спамер теряет посты, комментарии, подписки и вход."""
+        self.action('purge_authors', self.spam[:1])
+        key = Job.objects.get(
+            idempotency_key__contains='bulk_purge_follows'
+        ).idempotency_key
+        operation = key.split(':')[1]
+        run_pending()
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.spammer.refresh_from_db()
+        self.assertFalse(self.spammer.is_active)
+        progress = self.client.get(
+            reverse('admin:posts_post_bulk_progress', args=[operation])
+        ).json()
+        self.assertEqual(progress, {'done': 3, 'total': 3})
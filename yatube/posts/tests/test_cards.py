@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.cards import card_key, render_cards
+from posts.models import Group, Post, User
+
+
+class CardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Текст поста'
+        )
+
+    def test_card_shared_between_feeds(self):
+        """Карточка, отрендеренная на главной, берётся из кеша в группе."""
+        self.client.get(reverse('posts:index'))
+        key = card_key(self.post)
+        self.assertIn('Текст поста', cache.get(key))
+        cache.set(key, 'из кеша')
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'group'})
+        )
+        self.assertContains(response, 'из кеша')
+
+    def test_bulk_update_changes_key(self):
+        """Правка мимо save() даёт новый ключ карточки."""
+        old = card_key(self.post)
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertNotEqual(card_key(post), old)
+        self.assertIn('Новый текст', render_cards([post])[0])
+
+    def test_group_rename_changes_key(self):
+        """Переименование группы меняет карточки её постов."""
+        old = card_key(self.post)
+        self.group.title = 'Другая группа'
+        self.assertNotEqual(card_key(self.post), old)
+
+    def test_cached_fragment_skips_page_posts(self):
+        """При закешированном фрагменте посты страницы не читаются."""
+        index = reverse('posts:index')
+        group = reverse('posts:group_list', kwargs={'slug': 'group'})
+        self.client.get(index)
+        self.client.get(group)
+        # Остаётся только COUNT для пагинатора главной.
+        with self.assertNumQueries(1):
+            self.client.get(index)
+        with self.assertNumQueries(0):
+            self.client.get(group)
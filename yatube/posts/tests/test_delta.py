@@ -0,0 +1,78 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.delta import cursor_of, encode_cursor
+from posts.graph import graph
+from posts.models import Follow, Group, Post, User
+
+
+class DeltaTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        # Подписка из setUpClass не коммитится: граф читается из базы.
+        graph.clear()
+        self.client.force_login(self.reader)
+        self.seen = Post.objects.create(
+            author=self.author, text='Старый пост', group=self.group
+        )
+        self.cursor = encode_cursor(cursor_of(self.seen))
+
+    def delta(self, name, **kwargs):
+        return self.client.get(
+            reverse(f'posts:{name}', kwargs=kwargs), {'cursor': self.cursor}
+        )
+
+    def test_not_modified_without_queries(self):
+        """Без новых постов ответ 304 отдаётся по маркеру из кеша."""
+        self.assertEqual(self.delta('index_delta').status_code, 304)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse('posts:index_delta'), {'cursor': self.cursor}
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_posts_returned(self):
+        """В ответе только посты новее курсора, от старых к новым."""
+        first = Post.objects.create(author=self.author, text='Первый')
+        second = Post.objects.create(
+            author=self.author, text='Второй', group=self.group
+        )
+        response = self.delta('index_delta')
+        self.assertEqual(
+            [post['id'] for post in response.json()['posts']],
+            [first.pk, second.pk],
+        )
+        self.assertEqual(
+            response.json()['cursor'], encode_cursor(cursor_of(second))
+        )
+        response = self.delta('group_delta', slug=self.group.slug)
+        self.assertEqual(
+            [post['id'] for post in response.json()['posts']], [second.pk]
+        )
+        response = self.delta('follow_delta')
+        self.assertEqual(len(response.json()['posts']), 2)
+
+    @override_settings(DELTA_MAX_POSTS=1)
+    def test_capped(self):
+        """Число постов в ответе ограничено."""
+        for number in range(2):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        data = self.delta('index_delta').json()
+        self.assertEqual(len(data['posts']), 1)
+        self.assertTrue(data['more'])
+
+    def test_bad_cursor(self):
+        """Неверный курсор — ошибка 400."""
+        self.cursor = 'вчера'
+        self.assertEqual(self.delta('index_delta').status_code, 400)
@@ -0,0 +1,122 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts.graph import graph, preload
+from posts.models import Follow, User
+
+
+class FollowGraphTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(4)
+        ]
+        first, second, third, fourth = self.users
+        for user, author in (
+            (first, second), (first, third), (second, first),
+            (second, third), (fourth, first),
+        ):
+            Follow.objects.create(user=user, author=author)
+        graph.load()
+
+    def test_queries(self):
+        """Подписки, счётчики и пересечения отвечаются без базы."""
+        first, second, third, fourth = (user.pk for user in self.users)
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.is_following(first, second))
+            self.assertFalse(graph.is_following(third, first))
+            self.assertEqual(graph.follower_count(first), 2)
+            self.assertEqual(graph.following_count(third), 0)
+            self.assertEqual(list(graph.mutual(first)), [second])
+            self.assertEqual(
+                list(graph.common_following(first, second)), [third]
+            )
+            self.assertEqual(
+                list(graph.common_followers(first, third)), [second]
+            )
+
+    def test_reload_after_max_age(self):
+        """Граф перечитывается по возрасту, даже если поколение то же."""
+        first, second = self.users[:2]
+        Follow.objects.filter(user=first, author=second).delete()
+        self.assertTrue(graph.is_following(first.pk, second.pk))
+        later = time.monotonic() + settings.FOLLOW_GRAPH_MAX_AGE
+        with mock.patch('posts.graph.time.monotonic', return_value=later):
+            self.assertFalse(graph.is_following(first.pk, second.pk))
+
+    def test_reload_after_foreign_change(self):
+        """Изменение поколения другим процессом перечитывает граф."""
+        first, second = self.users[:2]
+        Follow.objects.filter(user=first, author=second).update(
+            author=self.users[3]
+        )
+        graph.changed()
+        self.assertFalse(graph.is_following(first.pk, second.pk))
+        self.assertTrue(graph.is_following(first.pk, self.users[3].pk))
+
+    def test_profile_uses_graph(self):
+        """Профиль показывает подписку и счётчики из графа."""
+        self.client.force_login(self.users[0])
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'user1'})
+        )
+        self.assertTrue(response.context['following'])
+        self.assertContains(response, 'Подписчиков: 1, подписок: 2')
+
+    def test_preload_without_tables(self):
+        """До migrate preload() не падает, граф грузится лениво."""
+        graph.clear()
+        with mock.patch(
+            'posts.graph.Follow.objects.order_by',
+            side_effect=OperationalError('no such table: posts_follow'),
+        ):
+            preload()
+        self.assertIsNone(graph.generation)
+        self.assertTrue(graph.is_following(*(u.pk for u in self.users[:2])))
+
+    def test_check_command(self):
+        """Команда сверки печатает размер графа и находит расхождения."""
+        out = StringIO()
+        call_command('check_follow_graph', stdout=out)
+        self.assertIn('подписок: 5', out.getvalue())
+        self.assertIn('Граф совпадает с Follow', out.getvalue())
+
+
+class FollowGraphCommitTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader, self.author, self.other = (
+            User.objects.create_user(username=f'user{number}')
+            for number in range(3)
+        )
+        Follow.objects.create(user=self.reader, author=self.other)
+        graph.load()
+
+    def test_signals_keep_graph_current(self):
+        """Создание и удаление подписок видны в графе после коммита."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.filter(user=self.reader, author=self.other).delete()
+        self.assertTrue(graph.is_following(self.reader.pk, self.author.pk))
+        self.assertFalse(graph.is_following(self.reader.pk, self.other.pk))
+        self.assertEqual(graph.check(), (set(), set()))
+
+    def test_rollback_leaves_graph_unchanged(self):
+        """Откаченные подписка и отписка в граф не попадают."""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
+            Follow.objects.filter(
+                user=self.reader, author=self.other
+            ).delete()
+            raise RuntimeError
+        self.assertFalse(graph.is_following(self.reader.pk, self.author.pk))
+        self.assertTrue(graph.is_following(self.reader.pk, self.other.pk))
+        self.assertEqual(graph.check(), (set(), set()))
@@ -0,0 +1,115 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.cache import LRUCache
+from posts.cache import get_group, group_generation
+from posts.models import Group, Post, User
+
+
+class LRUCacheTest(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        """Вытесняется запись, к которой дольше всего не обращались."""
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(len(lru), 2)
+
+    def test_timeout(self):
+        """Устаревшие записи не возвращаются."""
+        lru = LRUCache(maxsize=2, timeout=10)
+        lru.set('a', 1)
+        with mock.patch('core.cache.time.monotonic',
+                        return_value=time.monotonic() + 11):
+            self.assertIsNone(lru.get('a'))
+
+
+class GroupCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_group_served_from_lru(self):
+        """Повторный поиск группы по слагу не ходит в базу."""
+        get_group(self.group.slug)
+        with self.assertNumQueries(0):
+            group, _ = get_group(self.group.slug)
+        self.assertEqual(group, self.group)
+
+    def test_group_change_invalidates_lru(self):
+        """Изменение группы сбрасывает её запись в LRU."""
+        get_group(self.group.slug)
+        self.group.title = 'Новое название'
+        self.group.save()
+        group, _ = get_group(self.group.slug)
+        self.assertEqual(group.title, 'Новое название')
+
+    def test_post_count(self):
+        """Счётчик постов группы следует за созданием, переносом и
+        удалением постов.
+        """
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 1)
+        post = Post.objects.create(
+            author=self.user, text='Ещё пост', group=self.group
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 2)
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 1)
+        self.assertEqual(self.other_group.post_count, 1)
+        post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.other_group.post_count, 0)
+
+    def test_new_post_refreshes_group_page(self):
+        """Отрендеренная страница группы обновляется после нового поста."""
+        url = reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        generation = group_generation(self.group.pk)
+        self.client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        self.assertNotContains(self.client.get(url), 'Без сигналов')
+        Post.objects.create(
+            author=self.user, text='Свежий пост', group=self.group
+        )
+        self.assertNotEqual(group_generation(self.group.pk), generation)
+        response = self.client.get(url)
+        self.assertContains(response, 'Свежий пост')
+        self.assertContains(response, 'Без сигналов')
+
+    def test_group_index(self):
+        """Каталог групп показывает готовые счётчики без COUNT по постам."""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('posts:group_index'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.other_group, self.group]
+        )
+        self.assertContains(response, 'Постов: 1')
@@ -0,0 +1,60 @@
+from django.template import Context, Template
+from django.test import SimpleTestCase
+from django.urls import NoReverseMatch, reverse, set_script_prefix
+
+from posts import links
+from posts.models import Group, Post
+
+ARGUMENTS = {
+    'slug': 'group-1',
+    'name': 'тег',
+    'username': 'user.name+1@ex',
+    'post_id': 42,
+}
+
+
+class LinksTest(SimpleTestCase):
+    def test_same_as_reverse(self):
+        """Для каждого имени posts путь совпадает с reverse()."""
+        formats = links.precompile()
+        self.assertIn('post_detail', formats)
+        for name, (_, params, _) in formats.items():
+            kwargs = {param: ARGUMENTS[param] for param in params}
+            with self.subTest(name=name):
+                self.assertEqual(
+                    links.url(name, **kwargs),
+                    reverse(f'posts:{name}', kwargs=kwargs),
+                )
+                self.assertEqual(
+                    links.url(name, *kwargs.values()),
+                    reverse(f'posts:{name}', args=list(kwargs.values())),
+                )
+
+    def test_script_prefix(self):
+        """Префикс скрипта берётся на момент вызова."""
+        set_script_prefix('/yatube/')
+        self.addCleanup(set_script_prefix, '/')
+        self.assertEqual(links.url('post_detail', 1), '/yatube/posts/1/')
+
+    def test_errors_as_reverse(self):
+        """Неизвестное имя и неполные аргументы — как у reverse()."""
+        with self.assertRaises(NoReverseMatch):
+            links.url('missing')
+        with self.assertRaises(NoReverseMatch):
+            links.url('profile')
+        with self.assertRaises(NoReverseMatch):
+            links.url('post_detail', 1, 2)
+
+    def test_models_and_tag(self):
+        """get_absolute_url моделей и тег fast_url."""
+        post = Post(pk=5)
+        group = Group(slug='cats')
+        self.assertEqual(post.get_absolute_url(), '/posts/5/')
+        self.assertEqual(group.get_absolute_url(), '/group/cats/')
+        rendered = Template(
+            "{% load post_links %}{% fast_url 'posts:profile' 'ann' %} "
+            "{% fast_url 'about:author' %}"
+        ).render(Context())
+        self.assertEqual(
+            rendered, f"/profile/ann/ {reverse('about:author')}"
+        )
@@ -0,0 +1,176 @@
+import asyncio
+import json
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.live import get_broker, make_filter, poll, stream
+from posts.models import Group, Post, User
+
+
+class LiveStreamTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def event(self, group=None, author_id=None):
+        return {
+            'id': 1,
+            'author_id': author_id or self.user.pk,
+            'author': 'author',
+            'group': group,
+            'text': 'Текст',
+            'pub_date': '',
+            'url': '/posts/1/',
+        }
+
+    def test_filter(self):
+        """Фильтр пропускает только события своей ленты."""
+        by_group = make_filter(group='test-slug')
+        self.assertTrue(by_group(self.event(group='test-slug')))
+        self.assertFalse(by_group(self.event()))
+        by_authors = make_filter(authors={self.user.pk})
+        self.assertTrue(by_authors(self.event()))
+        self.assertFalse(by_authors(self.event(author_id=self.user.pk + 1)))
+
+    def test_stream_sends_events(self):
+        """Поток SSE отдаёт подходящие события и отписывается в конце."""
+        broker = get_broker()
+        sent = []
+        disconnect = []
+
+        async def receive():
+            disconnect.append(asyncio.Event())
+            await disconnect[0].wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == 1:
+                broker.publish(self.event())
+                broker.publish(self.event(group='test-slug'))
+            else:
+                disconnect[0].set()
+
+        scope = {
+            'type': 'http',
+            'path': '/live/stream/',
+            'query_string': b'group=test-slug',
+            'headers': [],
+        }
+        subscribers = len(broker)
+        asyncio.run(asyncio.wait_for(stream(scope, receive, send), 5))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(len(sent), 2)
+        body = sent[1]['body'].decode()
+        self.assertTrue(body.startswith('event: post\n'))
+        data = json.loads(body.split('data: ', 1)[1])
+        self.assertEqual(data['group'], 'test-slug')
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(len(broker), subscribers)
+
+    def test_follow_stream_requires_login(self):
+        """Поток подписок без сессии отвечает 403."""
+        sent = []
+
+        async def receive():
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http',
+            'path': '/live/stream/',
+            'query_string': b'feed=follow',
+            'headers': [],
+        }
+        asyncio.run(stream(scope, receive, send))
+        self.assertEqual(sent[0]['status'], 403)
+
+    def run_polls(self, count, publish=None):
+        """Запускает count long-poll в одном цикле; отдаёт их ответы."""
+        responses = [[] for _ in range(count)]
+        scope = {
+            'type': 'http',
+            'path': '/live/poll/',
+            'query_string': b'',
+            'headers': [],
+        }
+
+        async def receive():
+            # Сначала тело запроса, потом клиент просто ждёт ответа.
+            if receive.started:
+                await asyncio.Event().wait()
+            receive.started = True
+            return {'type': 'http.request', 'body': b''}
+
+        async def main():
+            polls = []
+            for sent in responses:
+                receive.started = False
+
+                async def send(message, sent=sent):
+                    sent.append(message)
+
+                polls.append(poll(scope, receive, send))
+            if publish is not None:
+                asyncio.get_event_loop().call_later(0.05, publish)
+            await asyncio.gather(*polls)
+
+        asyncio.run(asyncio.wait_for(main(), 5))
+        return [
+            (sent[0]['status'], json.loads(sent[1]['body']))
+            for sent in responses
+        ]
+
+    @override_settings(LIVE_POLL_TIMEOUT=2)
+    def test_asgi_poll_receives_event(self):
+        """ASGI long-poll отдаёт событие, пришедшее во время ожидания."""
+        broker = get_broker()
+        subscribers = len(broker)
+        [(status, data)] = self.run_polls(
+            1, lambda: broker.publish(self.event())
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['posts'][0]['author'], 'author')
+        self.assertEqual(len(broker), subscribers)
+
+    @override_settings(LIVE_POLL_TIMEOUT=0.2, ASGI_THREADS=1)
+    def test_asgi_polls_do_not_take_threads(self):
+        """Ожидающие long-poll — корутины: десятки ждут одновременно."""
+        responses = self.run_polls(50)
+        self.assertEqual(
+            responses, [(200, {'count': 0, 'posts': []})] * 50
+        )
+
+    @override_settings(LIVE_POLL_TIMEOUT=0.01)
+    def test_poll_timeout(self):
+        """Long-poll без новых постов возвращает пустой ответ."""
+        response = self.client.get(reverse('posts:live_poll'))
+        self.assertEqual(response.json(), {'count': 0, 'posts': []})
+
+
+class PublishPostTest(TransactionTestCase):
+    def test_created_post_published(self):
+        """Новый пост публикуется в брокер после коммита."""
+        user = User.objects.create_user(username='author')
+        received = []
+        broker = get_broker()
+        broker.subscribe(received.append)
+        try:
+            post = Post.objects.create(author=user, text='Живой пост')
+            post.text = 'Исправленный пост'
+            post.save()
+        finally:
+            broker.unsubscribe(received.append)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]['id'], post.pk)
+        self.assertEqual(received[0]['author'], 'author')
@@ -0,0 +1,68 @@
+from django.contrib.admin import helpers
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+
+class ModerationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        self.new = Comment.objects.create(
+            post=self.post, author=self.user, text='Новый'
+        )
+        self.approved = Comment.objects.create(
+            post=self.post, author=self.user, text='Одобренный',
+            status=Comment.APPROVED,
+        )
+        self.rejected = Comment.objects.create(
+            post=self.post, author=self.user, text='Отклонённый',
+            status=Comment.REJECTED,
+        )
+
+    def comments(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        return list(response.context['comments'])
+
+    def test_rejected_hidden(self):
+        """Отклонённые комментарии не показываются."""
+        self.assertEqual(self.comments(), [self.new, self.approved])
+
+    @override_settings(COMMENTS_PREMODERATION=True)
+    def test_premoderation(self):
+        """При премодерации видны только одобренные комментарии."""
+        self.assertEqual(self.comments(), [self.approved])
+
+    def test_queue_bulk_approve(self):
+        """Очередь показывает непроверенные и одобряет их пачкой."""
+        self.client.force_login(self.admin)
+        url = reverse('admin:posts_moderationqueue_changelist')
+        response = self.client.get(url)
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.new]
+        )
+        self.client.post(url, {
+            'action': 'approve',
+            helpers.ACTION_CHECKBOX_NAME: [self.new.pk],
+        })
+        self.new.refresh_from_db()
+        self.assertEqual(self.new.status, Comment.APPROVED)
+
+    def test_filter_by_author(self):
+        """Список комментариев фильтруется по автору без выпадающего списка."""
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'),
+            {'author': self.admin.pk},
+        )
+        self.assertEqual(list(response.context['cl'].result_list), [])
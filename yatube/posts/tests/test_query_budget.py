@@ -0,0 +1,127 @@
+import os
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.querybudget import Baseline, QueryBudget
+from posts import cache as group_cache, urls
+from posts.graph import graph
+from posts.models import Comment, Follow, Group, Post, User
+from users import cache as user_cache
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'query_baseline.json')
+
+# Для каждого адреса posts/urls.py: метод, аргументы адреса (post_id —
+# имя атрибута теста с постом), данные формы и нужен ли вход. Новый адрес
+# без записи здесь роняет тест.
+CASES = {
+    'index': ('get', {}, None, False),
+    'index_delta': ('get', {}, {'cursor': '0-0'}, False),
+    'group_index': ('get', {}, None, False),
+    'group_posts': ('get', {'slug': 'group'}, None, False),
+    'group_list': ('get', {'slug': 'group'}, None, False),
+    'group_delta': ('get', {'slug': 'group'}, {'cursor': '0-0'}, False),
+    'tag_posts': ('get', {'name': 'tag'}, None, False),
+    'tag_autocomplete': ('get', {}, {'q': 'ta'}, False),
+    'mentions': ('get', {}, None, True),
+    'trending': ('get', {}, None, False),
+    'group_trending': ('get', {'slug': 'group'}, None, False),
+    'profile': ('get', {'username': 'author0'}, None, False),
+    'post_detail': ('get', {'post_id': 'post'}, None, False),
+    'post_create': ('get', {}, None, True),
+    'post_edit': ('get', {'post_id': 'own'}, None, True),
+    'add_comment': (
+        'post', {'post_id': 'post'}, {'text': 'Комментарий'}, True
+    ),
+    'follow_index': ('get', {}, None, True),
+    'follow_delta': ('get', {}, {'cursor': '0-0'}, True),
+    'live_poll': ('get', {}, None, False),
+    'profile_follow': ('get', {'username': 'fresh'}, None, True),
+    'profile_unfollow': ('get', {'username': 'author0'}, None, True),
+}
+# Ленты, которые меряются ещё и повторным запросом с тёплыми кешами:
+# закешированные фрагменты страниц не должны читать посты страницы.
+WARM = ('index', 'group_posts', 'group_list', 'profile', 'follow_index')
+
+
+@override_settings(LIVE_POLL_TIMEOUT=0.01)
+class QueryBudgetTest(TestCase):
+    """Число запросов представлений не растёт с данными и не выше baseline."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.own = Post.objects.create(author=cls.reader, text='Свой пост')
+
+    def grow(self, size):
+        """Добавляет size авторов с постами, комментариями и читателями."""
+        start = User.objects.filter(username__startswith='author').count()
+        for number in range(start, start + size):
+            author = User.objects.create_user(username=f'author{number}')
+            Follow.objects.create(user=self.reader, author=author)
+            for _ in range(3):
+                post = Post.objects.create(
+                    author=author, group=self.group, text='Пост #tag @reader'
+                )
+                Comment.objects.create(
+                    post=post, author=self.reader, text='Комментарий',
+                    status=Comment.APPROVED,
+                )
+        User.objects.filter(username='fresh').delete()
+        User.objects.create_user(username='fresh')
+        self.post = Post.objects.filter(author__username='author0').first()
+
+    def measure(self):
+        client = Client()
+        client.force_login(self.reader)
+        anonymous = Client()
+        counted = {}
+        for name, (method, kwargs, data, login) in CASES.items():
+            if 'post_id' in kwargs:
+                kwargs = {'post_id': getattr(self, kwargs['post_id']).pk}
+            Follow.objects.get_or_create(
+                user=self.reader, author=User.objects.get(username='author0')
+            )
+            # Каждый адрес меряется с холодными кешами: общим и процесса.
+            cache.clear()
+            user_cache._local.clear()
+            group_cache._groups.clear()
+            graph.clear()
+            request = getattr(client if login else anonymous, method)
+            url = reverse(f'posts:{name}', kwargs=kwargs)
+            with QueryBudget() as budget:
+                response = request(url, data)
+            self.assertLess(response.status_code, 400, name)
+            counted[name] = budget.queries
+            if name in WARM:
+                with QueryBudget() as budget:
+                    request(url, data)
+                counted[f'{name}:warm'] = budget.queries
+        return counted
+
+    def test_every_url_has_case(self):
+        """У каждого адреса posts/urls.py есть запись в CASES."""
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(CASES))
+
+    def test_constant_and_within_baseline(self):
+        baseline = Baseline(BASELINE)
+        self.grow(2)
+        small = self.measure()
+        self.grow(6)
+        large = self.measure()
+        for name in large:
+            with self.subTest(name=name):
+                self.assertEqual(
+                    len(large[name]), len(small[name]),
+                    f'{name}: число запросов растёт с данными',
+                )
+                regression = baseline.check(name, large[name])
+                if regression:
+                    self.fail(regression)
+        baseline.save()
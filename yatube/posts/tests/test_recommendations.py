@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from jobs.queue import run_pending
+from posts.models import Follow, FollowSuggestion, User
+from posts.recommendations import build_suggestions
+
+
+class RecommendationsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.other_reader = User.objects.create_user(username='other')
+        cls.fof = User.objects.create_user(username='fof')
+        cls.co_followed = User.objects.create_user(username='co_followed')
+        Follow.objects.bulk_create([
+            Follow(user=cls.reader, author=cls.friend),
+            Follow(user=cls.friend, author=cls.fof),
+            Follow(user=cls.friend, author=cls.reader),
+            Follow(user=cls.other_reader, author=cls.friend),
+            Follow(user=cls.other_reader, author=cls.co_followed),
+        ])
+
+    def suggested(self, user):
+        return list(
+            FollowSuggestion.objects.filter(user=user)
+            .values_list('author__username', flat=True)
+        )
+
+    def test_friends_of_friends_first(self):
+        """Друзья друзей весят больше совместных подписок."""
+        build_suggestions([self.reader.pk])
+        self.assertEqual(self.suggested(self.reader), ['fof', 'co_followed'])
+
+    def test_self_and_followed_excluded(self):
+        """В рекомендации не попадают сам читатель и его авторы."""
+        build_suggestions([self.reader.pk])
+        suggested = self.suggested(self.reader)
+        self.assertNotIn(self.reader.username, suggested)
+        self.assertNotIn(self.friend.username, suggested)
+
+    def test_rebuild_command(self):
+        """Пакетный пересчёт заполняет рекомендации всех пользователей."""
+        call_command(
+            'build_follow_suggestions', chunk_size=2, stdout=StringIO()
+        )
+        self.assertEqual(self.suggested(self.reader), ['fof', 'co_followed'])
+        self.assertIn('fof', self.suggested(self.other_reader))
+
+    def test_follow_index_shows_suggestions(self):
+        """Рекомендации передаются в контекст ленты подписок."""
+        build_suggestions([self.reader.pk])
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:follow_index'))
+        authors = [s.author for s in response.context['suggestions']]
+        self.assertEqual(authors, [self.fof, self.co_followed])
+
+
+class RecommendationsSignalTest(TestCase):
+    def test_follow_recomputes_suggestions(self):
+        """Подписка пересчитывает рекомендации читателя."""
+        reader = User.objects.create_user(username='reader')
+        friend = User.objects.create_user(username='friend')
+        fof = User.objects.create_user(username='fof')
+        Follow.objects.create(user=friend, author=fof)
+        Follow.objects.create(user=reader, author=friend)
+        run_pending()
+        self.assertTrue(
+            FollowSuggestion.objects.filter(user=reader, author=fof).exists()
+        )
+        Follow.objects.filter(user=reader).delete()
+        run_pending()
+        self.assertFalse(
+            FollowSuggestion.objects.filter(user=reader).exists()
+        )
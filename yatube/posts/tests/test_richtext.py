@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import richtext
+from posts.models import Comment, Post, User
+
+
+class RichTextTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+
+    def test_render(self):
+        """Разметка, ссылки и упоминания; чужой HTML экранируется."""
+        html = richtext.render(
+            '**Жирный** и *курсив* `<b>`\nhttps://example.com/a?b=1.\n\n'
+            '@reader и @nobody <script>',
+            {'reader'},
+        )
+        profile = reverse('posts:profile', args=['reader'])
+        self.assertEqual(
+            html,
+            '<p><strong>Жирный</strong> и <em>курсив</em> '
+            '<code>&lt;b&gt;</code><br>'
+            '<a href="https://example.com/a?b=1" rel="nofollow noopener">'
+            'https://example.com/a?b=1</a>.</p>\n'
+            f'<p><a href="{profile}">@reader</a> и @nobody '
+            '&lt;script&gt;</p>',
+        )
+
+    def test_rendered_on_save(self):
+        """HTML сохраняется вместе с постом и комментарием."""
+        post = Post.objects.create(author=self.author, text='Привет @reader')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='**Спасибо**'
+        )
+        post.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertIn('>@reader</a>', post.text_html)
+        self.assertEqual(comment.text_html, '<p><strong>Спасибо</strong></p>')
+        self.assertEqual(post.html_key, richtext.source_key(post.text))
+
+    def test_refresh_batches_mentions(self):
+        """Устаревшие записи перерисовываются с одной проверкой имён."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(3)
+        ]
+        Post.objects.update(text='Для @reader и @author', html_key='')
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(1):
+            self.assertEqual(len(richtext.refresh(posts)), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(richtext.refresh(posts), [])
+
+    def test_rerender_command(self):
+        """Команда сохраняет HTML записей от старого рендерера."""
+        post = Post.objects.create(author=self.author, text='*Текст*')
+        Post.objects.update(text_html='', html_key='0:0')
+        call_command('rerender_posts', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p><em>Текст</em></p>')
+        self.assertEqual(post.html_key, richtext.source_key('*Текст*'))
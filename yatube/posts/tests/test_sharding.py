@@ -0,0 +1,187 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.paginator import EstimatedCountPaginator
+from notifications.digests import send_digests
+from notifications.models import Notification
+from posts import archive, bulk, sharding, trending
+from posts.delta import cursor_of, encode_cursor
+from posts.models import ArchivedPost, Comment, Follow, Post, PostTrend, User
+
+
+@override_settings(POST_SHARDS=('default', 'shard1'))
+class ShardingTest(TestCase):
+    databases = {'default', 'shard1'}
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        sharding.assign_shard(self.reader.pk, 'default')
+        sharding.assign_shard(self.author.pk, 'shard1')
+        self.posts = []
+        for number in range(4):
+            user = self.author if number % 2 else self.reader
+            self.posts.append(
+                Post.objects.create(author=user, text=f'Пост {number}')
+            )
+
+    def test_posts_routed_by_author(self):
+        """Посты лежат на шарде автора, id не повторяются."""
+        self.assertEqual(
+            list(Post.objects.using('shard1').all()),
+            [self.posts[3], self.posts[1]],
+        )
+        self.assertEqual(
+            list(Post.objects.all()), [self.posts[2], self.posts[0]]
+        )
+        self.assertEqual(len({post.pk for post in self.posts}), 4)
+
+    def test_index_merges_shards(self):
+        """Главная сливает шарды по дате."""
+        response = self.client.get(reverse('posts:index'))
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count, 4)
+        self.assertEqual(list(page), self.posts[::-1])
+
+    def test_follow_index(self):
+        """Лента подписок читает только шард автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.posts[3], self.posts[1]],
+        )
+
+    def test_post_detail_with_comments(self):
+        """Пост с шарда открывается по id, комментарии рядом с ним."""
+        post = self.posts[1]
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Комментарий'},
+        )
+        comment = Comment.objects.using('shard1').get()
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertEqual(response.context['post'], post)
+        self.assertEqual(response.context['count'], 2)
+        self.assertEqual(list(response.context['comments']), [comment])
+
+    def test_move_author(self):
+        """Перенос автора сохраняет id, даты и комментарии."""
+        post = self.posts[1]
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        self.assertEqual(sharding.move_author(self.author.pk, 'default'), 2)
+        self.assertFalse(Post.objects.using('shard1').exists())
+        moved = Post.objects.get(pk=post.pk)
+        self.assertEqual(moved.pub_date, post.pub_date)
+        self.assertEqual(moved.comments.get().text, 'Ответ')
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.posts[3], self.posts[1]],
+        )
+
+    def test_rebalance(self):
+        """Автор с перегруженного шарда переезжает на свободный."""
+        other = User.objects.create_user(username='other')
+        sharding.assign_shard(other.pk, 'shard1')
+        for number in range(4):
+            Post.objects.create(author=self.author, text=f'Ещё {number}')
+        for number in range(2):
+            Post.objects.create(author=other, text=f'Другой {number}')
+        moves = sharding.rebalance()
+        self.assertEqual(moves, [(other.pk, 'shard1', 'default')])
+        self.assertEqual(sharding.shard_for(other.pk), 'default')
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertEqual(Post.objects.using('shard1').count(), 6)
+
+    def test_tag_feed_across_shards(self):
+        """Лента тега сливает шарды, связи переезжают с автором."""
+        tagged = [
+            Post.objects.create(author=user, text='#общий тег')
+            for user in (self.reader, self.author)
+        ]
+        url = reverse('posts:tag_posts', kwargs={'name': 'общий'})
+        page = self.client.get(url).context['page_obj']
+        self.assertEqual(page.paginator.count, 2)
+        self.assertEqual(list(page), tagged[::-1])
+        sharding.move_author(self.author.pk, 'default')
+        self.assertEqual(
+            list(self.client.get(url).context['page_obj']), tagged[::-1]
+        )
+
+    def test_comment_notifies_shard_author(self):
+        """Комментарий к посту с шарда попадает в дайджест автора."""
+        User.objects.filter(pk=self.author.pk).update(
+            email='author@yatube.ru'
+        )
+        post = self.posts[1]
+        self.client.force_login(self.reader)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Комментарий'},
+        )
+        self.assertEqual(Notification.objects.get().post_id, post.pk)
+        later = timezone.now() + timedelta(hours=1)
+        self.assertEqual(send_digests(later), 1)
+        self.assertIn('к посту «Пост 1»', mail.outbox[0].body)
+
+    def test_delta_across_shards(self):
+        """Дельта главной отдаёт новые посты всех шардов по порядку."""
+        response = self.client.get(
+            reverse('posts:index_delta'),
+            {'cursor': encode_cursor(cursor_of(self.posts[0]))},
+        )
+        self.assertEqual(
+            [post['id'] for post in response.json()['posts']],
+            [post.pk for post in self.posts[1:]],
+        )
+
+    def test_trending_and_bulk_delete(self):
+        """Рейтинг видит пост с шарда, удаление убирает его отовсюду."""
+        post = self.posts[1]
+        trending.bump_post(post, 1)
+        self.assertEqual(trending.top_posts(), [post])
+        self.assertEqual(bulk.delete_posts([post.pk, self.posts[2].pk]), 2)
+        self.assertFalse(Post.objects.using('shard1').filter(
+            pk=post.pk
+        ).exists())
+        self.assertFalse(PostTrend.objects.exists())
+        self.assertEqual(trending.top_posts(), [])
+
+    def test_archive_old_posts(self):
+        """Старые посты каждого шарда уходят в архив в default."""
+        old = timezone.now() - timedelta(days=400)
+        Post.objects.using('shard1').filter(pk=self.posts[1].pk).update(
+            pub_date=old
+        )
+        Post.objects.filter(pk=self.posts[0].pk).update(pub_date=old)
+        self.assertEqual(archive.archive_old_posts(), 2)
+        self.assertCountEqual(
+            ArchivedPost.objects.values_list('pk', flat=True),
+            [self.posts[0].pk, self.posts[1].pk],
+        )
+        self.assertEqual(
+            list(Post.objects.using('shard1').all()), [self.posts[3]]
+        )
+
+    def test_estimated_count_on_shard(self):
+        """Оценка числа постов шарда идёт по ключам этого шарда."""
+        for number in range(3):
+            Post.objects.create(author=self.reader, text=f'Ещё {number}')
+        posts = Post.objects.using('shard1')
+        paginator = EstimatedCountPaginator(posts, 10)
+        paginator.exact_limit = 1
+        ids = list(posts.values_list('pk', flat=True))
+        self.assertEqual(paginator.count, max(ids) - min(ids) + 1)
@@ -0,0 +1,75 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import bulk
+from posts.models import AuthorStats, Comment, Group, Post, User
+from posts.stats import month_of
+
+
+class AuthorStatsTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост {number}'
+            )
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий'
+        )
+
+    def stats(self):
+        return AuthorStats.objects.get(author=self.author)
+
+    def test_incremental(self):
+        """Записи постов и комментариев сдвигают строку статистики."""
+        stats = self.stats()
+        month = month_of(self.posts[0].pub_date)
+        self.assertEqual(stats.post_count, 3)
+        self.assertEqual(stats.comments_received, 1)
+        self.assertEqual(json.loads(stats.months), {month: 3})
+        self.assertEqual(json.loads(stats.groups), {str(self.group.pk): 3})
+        post = self.posts[1]
+        post.group = None
+        post.save()
+        self.posts[2].delete()
+        stats = self.stats()
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(json.loads(stats.months), {month: 2})
+        self.assertEqual(json.loads(stats.groups), {str(self.group.pk): 1})
+
+    def test_rebuild_matches_incremental(self):
+        """Пересчёт командой даёт ту же строку, что и сигналы."""
+        expected = self.stats()
+        AuthorStats.objects.all().delete()
+        call_command('rebuild_author_stats', stdout=StringIO())
+        stats = self.stats()
+        for field in ('post_count', 'comments_received', 'months', 'groups'):
+            self.assertEqual(
+                getattr(stats, field), getattr(expected, field), field
+            )
+
+    def test_bulk_delete_rebuilds(self):
+        """Массовое удаление мимо сигналов пересчитывает авторов."""
+        bulk.delete_posts([self.posts[0].pk])
+        stats = self.stats()
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(stats.comments_received, 0)
+
+    def test_profile_reads_stats(self):
+        """Профиль показывает готовую статистику."""
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.assertEqual(response.context['page_obj'].paginator.count, 3)
+        self.assertEqual(response.context['active_groups'], [(self.group, 3)])
+        self.assertContains(response, 'Получено комментариев: 1')
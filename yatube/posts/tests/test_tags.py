@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import tags
+from posts.models import Mention, Post, PostTag, Tag, User
+
+
+class TagsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.posts = [
+            Post.objects.create(
+                author=self.author, text=f'Пост {number} #Django @reader'
+            )
+            for number in range(3)
+        ]
+        Post.objects.create(author=self.author, text='#python без упоминаний')
+
+    def test_indexed_on_save(self):
+        """Теги и упоминания пишутся при сохранении и правке текста."""
+        post = self.posts[0]
+        self.assertEqual(
+            list(post.tag_links.values_list('tag__name', flat=True)),
+            ['django'],
+        )
+        self.assertEqual(post.mentions.get().user, self.reader)
+        post.text = 'Без тегов'
+        post.save()
+        self.assertFalse(PostTag.objects.filter(post=post).exists())
+        self.assertFalse(Mention.objects.filter(post=post).exists())
+
+    def test_tag_feed(self):
+        """Лента тега — посты с тегом от новых к старым."""
+        response = self.client.get(
+            reverse('posts:tag_posts', kwargs={'name': 'django'})
+        )
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count, 3)
+        self.assertEqual(list(page), self.posts[::-1])
+        self.assertContains(response, 'href="/tag/django/"')
+
+    def test_mentions_feed(self):
+        """Лента упоминаний показывает посты, где упомянут читатель."""
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:mentions'))
+        self.assertEqual(list(response.context['page_obj']), self.posts[::-1])
+
+    def test_autocomplete(self):
+        """Автодополнение ищет теги по префиксу."""
+        Tag.objects.create(name='djangocon')
+        self.assertEqual(tags.complete('#Dja'), ['django', 'djangocon'])
+        response = self.client.get(
+            reverse('posts:tag_autocomplete'), {'q': 'py'}
+        )
+        self.assertEqual(response.json(), {'tags': ['python']})
@@ -0,0 +1,79 @@
+import time
+
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+
+from jobs.queue import run_pending
+from posts import trending
+from posts.models import Comment, Group, Post, PostTrend, User
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.old_post = Post.objects.create(
+            author=cls.user, text='Старый пост', group=cls.group
+        )
+        cls.new_post = Post.objects.create(author=cls.user, text='Новый пост')
+
+    def test_old_events_decay(self):
+        """Старые события весят меньше свежих."""
+        now = time.time()
+        trending.bump_post(
+            self.old_post, 3, now - 2 * settings.TRENDING_HALF_LIFE
+        )
+        trending.bump_post(self.new_post, 1, now)
+        self.assertEqual(
+            trending.top_posts(), [self.new_post, self.old_post]
+        )
+        score = PostTrend.objects.get(post_id=self.old_post.pk).score
+        self.assertAlmostEqual(trending.current_score(score, now), 0.75)
+
+    def test_events_accumulate(self):
+        """События одного поста складываются в одной строке."""
+        now = time.time()
+        for _ in range(4):
+            trending.bump_post(self.new_post, 1, now)
+        score = PostTrend.objects.get(post_id=self.new_post.pk).score
+        self.assertAlmostEqual(trending.current_score(score, now), 4)
+
+    def test_comment_bumps_post(self):
+        """Комментарий поднимает пост в рейтинге."""
+        Comment.objects.create(
+            post=self.old_post, author=self.user, text='Комментарий'
+        )
+        run_pending()
+        self.assertEqual(trending.top_posts(), [self.old_post])
+
+    def test_group_trending(self):
+        """Рейтинг группы показывает только посты этой группы."""
+        trending.bump_post(self.old_post, 1)
+        trending.bump_post(self.new_post, 2)
+        run_pending()
+        response = self.client.get(
+            reverse('posts:group_trending', kwargs={'slug': self.group.slug})
+        )
+        self.assertEqual(response.context['posts'], [self.old_post])
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(
+            response.context['posts'], [self.new_post, self.old_post]
+        )
+        self.assertEqual(response.context['groups'], [self.group])
+
+    def test_prune(self):
+        """Остывшие записи удаляются из рейтинга."""
+        now = time.time()
+        trending.bump_post(
+            self.old_post, 1, now - 10 * settings.TRENDING_HALF_LIFE
+        )
+        trending.bump_post(self.new_post, 1, now)
+        trending.prune(now)
+        self.assertEqual(trending.top_posts(), [self.new_post])
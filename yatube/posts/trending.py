@@ -0,0 +1,101 @@
+"""Трендовые посты и группы.
+
+Используется «прямое» затухание (forward decay): событие с весом w в
+момент t добавляет к рейтингу w * exp(λt), где λ = ln 2 / период
+полураспада. Такие вклады не нужно пересчитывать со временем — порядок
+строк сохраняется, поэтому топ читается по индексу на score, а каждое
+событие обновляет одну строку. Чтобы не переполнить float, хранится
+логарифм суммы.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from users.cache import attach_authors
+
+from .cache import attach_groups
+from .models import Group, GroupTrend, PostTrend
+from .sharding import posts_in_bulk
+
+
+def _decay_rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def _log_weight(weight, when):
+    return math.log(weight) + _decay_rate() * when
+
+
+def _log_add(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current_score(score, now=None):
+    """Возвращает текущее значение рейтинга по сохранённому логарифму."""
+    now = time.time() if now is None else now
+    return math.exp(score - _decay_rate() * now)
+
+
+def _bump(model, lookup, weight, when, defaults=None):
+    when = time.time() if when is None else when
+    increment = _log_weight(weight, when)
+    with transaction.atomic():
+        trend, created = model.objects.select_for_update().get_or_create(
+            defaults=dict(defaults or {}, score=increment), **lookup
+        )
+        if not created:
+            trend.score = _log_add(trend.score, increment)
+            trend.save(update_fields=['score'])
+
+
+def bump_post(post, weight, when=None):
+    """Добавляет посту событие с весом weight в момент when."""
+    _bump(
+        PostTrend, {'post_id': post.pk}, weight, when,
+        defaults={'group_id': post.group_id},
+    )
+
+
+def bump_group(group_id, weight, when=None):
+    """Добавляет группе событие с весом weight в момент when."""
+    _bump(GroupTrend, {'group_id': group_id}, weight, when)
+
+
+def top_posts(group=None, count=None):
+    """Топ постов (всех или одной группы) по убыванию рейтинга."""
+    trends = PostTrend.objects.order_by('-score')
+    if group is not None:
+        trends = trends.filter(group=group)
+    ids = list(
+        trends.values_list('post_id', flat=True)
+        [:count or settings.TRENDING_COUNT]
+    )
+    posts = posts_in_bulk(ids)
+    return attach_groups(attach_authors(
+        posts[pk] for pk in ids if pk in posts
+    ))
+
+
+def top_groups(count=None):
+    """Топ групп по убыванию рейтинга."""
+    ids = list(
+        GroupTrend.objects.order_by('-score')
+        .values_list('group_id', flat=True)
+        [:count or settings.TRENDING_COUNT]
+    )
+    groups = Group.objects.in_bulk(ids)
+    return [groups[pk] for pk in ids if pk in groups]
+
+
+def prune(now=None):
+    """Удаляет строки, рейтинг которых упал ниже TRENDING_MIN_SCORE."""
+    now = time.time() if now is None else now
+    threshold = _log_weight(settings.TRENDING_MIN_SCORE, now)
+    deleted, _ = PostTrend.objects.filter(score__lt=threshold).delete()
+    groups_deleted, _ = GroupTrend.objects.filter(
+        score__lt=threshold
+    ).delete()
+    return deleted + groups_deleted
@@ -6,8 +6,28 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('delta/', views.index_delta, name='index_delta'),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/delta/',
+        views.group_delta,
+        name='group_delta'
+    ),
+    path('tag/<str:name>/', views.tag_posts, name='tag_posts'),
+    path(
+        'tags/autocomplete/',
+        views.tag_autocomplete,
+        name='tag_autocomplete'
+    ),
+    path('mentions/', views.mentions, name='mentions'),
+    path('trending/', views.trending, name='trending'),
+    path(
+        'group/<slug:slug>/trending/',
+        views.group_trending,
+        name='group_trending'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
@@ -18,6 +38,8 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/delta/', views.follow_delta, name='follow_delta'),
+    path('live/poll/', views.live_poll, name='live_poll'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,14 +1,39 @@
+import queue
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 
+from core.batching import get_writer
+from core.ratelimit import ratelimit
+from notifications.digests import notify_comment, notify_follow
+from users.cache import attach_authors, get_author
 
-from .models import Group, Follow, Post, User
+from .models import (
+    ArchivedPost, Group, Follow, FollowSuggestion, Post, Tag
+)
+from .archive import author_posts, find_post
+from .cache import attach_groups, get_group
+from .delta import (
+    EMPTY, author_markers, cursor_of, decode_cursor, encode_cursor,
+    feed_marker, posts_since
+)
 from .forms import CommentForm, PostForm
+from .graph import graph
+from .live import get_broker, make_filter, post_event
+from .richtext import refresh
+from .stats import get_stats, profile_stats
+from .sharding import (
+    followed_posts, get_post, is_sharded, shard_for, sharded
+)
+from .tags import complete, mentioning, tagged
+from .trending import top_groups, top_posts
 from .utils import paginations
 
 
 def index(request):
-    post_list = Post.objects.all()
+    post_list = sharded(Post.objects.all())
     page_obj = paginations(request, post_list)
     context = {
         'page_obj': page_obj,
@@ -17,41 +42,136 @@ def index(request):
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = paginations(request, post_list)
+    group, generation = get_group(slug)
+    post_list = sharded(group.posts.all())
+    page_obj = paginations(request, post_list, count=group.post_count)
     context = {
         'group': group,
+        'generation': generation,
         'page_obj': page_obj,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+def tag_posts(request, name):
+    tag = get_object_or_404(Tag, name=name.lower())
+    post_list, count = tagged(tag)
+    page_obj = paginations(request, post_list, count=count)
+    context = {
+        'tag': tag,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/tag_list.html', context)
+
+
+def tag_autocomplete(request):
+    return JsonResponse({'tags': complete(request.GET.get('q', ''))})
+
+
+@login_required
+def mentions(request):
+    post_list, count = mentioning(request.user)
+    page_obj = paginations(request, post_list, count=count)
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/mentions.html', context)
+
+
+def group_index(request):
+    page_obj = paginations(request, Group.objects.order_by('title'))
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/groups.html', context)
+
+
+def trending(request):
+    posts = top_posts()
+    refresh(posts)
+    context = {
+        'posts': posts,
+        'groups': top_groups(),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def group_trending(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    posts = top_posts(group=group)
+    refresh(posts)
+    context = {
+        'group': group,
+        'posts': posts,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    page_obj = paginations(request, post_list)
+    author = get_author(username)
+    stats = get_stats(author.pk)
+    post_list = author_posts(author)
+    page_obj = paginations(
+        request, post_list, count=stats and stats.post_count
+    )
+    months, active_groups = profile_stats(stats) if stats else ([], [])
+    groups = {}
+    if active_groups:
+        groups = Group.objects.in_bulk([pk for pk, _ in active_groups])
+        active_groups = [
+            (groups[pk], total) for pk, total in active_groups
+            if pk in groups
+        ]
     context = {
         'author': author,
         'page_obj': page_obj,
+        'stats': stats,
+        'months': months,
+        'active_groups': active_groups,
+        # Группы постов страницы обычно среди активных — карточкам не
+        # придётся читать их вторым запросом.
+        'known_groups': list(groups.values()),
+        'following': (
+            request.user.is_authenticated
+            and graph.is_following(request.user.pk, author.pk)
+        ),
+        'follower_count': graph.follower_count(author.pk),
+        'following_count': graph.following_count(author.pk),
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    user = post.author
-    count = Post.objects.filter(author_id=user).all().count()
+    post = find_post(post_id)
+    if post is None:
+        raise Http404('Пост не найден')
+    archived = isinstance(post, ArchivedPost)
+    stats = get_stats(post.author_id)
+    if stats is not None:
+        count = stats.post_count
+    else:
+        count = (
+            Post.objects.using(shard_for(post.author_id)).filter(
+                author_id=post.author_id
+            ).count()
+            + ArchivedPost.objects.filter(author_id=post.author_id).count()
+        )
+    comments = attach_authors(post.comments.visible())
+    refresh([post, *comments])
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
+        'author': post.author,
         'count': count,
+        'comments': comments,
         'form': form,
+        'archived': archived,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@ratelimit('post_create')
 def post_create(request):
     form = PostForm(request.POST or None)
     post = form.save(commit=False)
@@ -64,7 +184,9 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_post(post_id)
+    if post is None:
+        raise Http404('Пост не найден')
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
 
@@ -85,14 +207,21 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment')
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_post(post_id)
+    if post is None:
+        raise Http404('Пост не найден')
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        if settings.COMMENT_WRITE_BATCHING:
+            get_writer('comments').save(comment, after=notify_comment)
+        else:
+            comment.save()
+            notify_comment(comment)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'post': post,
@@ -103,32 +232,115 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user
-    )
+    posts = followed_posts(request.user)
     page_obj = paginations(request, posts)
+    suggestions = FollowSuggestion.objects.filter(
+        user=request.user
+    ).select_related('author')[:settings.FOLLOW_SUGGESTIONS_COUNT]
     context = {
         'page_obj': page_obj,
+        'suggestions': suggestions,
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('profile_follow', methods=None)
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_author(username)
     if request.user != author:
-        Follow.objects.get_or_create(
+        follow, created = Follow.objects.get_or_create(
             user=request.user,
             author=author
         )
+        if created:
+            notify_follow(follow)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_author(username)
     Follow.objects.filter(
         user=request.user,
         author=author
     ).delete()
     return redirect('posts:profile', username=username)
+
+
+def live_poll(request):
+    """Ждёт новые посты не дольше LIVE_POLL_TIMEOUT (long-poll).
+
+    Под WSGI; в yatube.asgi этот путь без потока обслуживает
+    posts.live.poll.
+    """
+    authors = None
+    if request.GET.get('feed') == 'follow':
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Нужно войти на сайт'}, status=403)
+        authors = set(graph.following(request.user.pk))
+    matches = make_filter(request.GET.get('group'), authors)
+    events = queue.Queue()
+
+    def on_event(event):
+        if matches(event):
+            events.put(event)
+
+    broker = get_broker()
+    broker.subscribe(on_event)
+    try:
+        received = []
+        try:
+            received.append(
+                events.get(timeout=settings.LIVE_POLL_TIMEOUT)
+            )
+            while True:
+                received.append(events.get_nowait())
+        except queue.Empty:
+            pass
+    finally:
+        broker.unsubscribe(on_event)
+    return JsonResponse({'count': len(received), 'posts': received})
+
+
+def _delta(request, marker, post_list):
+    """Посты ленты новее курсора клиента или пустой ответ 304."""
+    try:
+        cursor = decode_cursor(request.GET.get('cursor'))
+    except ValueError:
+        return JsonResponse({'error': 'Неверный курсор'}, status=400)
+    if marker <= cursor:
+        return HttpResponse(status=304)
+    if not is_sharded():
+        post_list = post_list.select_related('author', 'group')
+    posts, more = posts_since(post_list, cursor)
+    if not posts:
+        return HttpResponse(status=304)
+    if is_sharded():
+        # Авторы и группы из default: на шардах их копии могут отставать.
+        posts = attach_groups(attach_authors(posts))
+    return JsonResponse({
+        'posts': [post_event(post) for post in posts],
+        'cursor': encode_cursor(cursor_of(posts[-1])),
+        'more': more,
+    })
+
+
+def index_delta(request):
+    post_list = Post.objects.all()
+    return _delta(request, feed_marker('index', post_list), post_list)
+
+
+def group_delta(request, slug):
+    group, _ = get_group(slug)
+    post_list = Post.objects.filter(group=group)
+    marker = feed_marker(f'group:{group.pk}', post_list)
+    return _delta(request, marker, post_list)
+
+
+@login_required
+def follow_delta(request):
+    authors = list(graph.following(request.user.pk))
+    markers = author_markers(authors)
+    post_list = Post.objects.filter(author_id__in=authors)
+    return _delta(request, max(markers.values(), default=EMPTY), post_list)
@@ -0,0 +1,102 @@
+"""Кеш кратких сведений о пользователях.
+
+Для вывода автора шаблонам нужны только id, username и имя. Эти поля
+хранятся в двух уровнях: LRU процесса с коротким timeout и общий кеш,
+который сбрасывается при сохранении или удалении пользователя. Из
+сводки собирается облегчённый экземпляр User — его можно класть в
+контекст и в кеш связи post.author, но нельзя сохранять.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+
+from core.cache import LRUCache
+
+User = get_user_model()
+
+ID_KEY = 'user:id:{}'
+NAME_KEY = 'user:name:{}'
+FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+_local = LRUCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TIMEOUT)
+
+
+def to_user(summary):
+    """Облегчённый User из сводки (id, username, first_name, last_name)."""
+    user = User(**dict(zip(FIELDS, summary)))
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+def summaries(user_ids):
+    """Сводки пользователей: {id: сводка}; неизвестные id пропускаются."""
+    found = {}
+    missing = []
+    for user_id in set(user_ids) - {None}:
+        summary = _local.get(ID_KEY.format(user_id))
+        if summary is None:
+            missing.append(user_id)
+        else:
+            found[user_id] = summary
+    if missing:
+        shared = cache.get_many([ID_KEY.format(pk) for pk in missing])
+        for key, summary in shared.items():
+            _local.set(key, summary)
+            found[summary[0]] = summary
+        missing = [pk for pk in missing if pk not in found]
+    if missing:
+        rows = User.objects.filter(pk__in=missing).values_list(*FIELDS)
+        fresh = {ID_KEY.format(row[0]): row for row in rows}
+        cache.set_many(fresh)
+        for key, summary in fresh.items():
+            _local.set(key, summary)
+            found[summary[0]] = summary
+    return found
+
+
+def get_author(username):
+    """Облегчённый User по username или Http404."""
+    key = NAME_KEY.format(username)
+    user_id = _local.get(key)
+    if user_id is None:
+        user_id = cache.get(key)
+    if user_id is not None:
+        summary = summaries([user_id]).get(user_id)
+        if summary is not None and summary[1] == username:
+            _local.set(key, user_id)
+            return to_user(summary)
+    summary = User.objects.filter(username=username).values_list(
+        *FIELDS
+    ).first()
+    if summary is None:
+        raise Http404('Пользователь не найден')
+    cache.set_many({key: summary[0], ID_KEY.format(summary[0]): summary})
+    _local.set(key, summary[0])
+    _local.set(ID_KEY.format(summary[0]), summary)
+    return to_user(summary)
+
+
+def attach_authors(objects):
+    """Подставляет авторов из кеша в связь author; возвращает список.
+
+    Так шаблон выводит автора каждого поста или комментария без
+    отдельного запроса к таблице пользователей.
+    """
+    objects = list(objects)
+    authors = summaries(obj.author_id for obj in objects)
+    for obj in objects:
+        summary = authors.get(obj.author_id)
+        if summary is not None:
+            type(obj).author.field.set_cached_value(obj, to_user(summary))
+    return objects
+
+
+def forget_user(user_id, *usernames):
+    """Сбрасывает сводку пользователя во всех уровнях кеша."""
+    keys = [ID_KEY.format(user_id)]
+    keys.extend(NAME_KEY.format(username) for username in usernames)
+    cache.delete_many(keys)
+    for key in keys:
+        _local.delete(key)
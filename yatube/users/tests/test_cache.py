@@ -0,0 +1,51 @@
+from django.http import Http404
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from users.cache import attach_authors, get_author
+
+
+class UserCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+
+    def test_get_author(self):
+        """Автор по username берётся из кеша без запроса к базе."""
+        get_author('author')
+        with self.assertNumQueries(0):
+            author = get_author('author')
+        self.assertEqual(author, self.user)
+        self.assertEqual(author.get_full_name(), 'Лев Толстой')
+        with self.assertRaises(Http404):
+            get_author('nobody')
+
+    def test_save_invalidates(self):
+        """Изменение пользователя сразу видно в кеше."""
+        get_author('author')
+        self.user.first_name = 'Алексей'
+        self.user.save()
+        self.assertEqual(get_author('author').get_full_name(),
+                         'Алексей Толстой')
+
+    def test_attach_authors(self):
+        """Авторы постов подставляются одним обращением к кешу."""
+        for number in range(3):
+            Post.objects.create(author=self.user, text=f'Пост {number}')
+        attach_authors(Post.objects.all())
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(0):
+            posts = attach_authors(posts)
+            names = {post.author.get_full_name() for post in posts}
+        self.assertEqual(names, {'Лев Толстой'})
+
+    def test_profile_uses_cache(self):
+        """Профиль находит автора по кешу."""
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.assertEqual(response.context['author'], self.user)
@@ -0,0 +1,40 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with any ASGI server, for example::
+
+    uvicorn yatube.asgi:application
+
+Django 2.2 has no native ASGI support, so the WSGI application is served
+through ``core.asgi.AsgiHandler``: slow clients are handled by the event
+loop and views run in a bounded thread pool (``ASGI_THREADS``). The
+live feed stream (``/live/stream/``) and long-poll (``/live/poll/``) are
+native ASGI apps and never take a thread.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+from core.asgi import AsgiHandler  # noqa: E402
+
+wsgi_application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from core.startup import warm  # noqa: E402
+from posts.graph import preload  # noqa: E402
+from posts.links import precompile  # noqa: E402
+from posts.live import poll, stream  # noqa: E402
+
+preload()
+precompile()
+if settings.STARTUP_WARM:
+    warm()
+
+application = AsgiHandler(
+    wsgi_application, routes={'/live/stream/': stream, '/live/poll/': poll}
+)
@@ -45,6 +45,8 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'jobs.apps.JobsConfig',
+    'notifications.apps.NotificationsConfig',
     'sorl.thumbnail',
 ]
 
@@ -81,6 +83,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Размер пула потоков, в котором yatube.asgi выполняет представления.
+ASGI_THREADS = 8
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -92,6 +97,18 @@ DATABASES = {
     }
 }
 
+# Шарды постов и комментариев (posts/sharding.py): отдельные файлы SQLite
+# рядом с основной базой. Пока POST_SHARDS не задан в окружении, всё
+# лежит в default, например: POST_SHARDS=default,shard1,shard2.
+for _alias in ('shard1', 'shard2', 'shard3'):
+    DATABASES[_alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'{_alias}.sqlite3'),
+    }
+POST_SHARDS = tuple(os.getenv('POST_SHARDS', 'default').split(','))
+SHARD_ID_BLOCK = 100
+DATABASE_ROUTERS = ['posts.sharding.ShardRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -146,6 +163,92 @@ FIRST_PAGE_RECORDS = NUMBER_OF_POSTS_PER_PAGE
 SECOND_PAGE_RECORDS = 3
 ALL_RECORDS_ON_PAGE = FIRST_PAGE_RECORDS + SECOND_PAGE_RECORDS
 
+FOLLOW_SUGGESTIONS_COUNT = 10
+FOLLOW_SUGGESTIONS_CHUNK = 500
+FOLLOW_SUGGESTIONS_CO_READERS = 50
+FOLLOW_SUGGESTIONS_FOF_WEIGHT = 1.0
+FOLLOW_SUGGESTIONS_CO_FOLLOW_WEIGHT = 0.5
+
+GROUP_CACHE_SIZE = 256
+GROUP_CACHE_TIMEOUT = 60
+
+# Отрендеренные карточки постов (posts/cards.py), секунды.
+CARD_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Сводки пользователей в LRU процесса: размер и время жизни в секундах.
+USER_CACHE_SIZE = 1024
+USER_CACHE_TIMEOUT = 30
+
+JOBS_WORKERS = 2
+JOBS_POLL_INTERVAL = 1
+JOBS_CLAIM_BATCH = 10
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 10
+JOBS_RETRY_MAX_DELAY = 60 * 60
+JOBS_LOCK_TIMEOUT = 10 * 60
+JOBS_RUN_EAGERLY = False
+
+# Размер пачки массовых операций админки: записей на одну задачу.
+BULK_CHUNK_SIZE = 500
+
+# Посты старше стольких дней переносятся в архив (команда archive_posts).
+ARCHIVE_AFTER_DAYS = 365
+
+# Граф подписок в памяти (posts/graph.py): загружать ли его при старте
+# процесса, как часто, в секундах, сверять с изменениями других и через
+# сколько секунд перечитывать в любом случае (кеш может быть не общим).
+FOLLOW_GRAPH_PRELOAD = True
+FOLLOW_GRAPH_CHECK_INTERVAL = 5
+FOLLOW_GRAPH_MAX_AGE = 300
+
+# Прогрев процесса при импорте wsgi/asgi (core/startup.py): дерево URL,
+# шаблоны, gc.freeze(). С gunicorn --preload делается один раз до fork.
+STARTUP_WARM = True
+
+# Статистика в профиле: сколько последних месяцев и групп показывать.
+PROFILE_STATS_MONTHS = 12
+PROFILE_STATS_GROUPS = 5
+
+# Сколько тегов отдаёт автодополнение.
+TAG_AUTOCOMPLETE_COUNT = 10
+
+TRENDING_COUNT = 10
+TRENDING_HALF_LIFE = 24 * 60 * 60
+TRENDING_MIN_SCORE = 0.01
+TRENDING_COMMENT_WEIGHT = 1.0
+TRENDING_FOLLOW_WEIGHT = 2.0
+TRENDING_POST_WEIGHT = 1.0
+
+# Живые обновления лент: брокер событий, размер очереди одного клиента,
+# интервал keepalive потока SSE и таймаут long-poll в секундах.
+LIVE_BROKER = 'posts.live.LocalBroker'
+LIVE_QUEUE_SIZE = 100
+LIVE_KEEPALIVE = 15
+LIVE_POLL_TIMEOUT = 25
+
+# Сколько постов не больше отдаёт за раз запрос обновлений ленты.
+DELTA_MAX_POSTS = 50
+
+# Показывать комментарии только после одобрения модератором.
+COMMENTS_PREMODERATION = False
+
+# Объединение вставок комментариев в общие транзакции (core.batching):
+# окно сбора пачки в секундах, её наибольший размер и сколько секунд
+# запрос ждёт коммита своей записи.
+COMMENT_WRITE_BATCHING = False
+WRITE_BATCH_WINDOW = 0.005
+WRITE_BATCH_SIZE = 100
+WRITE_BATCH_TIMEOUT = 10
+
+# Лимиты запросов на запись: {имя: (число запросов, период в секундах)}.
+# Считаются отдельно для пользователя и для IP-адреса.
+RATELIMITS = {
+    'post_create': (20, 3600),
+    'add_comment': (60, 3600),
+    'profile_follow': (100, 3600),
+    'signup': (10, 3600),
+}
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -153,10 +256,25 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+NOTIFICATIONS_WINDOW = 15 * 60
+NOTIFICATIONS_MIN_INTERVAL = 60 * 60
+NOTIFICATIONS_BATCH_SIZE = 100
+NOTIFICATIONS_MAX_EVENTS = 20
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# LocMemCache — только для разработки: у каждого процесса он свой. В
+# бою нужен общий бэкенд (memcached, Redis): через него процессы видят
+# счётчики core.metrics (job_stats, ограничения частоты), поколения
+# групп и графа подписок.
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+# Сессии в кеше с записью в базу только при изменениях; сессии гостей —
+# в подписанной cookie. Просроченные удаляются пачками.
+SESSION_ENGINE = 'core.sessions'
+SESSION_SIGNED_ANONYMOUS = True
+SESSION_CLEAR_BATCH = 1000
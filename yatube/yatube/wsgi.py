@@ -14,3 +14,14 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from core.startup import warm  # noqa: E402
+from posts.graph import preload  # noqa: E402
+from posts.links import precompile  # noqa: E402
+
+preload()
+precompile()
+if settings.STARTUP_WARM:
+    warm()